@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-call connections vs the pooled Database.
+
+Usage:
+    python -m benchmarks.db_pool --users 200 --iterations 2000
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from bot.database import Database
+
+
+async def seed(db: Database, users: int):
+    """Fill the database with synthetic users"""
+    for i in range(users):
+        await db.add_user(i, f"user{i}", f"User {i}", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+
+
+async def run_lookups(db: Database, users: int, iterations: int) -> float:
+    """Run get_user lookups and return the elapsed time in seconds"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        await db.get_user(i % users)
+    return time.perf_counter() - start
+
+
+async def main(users: int, iterations: int, pool_size: int):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # No user cache: both passes must reach SQLite to compare connection handling
+        db = Database(str(Path(temp_dir) / "bench.db"), pool_size=pool_size, user_cache_size=0)
+        await db.init_db()
+        await seed(db, users)
+
+        pooled = await run_lookups(db, users, iterations)
+
+        # With the pool closed every call falls back to its own connection
+        await db.close()
+        per_call = await run_lookups(db, users, iterations)
+
+    print(f"get_user x {iterations} ({users} users)")
+    print(f"  per-call connections: {per_call:.3f}s ({per_call / iterations * 1e6:.0f} us/call)")
+    print(f"  pooled ({pool_size} conns):  {pooled:.3f}s ({pooled / iterations * 1e6:.0f} us/call)")
+    print(f"  speedup: {per_call / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.iterations, args.pool_size))
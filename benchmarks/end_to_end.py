@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark: the bot's real Dispatcher (bot.main.create_dispatcher)
+against a stand-in Telegram Bot API server on localhost.
+
+The database is seeded with synthetic members carrying registration_data blobs
+drawn from the questionnaire options, plus approved lots. Then virtual users
+replay scripted sessions concurrently:
+- register (invite code, profile, every questionnaire section);
+- browse Resources, Lots and Friends;
+- run a deal with a seeded member.
+Each update is timed from feed_update() to its return, outgoing Bot API calls
+included. The send queue is not throttled unless --throttle is given, so the
+numbers measure the bot rather than Telegram's rate limits.
+
+Usage:
+    python -m benchmarks.end_to_end --users 500 --sessions 50 --concurrency 10
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+os.environ.setdefault("BOT_TOKEN", "42:TEST")
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Update
+
+from benchmarks.fake_telegram import BOT_USER, FakeTelegram
+from bot.config import SEND_CHAT_BURST, SEND_CHAT_RATE, SEND_GLOBAL_RATE, SEND_MAX_RETRIES
+from bot.database import Database
+from bot.form_data import (
+    AIRCRAFT_TYPES, CITIES, EQUIPMENT_TYPES, INTRO_CATEGORIES, PROPERTY_TYPES,
+    RESOURCE_ACCESS_CATEGORIES, SKILL_CATEGORIES, VEHICLE_TYPES, VESSEL_LOCATIONS, VESSEL_TYPES
+)
+from bot.fsm_storage import SQLiteStorage
+from bot.item_hashes import hash_item
+from bot.main import create_dispatcher, setup_bot_session
+from bot.metrics import metrics
+from bot.multiselect import markup_editor
+from bot.send_queue import SendQueue
+
+INVITE_CODE = "JOY"
+# Virtual users registering during the run get ids above the seeded members
+CLIENT_ID_BASE = 10_000_000
+# Upper bound on questionnaire steps, so a changed flow fails loudly instead of spinning
+MAX_REGISTRATION_STEPS = 400
+# Lots seeded per member
+LOTS_PER_USER = 2
+
+
+def _items(categories: Dict) -> List[str]:
+    return [item for category in categories.values() for item in category["items"]]
+
+
+def synthetic_registration(rng: random.Random, main_city: str) -> Dict:
+    """registration_data shaped like what the questionnaire saves"""
+    cities = [main_city] + rng.sample(CITIES, 2)
+    data = {
+        "name": f"Member {rng.randrange(10**6)}",
+        "main_city": main_city,
+        "instagram": "-",
+        "about": "Synthetic member for load tests",
+        "selected_main_cities": [main_city],
+        "selected_skill_items": rng.sample(_items(SKILL_CATEGORIES), 4),
+    }
+    # Each member fills in a few of the optional sections
+    sections = {
+        "ra": lambda: {"selected_ra_items": rng.sample(_items(RESOURCE_ACCESS_CATEGORIES), 2)},
+        "intro": lambda: {"selected_intro_items": rng.sample(_items(INTRO_CATEGORIES), 2),
+                          "selected_intro_cities": cities[:2]},
+        "property": lambda: {"selected_property_types": rng.sample(PROPERTY_TYPES, 2),
+                             "selected_prop_cities": cities},
+        "car": lambda: {"car_info": rng.choice(VEHICLE_TYPES), "selected_car_cities": cities[:1]},
+        "equipment": lambda: {"selected_equipment_types": rng.sample(EQUIPMENT_TYPES, 2),
+                              "selected_equip_cities": cities[:2]},
+        "aircraft": lambda: {"selected_aircraft_types": rng.sample(AIRCRAFT_TYPES, 1),
+                             "selected_air_cities": cities[:1]},
+        "vessel": lambda: {"selected_vessel_types": rng.sample(VESSEL_TYPES, 1),
+                           "selected_vessel_cities": rng.sample(VESSEL_LOCATIONS, 1)},
+    }
+    for name in rng.sample(sorted(sections), 3):
+        data.update(sections[name]())
+    return data
+
+
+async def seed(db: Database, users: int, rng: random.Random):
+    """Members with registration data and approved lots, spread over the city list"""
+    for user_id in range(1, users + 1):
+        city = CITIES[user_id % len(CITIES)]
+        registration = synthetic_registration(rng, city)
+        async with db.unit_of_work():
+            await db.add_user(user_id, f"member{user_id}", registration["name"], city, city,
+                              registration["about"], "-")
+            await db.add_user_answer(user_id, "registration_data", json.dumps(registration))
+        for i in range(LOTS_PER_USER):
+            await db.add_lot(user_id, rng.choice(["share", "help"]), f"Lot {user_id}.{i}",
+                             "Synthetic lot", category=rng.choice(["Equipment", "Cars", "Real Estate"]),
+                             status="approved")
+
+
+class Recorder:
+    """Per-update latencies, grouped by scenario"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+
+    def add(self, scenario: str, seconds: float):
+        self.latencies[scenario].append(seconds)
+
+    def all(self) -> List[float]:
+        return [value for values in self.latencies.values() for value in values]
+
+
+class VirtualUser:
+    """One Telegram user talking to the bot in a private chat"""
+
+    _update_ids = itertools.count(1)
+
+    def __init__(self, user_id: int, dp, bot: Bot, telegram: FakeTelegram, recorder: Recorder):
+        self.user_id = user_id
+        self.dp = dp
+        self.bot = bot
+        self.telegram = telegram
+        self.recorder = recorder
+        self.scenario = "idle"
+        self.sender = {"id": user_id, "is_bot": False, "first_name": f"Client {user_id}"}
+
+    async def _feed(self, update: Dict):
+        update["update_id"] = next(self._update_ids)
+        start = time.perf_counter()
+        await self.dp.feed_update(self.bot, Update.model_validate(update))
+        self.recorder.add(self.scenario, time.perf_counter() - start)
+        # Like a person, look at the debounced keyboard before the next tap (not timed)
+        await markup_editor.wait_applied(self.user_id)
+
+    async def send(self, text: str):
+        await self._feed({"message": {
+            "message_id": next(self._update_ids), "date": int(time.time()),
+            "chat": {"id": self.user_id, "type": "private"}, "from": self.sender, "text": text,
+        }})
+
+    def buttons(self) -> List[Dict]:
+        return self.telegram.buttons(self.user_id)
+
+    def _message_with(self, data: str) -> Optional[int]:
+        """Newest message in the chat showing a button with this callback data"""
+        for message_id, rows in sorted(self.telegram.keyboards.get(self.user_id, {}).items(), reverse=True):
+            if any(button.get("callback_data") == data for row in rows for button in row):
+                return message_id
+        return None
+
+    async def press(self, data: str):
+        """Tap the button with this callback data (on the newest keyboard if none shows it)"""
+        message_id = self._message_with(data) or self.telegram.keyboard_message(self.user_id) or 1
+        await self._feed({"callback_query": {
+            "id": str(next(self._update_ids)), "from": self.sender, "chat_instance": str(self.user_id),
+            "data": data,
+            "message": {
+                "message_id": message_id, "date": int(time.time()),
+                "chat": {"id": self.user_id, "type": "private"}, "from": BOT_USER, "text": "…",
+            },
+        }})
+
+    async def press_first(self, prefix: str) -> Optional[str]:
+        """Tap the first visible button whose callback data starts with prefix"""
+        for button in self.buttons():
+            data = button.get("callback_data") or ""
+            if data.startswith(prefix):
+                await self.press(data)
+                return data
+        return None
+
+
+def _next_questionnaire_button(buttons: List[Dict], toggled: set) -> Optional[str]:
+    """Skip optional sections, pick one option per question, then move on"""
+    datas = [button.get("callback_data") or "" for button in buttons]
+    forward = [data for data in datas if data and data != "noop" and "back" not in data]
+    for data in forward:
+        if data.endswith("_skip"):
+            return data
+    for button in buttons:
+        data = button.get("callback_data") or ""
+        prefix = data.split(":", 1)[0]
+        if button["text"].startswith("⬜️") and prefix not in toggled:
+            toggled.add(prefix)
+            return data
+    for data in forward:
+        if data.endswith(("_done", "_next_cat")):
+            return data
+    for button in buttons:
+        if button["text"].startswith("Next") and button.get("callback_data"):
+            return button["callback_data"]
+    return forward[0] if forward else None
+
+
+async def register(client: VirtualUser, db: Database, city: str):
+    client.scenario = "registration"
+    await client.send("/start")
+    await client.send(INVITE_CODE)
+    await client.press("intro_sounds_good")
+    await client.press("warning_ok")
+    await client.send(f"Client {client.user_id}")
+    await client.press(f"main_city:{hash_item(city)}")
+    await client.press("main_city_done")
+    await client.send("-")
+    await client.send("Load test client")
+
+    toggled = set()
+    for _ in range(MAX_REGISTRATION_STEPS):
+        if await db.get_user(client.user_id) is not None:
+            return
+        data = _next_questionnaire_button(client.buttons(), toggled)
+        if data is None:
+            break
+        await client.press(data)
+    raise RuntimeError(f"Registration of {client.user_id} did not finish; last text: "
+                       f"{client.telegram.texts.get(client.user_id, '')[:200]!r}")
+
+
+async def browse_resources(client: VirtualUser, rng: random.Random):
+    client.scenario = "resources"
+    await client.send("🪩Resources")
+    categories = [b["callback_data"] for b in client.buttons() if b.get("callback_data", "").startswith("res_cat:")]
+    for category in rng.sample(categories, min(3, len(categories))):
+        await client.press(category)
+        # Categories with subcategories show those first
+        if await client.press_first("res_") is not None:
+            await client.press_first("res_pg:")
+        await client.press("back_to_resources")
+
+
+async def browse_lots(client: VirtualUser):
+    client.scenario = "lots"
+    await client.send("🩵Lots")
+    await client.press("lots:browse_b")
+    await client.press_first("lots_pg:")
+    await client.press("lots_menu")
+    await client.press("lots:help_d")
+
+
+async def browse_friends(client: VirtualUser, city: str):
+    client.scenario = "friends"
+    await client.send("🫂Friends")
+    await client.press(f"city:{city}")
+    await client.send("🗿My Profile")
+
+
+async def make_deal(client: VirtualUser, partner: VirtualUser, db: Database):
+    client.scenario = partner.scenario = "deals"
+    await client.press(f"deal:propose:{partner.user_id}")
+    deals = [d for d in await db.get_user_deals(client.user_id) if d["proposer_id"] == client.user_id]
+    deal_id = max(d["id"] for d in deals)
+    await partner.press(f"confirm:deal:{deal_id}")
+    await client.press(f"deal:complete:{deal_id}")
+    await partner.press(f"confirm:deal_confirm:{deal_id}")
+    if (await db.get_deal(deal_id))["status"] != "completed":
+        raise RuntimeError(f"Deal {deal_id} between {client.user_id} and {partner.user_id} did not complete")
+    await client.send("🍀My Deals")
+
+
+async def session(index: int, users: int, dp, bot: Bot, telegram: FakeTelegram, db: Database,
+                  recorder: Recorder, seed_value: int):
+    rng = random.Random(seed_value + index)
+    client = VirtualUser(CLIENT_ID_BASE + index, dp, bot, telegram, recorder)
+    # Each session deals with its own member so partners' keyboards don't interleave
+    partner = VirtualUser(1 + index % users, dp, bot, telegram, recorder)
+    city = CITIES[rng.randrange(len(CITIES))]
+
+    await register(client, db, city)
+    await browse_resources(client, rng)
+    await browse_lots(client)
+    await browse_friends(client, CITIES[partner.user_id % len(CITIES)])
+    await make_deal(client, partner, db)
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def report(recorder: Recorder, wall: float, telegram: FakeTelegram) -> str:
+    lines = []
+    everything = recorder.all()
+    lines.append(f"{len(everything)} updates in {wall:.2f}s: {len(everything) / wall:.0f} updates/s")
+    lines.append(f"{'scenario':<14}{'updates':>9}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for scenario, values in sorted(recorder.latencies.items()) + [("all", everything)]:
+        lines.append(f"{scenario:<14}{len(values):>9}{percentile(values, 0.5) * 1000:>9.1f}"
+                     f"{percentile(values, 0.99) * 1000:>9.1f}{max(values) * 1000:>9.1f}")
+    calls = ", ".join(f"{method} {count}" for method, count in telegram.calls.most_common())
+    lines.append(f"Bot API calls: {calls}")
+    return "\n".join(lines)
+
+
+async def main(users: int, sessions: int, concurrency: int, api_latency: float, throttle: bool,
+               seed_value: int, show_handlers: bool):
+    logging.getLogger().setLevel(logging.WARNING)
+    telegram = FakeTelegram(latency=api_latency)
+    base_url = await telegram.start()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = Database(str(Path(temp_dir) / "bench.db"))
+        await db.init_db()
+        await seed(db, users, random.Random(seed_value))
+        db.set_query_hook(metrics.record_query)
+
+        bot = Bot(token="42:TEST", session=AiohttpSession(api=TelegramAPIServer.from_base(base_url)))
+        storage = SQLiteStorage(db)
+        storage.start()
+        if throttle:
+            send_queue = SendQueue(global_rate=SEND_GLOBAL_RATE, chat_rate=SEND_CHAT_RATE,
+                                   chat_burst=SEND_CHAT_BURST, max_retries=SEND_MAX_RETRIES)
+        else:
+            send_queue = SendQueue(global_rate=1e9, chat_rate=1e9, chat_burst=1e9)
+        send_queue.start()
+        setup_bot_session(bot, send_queue)
+        dp = create_dispatcher(db, storage, send_queue)
+
+        recorder = Recorder()
+        limit = asyncio.Semaphore(concurrency)
+
+        async def limited(index: int):
+            async with limit:
+                await session(index, users, dp, bot, telegram, db, recorder, seed_value)
+
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(limited(i) for i in range(sessions)))
+            wall = time.perf_counter() - start
+        finally:
+            await markup_editor.close()
+            await send_queue.close()
+            await storage.close()
+            await bot.session.close()
+            await db.close()
+            await telegram.close()
+
+    print(f"{users} seeded members, {sessions} sessions, {concurrency} concurrent"
+          f"{', throttled' if throttle else ''}, API latency {api_latency * 1000:.0f} ms")
+    print(report(recorder, wall, telegram))
+    if show_handlers:
+        print()
+        print(metrics.summary(top=15))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="seeded members")
+    parser.add_argument("--sessions", type=int, default=20, help="virtual users to run through the script")
+    parser.add_argument("--concurrency", type=int, default=10, help="sessions running at once")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="fake Bot API latency in ms")
+    parser.add_argument("--throttle", action="store_true", help="use the configured send rate limits")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--handlers", action="store_true", help="also print the per-handler metrics digest")
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.sessions, args.concurrency, args.api_latency / 1000,
+                     args.throttle, args.seed, args.handlers))
@@ -0,0 +1,106 @@
+"""
+Stand-in Telegram Bot API server for end-to-end benchmarks.
+
+Answers every POST /bot<token>/<method> the way Telegram would for a private
+chat: send* methods return a new Message, everything else returns True. Inline
+keyboards are tracked per message, edits included, so scripted sessions can press
+the buttons a real client would show.
+"""
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+BOT_USER = {"id": 42, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+
+
+class FakeTelegram:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Counter = Counter()
+        # chat_id -> message_id -> inline keyboard rows currently shown under it
+        self.keyboards: Dict[int, Dict[int, List[List[Dict]]]] = {}
+        self.texts: Dict[int, str] = {}
+        self._message_ids = itertools.count(1000)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    def _message(self, chat_id: int, fields: Dict) -> Dict:
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+        }
+        if "text" in fields:
+            message["text"] = fields["text"]
+        elif "caption" in fields:
+            message["caption"] = fields["caption"]
+        return message
+
+    def _remember(self, chat_id: int, message_id: int, fields: Dict, edit: bool):
+        if "text" in fields:
+            self.texts[chat_id] = fields["text"]
+        markup = json.loads(fields["reply_markup"]) if fields.get("reply_markup") else {}
+        keyboard = markup.get("inline_keyboard")
+        messages = self.keyboards.setdefault(chat_id, {})
+        if keyboard:
+            messages[message_id] = keyboard
+        elif edit:
+            # Like Telegram: an edit without an inline keyboard removes the message's one
+            messages.pop(message_id, None)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        fields = dict(await request.post())
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method == "getMe":
+            result = BOT_USER
+        elif method.startswith("send") and "chat_id" in fields:
+            chat_id = int(fields["chat_id"])
+            if method == "sendMediaGroup":
+                result = [self._message(chat_id, {}) for _ in json.loads(fields.get("media", "[]"))]
+            else:
+                result = self._message(chat_id, fields)
+                self._remember(chat_id, result["message_id"], fields, edit=False)
+        elif method.startswith("edit") and "message_id" in fields:
+            self._remember(int(fields["chat_id"]), int(fields["message_id"]), fields, edit=True)
+            result = True
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    def keyboard_message(self, chat_id: int) -> Optional[int]:
+        """Id of the newest message in chat_id that still shows an inline keyboard"""
+        messages = self.keyboards.get(chat_id)
+        return max(messages) if messages else None
+
+    def buttons(self, chat_id: int) -> List[Dict]:
+        """Inline buttons under the newest message in chat_id that has any"""
+        message_id = self.keyboard_message(chat_id)
+        if message_id is None:
+            return []
+        return [button for row in self.keyboards[chat_id][message_id] for button in row]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host=host, port=port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
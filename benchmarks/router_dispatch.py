@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: callback routing through the bot's routers, before and after
+prefix indexing.
+
+Every callback handler is swapped for a no-op that reports which handler matched,
+so only filter evaluation is timed. Updates are synthesized from the callback data
+the handlers themselves declare, with no FSM state set.
+
+Usage:
+    python -m benchmarks.router_dispatch --iterations 5
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import List
+
+os.environ.setdefault("BOT_TOKEN", "42:TEST")
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import Update
+
+from bot.handlers import registration, menu, friends, resources, lots, open_resources, admin, deals
+from bot.routing import handler_patterns, index_callback_routes
+
+# Same order as bot/main.py
+ROUTERS = [registration, menu, friends, resources, lots, open_resources, admin, deals]
+
+
+def stub_handlers(dp: Dispatcher):
+    """Replace callback handlers with no-ops returning their (router, position)"""
+    for module in ROUTERS:
+        observer = module.router.callback_query
+        for position, handler in enumerate(observer.handlers):
+            async def matched(callback, _key=(module.__name__, position)):
+                return _key
+            observer.handlers[position] = HandlerObject(callback=matched, filters=handler.filters, flags=handler.flags)
+
+
+def synthetic_updates() -> List[Update]:
+    """One callback per head each handler declares"""
+    data = []
+    for module in ROUTERS:
+        for handler in module.router.callback_query.handlers:
+            patterns = handler_patterns(handler)
+            if patterns is not None:
+                data += [f"{head}:1" for head in sorted(patterns.heads)]
+                data += [f"{prefix}:1" for prefix in sorted(patterns.head_prefixes)]
+    return [
+        Update.model_validate({
+            "update_id": i,
+            "callback_query": {
+                "id": str(i),
+                "from": {"id": 42, "is_bot": False, "first_name": "Bench"},
+                "chat_instance": "1",
+                "data": callback_data,
+            },
+        })
+        for i, callback_data in enumerate(data)
+    ]
+
+
+async def route_all(dp: Dispatcher, bot: Bot, updates: List[Update], iterations: int):
+    """Feed every update iterations times; return (seconds, resolved handler per update)"""
+    resolved = [await dp.feed_update(bot, update) for update in updates]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for update in updates:
+            await dp.feed_update(bot, update)
+    return time.perf_counter() - start, resolved
+
+
+async def main(iterations: int):
+    bot = Bot(token="42:TEST")
+    dp = Dispatcher()
+    for module in ROUTERS:
+        dp.include_router(module.router)
+    stub_handlers(dp)
+    updates = synthetic_updates()
+    count = len(updates) * iterations
+
+    linear, linear_resolved = await route_all(dp, bot, updates, iterations)
+    indexed_routers = index_callback_routes(dp)
+    indexed, indexed_resolved = await route_all(dp, bot, updates, iterations)
+    await bot.session.close()
+
+    if linear_resolved != indexed_resolved:
+        raise SystemExit("Indexed routing resolved some callbacks to different handlers")
+
+    handled = sum(1 for result in linear_resolved if isinstance(result, tuple))
+    print(f"{len(updates)} synthetic callbacks x {iterations} ({handled} reach a handler without FSM state)")
+    print(f"  linear:              {linear:.3f}s ({linear / count * 1e6:.0f} us/update)")
+    print(f"  indexed ({indexed_routers} routers): {indexed:.3f}s ({indexed / count * 1e6:.0f} us/update)")
+    print(f"  speedup: {linear / indexed:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -12,16 +12,66 @@ if not BOT_TOKEN:
 ADMIN_IDS_STR = os.getenv("ADMIN_IDS", "")
 ADMIN_IDS = [int(id.strip()) for id in ADMIN_IDS_STR.split(",") if id.strip()]
 
-# Debug: print admin IDs on startup
-print(f"[DEBUG] ADMIN_IDS_STR: '{ADMIN_IDS_STR}'")
-print(f"[DEBUG] ADMIN_IDS parsed: {ADMIN_IDS}")
-
 # Channel configuration
 CHANNEL_USERNAME = os.getenv("CHANNEL_USERNAME", "")
 CHANNEL_URL = os.getenv("CHANNEL_URL", "")
 
 # Database configuration
 DATABASE_PATH = os.getenv("DATABASE_PATH", "bot_database.db")
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "4"))
+
+# get_user cache: max profiles kept and seconds before a cached profile is re-read
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
+# Search result pages (/search and inline mode): max pages kept and seconds they stay fresh,
+# and how long Telegram may cache an inline answer on its side
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "256"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "30"))
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "30"))
+
+# SQLite PRAGMA profile applied to every connection
+DATABASE_PRAGMAS = {
+    "busy_timeout": int(os.getenv("DATABASE_BUSY_TIMEOUT", "5000")),
+    "journal_mode": os.getenv("DATABASE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("DATABASE_SYNCHRONOUS", "NORMAL"),
+    "cache_size": int(os.getenv("DATABASE_CACHE_SIZE", "-16000")),
+    "mmap_size": int(os.getenv("DATABASE_MMAP_SIZE", "134217728")),
+    "temp_store": "MEMORY",
+}
+
+# Update delivery: "polling" or "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+if BOT_MODE not in ("polling", "webhook"):
+    raise ValueError(f"BOT_MODE must be 'polling' or 'webhook', got '{BOT_MODE}'")
+
+# Webhook server (BOT_MODE=webhook). WEBHOOK_URL is the public base URL registered with
+# Telegram on startup; leave it empty if the webhook is set up externally.
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or None
+if BOT_MODE == "webhook" and not WEBHOOK_SECRET:
+    # Without it anyone who can reach the server could post updates as any user, admins included
+    raise ValueError("WEBHOOK_SECRET is required when BOT_MODE is 'webhook'")
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("PORT", os.getenv("WEBAPP_PORT", "8080")))
+
+# FSM sessions: expiry of abandoned flows and write-behind delay (seconds)
+FSM_STATE_TTL = int(os.getenv("FSM_STATE_TTL_HOURS", "168")) * 3600
+FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", "1"))
+
+# Hours between checks of users.points against points_ledger (0 disables)
+POINTS_RECONCILE_INTERVAL = float(os.getenv("POINTS_RECONCILE_HOURS", "24")) * 3600
+
+# Local Prometheus-style /metrics endpoint (port 0 disables it)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Outbound message budgets (Telegram allows ~30 msg/s overall and ~1 msg/s per chat)
+SEND_GLOBAL_RATE = float(os.getenv("SEND_GLOBAL_RATE", "30"))
+SEND_CHAT_RATE = float(os.getenv("SEND_CHAT_RATE", "1"))
+SEND_CHAT_BURST = float(os.getenv("SEND_CHAT_BURST", "3"))
+SEND_MAX_RETRIES = int(os.getenv("SEND_MAX_RETRIES", "3"))
 
 # Resource categories
 RESOURCE_CATEGORIES = [
@@ -1,15 +1,465 @@
+import asyncio
 import aiosqlite
-from typing import Optional, List, Dict
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+import functools
+import inspect
+import json
+import re
+import sqlite3
+import time
+from typing import Callable, Optional, List, Dict, NamedTuple, Set, Tuple
 from datetime import datetime
 
+from bot.resource_index import REGISTRATION_SLUG, extract_resource_items_from_json
+
+
+# UPDATE ... RETURNING and MATERIALIZED CTEs both arrived in SQLite 3.35
+MIN_SQLITE_VERSION = (3, 35)
+
+
+# PRAGMAs applied to every connection, in this order. busy_timeout goes
+# first so that switching journal_mode waits for other writers instead of failing.
+DEFAULT_PRAGMAS = {
+    "busy_timeout": 5000,
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,  # negative = KiB, i.e. ~16 MB page cache
+    "mmap_size": 134217728,  # 128 MB
+    "temp_store": "MEMORY",
+}
+
+
+# Questionnaire answers flattened for category browsing. The explicit id keeps the
+# search_index rowids derived from it stable: VACUUM may renumber implicit rowids.
+RESOURCE_ITEMS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        category TEXT NOT NULL,
+        subcategory TEXT NOT NULL DEFAULT '',
+        item TEXT NOT NULL,
+        city TEXT,  -- NULL: shown with the owner's main city
+        position INTEGER NOT NULL DEFAULT 0,
+        extra TEXT,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    )
+"""
+RESOURCE_ITEMS_INDEXES = (
+    """CREATE INDEX IF NOT EXISTS idx_resource_items_category
+       ON resource_items (category, subcategory, user_id, position)""",
+    "CREATE INDEX IF NOT EXISTS idx_resource_items_user ON resource_items (user_id)",
+)
+RESOURCE_ITEMS_SEARCH_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS resource_items_search_insert AFTER INSERT ON resource_items BEGIN
+           INSERT INTO search_index (rowid, user_id, title, body)
+           VALUES (NEW.id * 4 + 2, NEW.user_id, NEW.item, TRIM(NEW.category || ' ' || NEW.subcategory));
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS resource_items_search_delete AFTER DELETE ON resource_items BEGIN
+           DELETE FROM search_index WHERE rowid = OLD.id * 4 + 2;
+       END""",
+)
+
+
+# Secondary indexes, one list per schema version. PRAGMA user_version records
+# the last applied version; append a new list rather than editing an old one.
+INDEX_MIGRATIONS = [
+    # 1: hot read paths (browse, deals, questionnaire lookups, admin lists)
+    [
+        # The unique index below needs at most one answer per user/question
+        """DELETE FROM user_answers WHERE id NOT IN (
+               SELECT MAX(id) FROM user_answers GROUP BY user_id, question_slug
+           )""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_user_answers_user_slug ON user_answers (user_id, question_slug)",
+        "CREATE INDEX IF NOT EXISTS idx_user_answers_slug ON user_answers (question_slug, user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_users_name ON users (name)",
+        "CREATE INDEX IF NOT EXISTS idx_users_current_city ON users (current_city)",
+        "CREATE INDEX IF NOT EXISTS idx_lots_type_status ON lots (type, status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_lots_category_status_type ON lots (category, status, type, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_lots_status ON lots (status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_lots_user_type ON lots (user_id, type, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_lots_created ON lots (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_deals_proposer ON deals (proposer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_deals_receiver ON deals (receiver_id)",
+        "CREATE INDEX IF NOT EXISTS idx_deals_created ON deals (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_resources_city_category ON resources (city, category, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_resources_user ON resources (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_open_resources_section ON open_resources (section, city, title)",
+    ],
+    # 2: city lookups moved to user_cities
+    [
+        "DROP INDEX IF EXISTS idx_users_current_city",
+    ],
+    # 3: keyset pagination of the admin lots list by type
+    [
+        "CREATE INDEX IF NOT EXISTS idx_lots_type_created ON lots (type, created_at)",
+    ],
+    # 4: points ledger; balances from before it existed become opening entries
+    [
+        "CREATE INDEX IF NOT EXISTS idx_points_ledger_user ON points_ledger (user_id, id)",
+        """INSERT INTO points_ledger (user_id, delta, reason)
+           SELECT user_id, points, 'opening_balance' FROM users WHERE points != 0""",
+    ],
+    # 5: full-text search; index rows saved before the triggers existed
+    [
+        "DELETE FROM search_index",
+        """INSERT INTO search_index (rowid, user_id, title, body)
+           SELECT user_id * 4 + 1, user_id, name, about FROM users""",
+        """INSERT INTO search_index (rowid, user_id, title, body)
+           SELECT id * 4, user_id, title, description FROM lots""",
+        """INSERT INTO search_index (rowid, user_id, title, body)
+           SELECT rowid * 4 + 2, user_id, item, TRIM(category || ' ' || subcategory) FROM resource_items""",
+    ],
+    # 6: resource_items gets an explicit id, and its search rows are keyed on it
+    [
+        "DROP TRIGGER IF EXISTS resource_items_search_insert",
+        "DROP TRIGGER IF EXISTS resource_items_search_delete",
+        RESOURCE_ITEMS_TABLE.format(name="resource_items_new"),
+        """INSERT INTO resource_items_new (user_id, category, subcategory, item, city, position, extra)
+           SELECT user_id, category, subcategory, item, city, position, extra FROM resource_items
+           ORDER BY rowid""",
+        "DROP TABLE resource_items",
+        "ALTER TABLE resource_items_new RENAME TO resource_items",
+        *RESOURCE_ITEMS_INDEXES,
+        *RESOURCE_ITEMS_SEARCH_TRIGGERS,
+        "DELETE FROM search_index WHERE rowid % 4 = 2",
+        """INSERT INTO search_index (rowid, user_id, title, body)
+           SELECT id * 4 + 2, user_id, item, TRIM(category || ' ' || subcategory) FROM resource_items""",
+    ],
+]
+
+# search_index rowids are (source id << 2) | kind, so triggers can find a source row's
+# entry by rowid; the kind's position in this tuple is its tag
+SEARCH_KINDS = ("lot", "profile", "item")
+
+# Words of a /search query that are matched; the rest are ignored
+MAX_SEARCH_TERMS = 8
+
+
+def fts_query(text: str) -> Optional[str]:
+    """FTS5 MATCH expression requiring every word of text as a prefix; None if there are no words"""
+    terms = re.findall(r"\w+", text.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def encode_cursor(created_at: str, row_id: int) -> str:
+    """Compact keyset cursor for (created_at, id): "20261018123456.42" (fits in callback data)"""
+    digits = "".join(ch for ch in str(created_at) if ch.isdigit())[:14]
+    return f"{digits}.{row_id}"
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[str, int]]:
+    """Inverse of encode_cursor; None if the cursor is malformed"""
+    digits, _, row_id = cursor.partition(".")
+    if len(digits) != 14 or not digits.isdigit() or not row_id.isdigit():
+        return None
+    created_at = f"{digits[0:4]}-{digits[4:6]}-{digits[6:8]} {digits[8:10]}:{digits[10:12]}:{digits[12:14]}"
+    return created_at, int(row_id)
+
+
+def split_cities(value: Optional[str]) -> List[str]:
+    """Split a comma-joined city string ("London 🇬🇧, Paris 🇫🇷") into unique city names"""
+    cities = []
+    for city in (value or "").split(","):
+        city = city.strip()
+        if city and city not in cities:
+            cities.append(city)
+    return cities
+
+
+# Columns a deal transition may be authorized by
+DEAL_PARTIES = {"proposer": "proposer_id", "receiver": "receiver_id"}
+
+
+class DealTransition(NamedTuple):
+    """Result of Database.transition_deal: the deal after the change, or as it is now"""
+    deal: Optional[Dict]
+    applied: bool
+
+
+class UnitOfWork:
+    """State of one Database.unit_of_work() block"""
+
+    def __init__(self, database: "Database", connection: aiosqlite.Connection):
+        self.database = database
+        self.connection = _SharedConnection(connection)
+        self.failed = False
+        self.committed = False
+        # Cache entries to drop again once the commit makes the change visible
+        self.invalidated_users: Set[int] = set()
+        self.invalidated_registrations: Set[int] = set()
+        self.invalidated_search = False
+
+
+class _SharedConnection:
+    """The unit's connection as handed to Database methods: their commits wait for the unit"""
+
+    def __init__(self, connection: aiosqlite.Connection):
+        object.__setattr__(self, "_connection", connection)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._connection, name, value)
+
+    async def commit(self):
+        pass
+
+
+_current_unit: ContextVar[Optional[UnitOfWork]] = ContextVar("database_unit_of_work", default=None)
+
+# Set while a timed Database method runs, so the methods it calls are not reported separately
+_in_timed_call: ContextVar[bool] = ContextVar("database_in_timed_call", default=False)
+
+
+def _timed(name: str, method: Callable, hook: Callable[[str, float], None]) -> Callable:
+    @functools.wraps(method)
+    async def timed(*args, **kwargs):
+        if _in_timed_call.get():
+            return await method(*args, **kwargs)
+        token = _in_timed_call.set(True)
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            _in_timed_call.reset(token)
+            hook(name, time.perf_counter() - start)
+    return timed
+
 
 class Database:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, pool_size: int = 4, pragmas: Optional[Dict] = None,
+                 user_cache_size: int = 1024, user_cache_ttl: float = 60,
+                 search_cache_size: int = 256, search_cache_ttl: float = 30):
         self.db_path = db_path
+        self.pool_size = max(1, pool_size)
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self._pool: Optional[asyncio.Queue] = None
+        self._pool_connections: List[aiosqlite.Connection] = []
+
+        # Decoded registration_data per visible user, see get_registration_entries
+        self._registration_cache: Dict[int, Dict] = {}
+        self._registration_cache_loaded = False
+        self._registration_stale: Set[int] = set()
+        # Held while (re)loading: invalidated entries are already gone from the cache,
+        # so concurrent callers must wait for the re-read instead of returning without them
+        self._registration_lock = asyncio.Lock()
+        self.registration_cache_hits = 0
+        self.registration_cache_misses = 0
+
+        # get_user results (None for unknown users): user_id -> (expires_at, row), LRU order
+        self.user_cache_size = user_cache_size
+        self.user_cache_ttl = user_cache_ttl
+        self._user_cache: "OrderedDict[int, tuple]" = OrderedDict()
+        self._user_cache_generation = 0
+        self.user_cache_hits = 0
+        self.user_cache_misses = 0
+
+        # search pages: (match expression, offset, limit) -> (expires_at, results, next_offset),
+        # LRU order. Only expiry refreshes them, so keep the TTL short.
+        self.search_cache_size = search_cache_size
+        self.search_cache_ttl = search_cache_ttl
+        self._search_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.search_cache_hits = 0
+        self.search_cache_misses = 0
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Open a new connection with the PRAGMA profile applied"""
+        conn = await aiosqlite.connect(self.db_path)
+        try:
+            for name, value in self.pragmas.items():
+                text = str(value)
+                if not name.isidentifier() or not (text.lstrip("-").isdigit() or text.isidentifier()):
+                    raise ValueError(f"Invalid PRAGMA {name!r} = {value!r}")
+                async with conn.execute(f"PRAGMA {name} = {value}"):
+                    pass
+        except Exception:
+            await conn.close()
+            raise
+        return conn
+
+    async def open_pool(self):
+        """Open the long-lived connection pool (no-op if already open)"""
+        if self._pool is not None:
+            return
+        pool = asyncio.Queue()
+        connections = []
+        try:
+            for _ in range(self.pool_size):
+                connections.append(await self._connect())
+        except Exception:
+            for conn in connections:
+                await conn.close()
+            raise
+        for conn in connections:
+            pool.put_nowait(conn)
+        self._pool_connections = connections
+        self._pool = pool
+
+    async def close(self):
+        """Close all pooled connections"""
+        pool, self._pool = self._pool, None
+        connections, self._pool_connections = self._pool_connections, []
+        if pool is None:
+            return
+        for conn in connections:
+            await conn.close()
+
+    @asynccontextmanager
+    async def _connection(self):
+        """Connection for one Database call: the current unit's, if any, otherwise a borrowed one"""
+        unit = self._current_unit()
+        if unit is None:
+            async with self._borrow() as db:
+                yield db
+            return
+
+        try:
+            yield unit.connection
+        except BaseException:
+            unit.failed = True
+            raise
+        finally:
+            unit.connection.row_factory = None
+
+    @asynccontextmanager
+    async def _borrow(self):
+        """Borrow a pooled connection, or open a one-off one if the pool is not running"""
+        if self._pool is None:
+            db = await self._connect()
+            try:
+                yield db
+            finally:
+                await db.close()
+            return
+
+        db = await self._pool.get()
+        try:
+            yield db
+        finally:
+            # Never hand a half-finished transaction to the next borrower
+            if db.in_transaction:
+                await db.rollback()
+            db.row_factory = None
+            self._pool.put_nowait(db)
+
+    def set_query_hook(self, hook: Optional[Callable[[str, float], None]]):
+        """Call hook(method name, seconds) after every public coroutine method; None removes it.
+
+        A method called by another one counts towards the caller only.
+        """
+        for name, method in inspect.getmembers(type(self), inspect.iscoroutinefunction):
+            if name.startswith("_"):
+                continue
+            if hook is None:
+                self.__dict__.pop(name, None)
+            else:
+                setattr(self, name, _timed(name, method.__get__(self), hook))
+
+    def _current_unit(self) -> Optional[UnitOfWork]:
+        unit = _current_unit.get()
+        return unit if unit is not None and unit.database is self else None
+
+    @asynccontextmanager
+    async def unit_of_work(self):
+        """Run the Database calls made inside the block as one transaction.
+
+        They share one connection and commit once when the block exits; if any of
+        them fails (even one that only returns False) or the block raises, nothing
+        is written and unit.committed stays False. Await the calls one at a time.
+        Nested blocks join the outer unit.
+        """
+        outer = self._current_unit()
+        if outer is not None:
+            yield outer
+            return
+
+        async with self._borrow() as db:
+            # Take the write lock up front so reads in the block see what it will overwrite
+            await db.execute("BEGIN IMMEDIATE")
+            unit = UnitOfWork(self, db)
+            token = _current_unit.set(unit)
+            try:
+                yield unit
+                if unit.failed:
+                    await db.rollback()
+                else:
+                    await db.commit()
+                    unit.committed = True
+            except BaseException:
+                await db.rollback()
+                raise
+            finally:
+                _current_unit.reset(token)
+                for user_id in unit.invalidated_users:
+                    self._invalidate_user(user_id)
+                for user_id in unit.invalidated_registrations:
+                    self._invalidate_registration(user_id)
+                if unit.invalidated_search:
+                    self._invalidate_search()
+
+    def _invalidate_registration(self, user_id: int):
+        """Drop a user's cached registration entry; it is re-read on next access"""
+        self._registration_cache.pop(user_id, None)
+        self._registration_stale.add(user_id)
+        unit = self._current_unit()
+        if unit is not None:
+            unit.invalidated_registrations.add(user_id)
+
+    def _invalidate_user(self, user_id: int):
+        """Drop a user's cached profile and registration entry after a write"""
+        self._user_cache.pop(user_id, None)
+        self._user_cache_generation += 1
+        self._invalidate_registration(user_id)
+        unit = self._current_unit()
+        if unit is not None:
+            unit.invalidated_users.add(user_id)
+
+    def _invalidate_search(self):
+        """Drop cached search pages after a write that changes what a search can return,
+        rather than serving it for up to search_cache_ttl"""
+        self._search_cache.clear()
+        unit = self._current_unit()
+        if unit is not None:
+            unit.invalidated_search = True
+
+    def user_cache_stats(self) -> Dict[str, int]:
+        """Hit/miss counters of the get_user cache"""
+        return {
+            "hits": self.user_cache_hits,
+            "misses": self.user_cache_misses,
+            "size": len(self._user_cache),
+        }
+
+    def registration_cache_stats(self) -> Dict[str, int]:
+        """Hit/miss counters of the registration cache (counted per user entry)"""
+        return {
+            "hits": self.registration_cache_hits,
+            "misses": self.registration_cache_misses,
+            "size": len(self._registration_cache),
+        }
+
+    def search_cache_stats(self) -> Dict[str, int]:
+        """Hit/miss counters of the search page cache"""
+        return {
+            "hits": self.search_cache_hits,
+            "misses": self.search_cache_misses,
+            "size": len(self._search_cache),
+        }
 
     async def init_db(self):
-        """Initialize database tables"""
-        async with aiosqlite.connect(self.db_path) as db:
+        """Open the connection pool and initialize database tables"""
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise RuntimeError(
+                f"SQLite {'.'.join(map(str, MIN_SQLITE_VERSION))}+ is required, "
+                f"but Python is linked against {sqlite3.sqlite_version}"
+            )
+        await self.open_pool()
+        async with self._connection() as db:
             # Users table
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS users (
@@ -105,7 +555,7 @@ class Database:
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     proposer_id INTEGER NOT NULL,
                     receiver_id INTEGER NOT NULL,
-                    status TEXT NOT NULL, -- pending, accepted, completed, declined
+                    status TEXT NOT NULL, -- pending, accepted, completion_requested, completed, declined
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (proposer_id) REFERENCES users (user_id),
@@ -131,55 +581,303 @@ class Database:
             except:
                 pass
 
+            # User-city membership (one row per city in users.current_city)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS user_cities (
+                    user_id INTEGER NOT NULL,
+                    city TEXT NOT NULL,
+                    PRIMARY KEY (city, user_id),
+                    FOREIGN KEY (user_id) REFERENCES users (user_id)
+                ) WITHOUT ROWID
+            """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_user_cities_user ON user_cities (user_id)")
+
+            # Resource index: questionnaire answers flattened for category browsing
+            async with db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resource_items'"
+            ) as cursor:
+                resource_index_exists = await cursor.fetchone() is not None
+            await db.execute(RESOURCE_ITEMS_TABLE.format(name="resource_items"))
+            for index in RESOURCE_ITEMS_INDEXES:
+                await db.execute(index)
+            if not resource_index_exists:
+                await self._rebuild_resource_items(db)
+
+            # Persistent FSM state (see bot/fsm_storage.py)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS fsm_states (
+                    key TEXT PRIMARY KEY,
+                    state TEXT,
+                    data TEXT,  -- compact JSON, NULL when empty
+                    updated_at INTEGER NOT NULL  -- unix time of the last write
+                ) WITHOUT ROWID
+            """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_fsm_states_updated ON fsm_states (updated_at)")
+
+            # Append-only record of every points change; users.points is its running
+            # balance, kept in step by add_points and checked by reconcile_points
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS points_ledger (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    delta INTEGER NOT NULL,
+                    reason TEXT NOT NULL,
+                    ref_id INTEGER,  -- e.g. the deal a point was awarded for
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # Full-text index over lots, profiles and questionnaire items, kept in sync
+            # by the triggers below (rowids: see SEARCH_KINDS). Visibility (approved
+            # lots, non-hidden users) is applied when searching.
+            await db.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+                    user_id UNINDEXED,
+                    title,
+                    body,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            """)
+            for trigger in (
+                """lots_search_insert AFTER INSERT ON lots BEGIN
+                       INSERT INTO search_index (rowid, user_id, title, body)
+                       VALUES (NEW.id * 4, NEW.user_id, NEW.title, NEW.description);
+                   END""",
+                """lots_search_update AFTER UPDATE OF title, description ON lots BEGIN
+                       UPDATE search_index SET title = NEW.title, body = NEW.description
+                       WHERE rowid = NEW.id * 4;
+                   END""",
+                """lots_search_delete AFTER DELETE ON lots BEGIN
+                       DELETE FROM search_index WHERE rowid = OLD.id * 4;
+                   END""",
+                """users_search_insert AFTER INSERT ON users BEGIN
+                       INSERT INTO search_index (rowid, user_id, title, body)
+                       VALUES (NEW.user_id * 4 + 1, NEW.user_id, NEW.name, NEW.about);
+                   END""",
+                """users_search_update AFTER UPDATE OF name, about ON users BEGIN
+                       UPDATE search_index SET title = NEW.name, body = NEW.about
+                       WHERE rowid = NEW.user_id * 4 + 1;
+                   END""",
+                """users_search_delete AFTER DELETE ON users BEGIN
+                       DELETE FROM search_index WHERE rowid = OLD.user_id * 4 + 1;
+                   END""",
+            ):
+                await db.execute(f"CREATE TRIGGER IF NOT EXISTS {trigger}")
+            async with db.execute("PRAGMA user_version") as cursor:
+                schema_version = (await cursor.fetchone())[0]
+            # Before migration 6 resource_items has no id column; the migration adds these
+            if not resource_index_exists or schema_version >= 6:
+                for trigger in RESOURCE_ITEMS_SEARCH_TRIGGERS:
+                    await db.execute(trigger)
+
+            # Backfill memberships for users saved before user_cities existed
+            async with db.execute("""
+                SELECT user_id, current_city FROM users
+                WHERE user_id NOT IN (SELECT user_id FROM user_cities)
+            """) as cursor:
+                missing = await cursor.fetchall()
+            for user_id, current_city in missing:
+                await self._set_user_cities(db, user_id, current_city)
+
+            await self._apply_index_migrations(db)
+
             await db.commit()
 
+    async def _apply_index_migrations(self, db: aiosqlite.Connection):
+        """Create any secondary indexes newer than the stored user_version"""
+        async with db.execute("PRAGMA user_version") as cursor:
+            current = (await cursor.fetchone())[0]
+        for version, statements in enumerate(INDEX_MIGRATIONS, start=1):
+            if version <= current:
+                continue
+            for statement in statements:
+                await db.execute(statement)
+            await db.execute(f"PRAGMA user_version = {version}")
+
     # User methods
+    async def _set_user_cities(self, db: aiosqlite.Connection, user_id: int, current_city: Optional[str]):
+        """Replace the user's user_cities rows to match a current_city string (caller commits).
+
+        Cities are chosen once at registration, so add_user and the init_db backfill are the only writers.
+        """
+        await db.execute("DELETE FROM user_cities WHERE user_id = ?", (user_id,))
+        await db.executemany(
+            "INSERT OR IGNORE INTO user_cities (user_id, city) VALUES (?, ?)",
+            [(user_id, city) for city in split_cities(current_city)]
+        )
+
     async def add_user(self, user_id: int, username: Optional[str], name: str,
                       main_city: str, current_city: str, about: str,
                       instagram: str, points: int = 0) -> bool:
         """Add new user to database"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 await db.execute("""
                     INSERT INTO users (user_id, username, name, main_city, current_city, about, instagram, points)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """, (user_id, username, name, main_city, current_city, about, instagram, points))
+                if points:
+                    await db.execute(
+                        "INSERT INTO points_ledger (user_id, delta, reason) VALUES (?, ?, 'opening_balance')",
+                        (user_id, points)
+                    )
+                await self._set_user_cities(db, user_id, current_city)
                 await db.commit()
+            self._invalidate_user(user_id)
             return True
         except Exception as e:
             print(f"Error adding user: {e}")
             return False
 
     async def get_user(self, user_id: int) -> Optional[Dict]:
-        """Get user by ID"""
-        async with aiosqlite.connect(self.db_path) as db:
+        """Get user by ID (cached for user_cache_ttl seconds; writes through this class invalidate)"""
+        now = asyncio.get_running_loop().time()
+        cached = self._user_cache.get(user_id)
+        if cached and cached[0] > now:
+            self._user_cache.move_to_end(user_id)
+            self.user_cache_hits += 1
+            return dict(cached[1]) if cached[1] else None
+
+        self.user_cache_misses += 1
+        generation = self._user_cache_generation
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)) as cursor:
                 row = await cursor.fetchone()
-                return dict(row) if row else None
+        user = dict(row) if row else None
+
+        # Skip caching if a write happened meanwhile; the row may already be stale
+        if self.user_cache_size > 0 and generation == self._user_cache_generation:
+            self._user_cache[user_id] = (now + self.user_cache_ttl, user)
+            self._user_cache.move_to_end(user_id)
+            while len(self._user_cache) > self.user_cache_size:
+                self._user_cache.popitem(last=False)
+        return dict(user) if user else None
 
-    async def update_user_points(self, user_id: int, points: int) -> bool:
-        """Update user points"""
+    async def update_user_points(self, user_id: int, points: int, reason: str = "set") -> bool:
+        """Set user points, recording the difference in points_ledger"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
+                await db.execute("""
+                    INSERT INTO points_ledger (user_id, delta, reason)
+                    SELECT user_id, ? - points, ? FROM users WHERE user_id = ? AND points != ?
+                """, (points, reason, user_id, points))
                 await db.execute("UPDATE users SET points = ? WHERE user_id = ?", (points, user_id))
                 await db.commit()
+            self._invalidate_user(user_id)
             return True
         except Exception as e:
             print(f"Error updating points: {e}")
             return False
 
+    async def add_points(self, user_id: int, delta: int, reason: str,
+                         ref_id: Optional[int] = None) -> Optional[int]:
+        """Change user points by delta in one transaction with its ledger entry.
+
+        The increment happens in SQL, so concurrent awards can't overwrite each other.
+        Returns the new balance, or None if the user doesn't exist or the balance
+        would drop below zero.
+        """
+        try:
+            async with self._connection() as db:
+                async with db.execute(
+                    "UPDATE users SET points = points + ? WHERE user_id = ? AND points + ? >= 0 RETURNING points",
+                    (delta, user_id, delta)
+                ) as cursor:
+                    row = await cursor.fetchone()
+                if row is None:
+                    return None
+                await db.execute(
+                    "INSERT INTO points_ledger (user_id, delta, reason, ref_id) VALUES (?, ?, ?, ?)",
+                    (user_id, delta, reason, ref_id)
+                )
+                await db.commit()
+            self._invalidate_user(user_id)
+            return row[0]
+        except Exception as e:
+            print(f"Error adding points: {e}")
+            return None
+
+    async def get_points_ledger(self, user_id: int, limit: int = 20) -> List[Dict]:
+        """A user's most recent points changes, newest first"""
+        async with self._connection() as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(
+                "SELECT * FROM points_ledger WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                (user_id, limit)
+            ) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+
+    async def reconcile_points(self) -> List[Tuple[int, int, int]]:
+        """Reset users.points to the ledger sum wherever they disagree.
+
+        Returns (user_id, stored points, ledger balance) for each corrected user.
+        """
+        balance = "(SELECT COALESCE(SUM(delta), 0) FROM points_ledger l WHERE l.user_id = users.user_id)"
+        async with self._connection() as db:
+            async with db.execute(
+                f"SELECT user_id, points, {balance} AS balance FROM users WHERE points != balance"
+            ) as cursor:
+                mismatches = [tuple(row) for row in await cursor.fetchall()]
+            if mismatches:
+                # Recomputed inside the write so awards made since the SELECT are kept
+                await db.executemany(
+                    f"UPDATE users SET points = {balance} WHERE user_id = ?",
+                    [(user_id,) for user_id, _, _ in mismatches]
+                )
+                await db.commit()
+        for user_id, _, _ in mismatches:
+            self._invalidate_user(user_id)
+        return mismatches
+
+    async def _index_resource_items(self, db: aiosqlite.Connection, user_id: int, answer_data: Optional[str]):
+        """Replace the user's resource_items rows from their registration JSON (caller commits)"""
+        await db.execute("DELETE FROM resource_items WHERE user_id = ?", (user_id,))
+        if not answer_data:
+            return
+        await db.executemany("""
+            INSERT INTO resource_items (user_id, category, subcategory, item, city, position, extra)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [(user_id, *row) for row in extract_resource_items_from_json(answer_data)])
+
+    async def _rebuild_resource_items(self, db: aiosqlite.Connection):
+        """Re-index every stored registration (caller commits)"""
+        await db.execute("DELETE FROM resource_items")
+        async with db.execute(
+            "SELECT user_id, answer_data FROM user_answers WHERE question_slug = ?",
+            (REGISTRATION_SLUG,)
+        ) as cursor:
+            answers = await cursor.fetchall()
+        for user_id, answer_data in answers:
+            await self._index_resource_items(db, user_id, answer_data)
+
+    async def rebuild_resource_items(self) -> bool:
+        """Rebuild the whole resource index from stored registrations"""
+        try:
+            async with self._connection() as db:
+                await self._rebuild_resource_items(db)
+                await db.commit()
+            return True
+        except Exception as e:
+            print(f"Error rebuilding resource items: {e}")
+            return False
+
     async def add_user_answer(self, user_id: int, question_slug: str, answer_data: str) -> bool:
         """Add or update a user's answer to the questionnaire."""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 # specific logic to avoid duplicates for the same user/question
                 await db.execute("DELETE FROM user_answers WHERE user_id = ? AND question_slug = ?", (user_id, question_slug))
                 await db.execute("""
                     INSERT INTO user_answers (user_id, question_slug, answer_data)
                     VALUES (?, ?, ?)
                 """, (user_id, question_slug, answer_data))
+                if question_slug == REGISTRATION_SLUG:
+                    await self._index_resource_items(db, user_id, answer_data)
                 await db.commit()
+            if question_slug == REGISTRATION_SLUG:
+                self._invalidate_registration(user_id)
+                self._invalidate_search()
             return True
         except Exception as e:
             print(f"Error adding user answer: {e}")
@@ -187,7 +885,7 @@ class Database:
 
     async def get_user_answers(self, user_id: int) -> List[Dict]:
         """Get all answers for a user."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("SELECT * FROM user_answers WHERE user_id = ?", (user_id,)) as cursor:
                 rows = await cursor.fetchall()
@@ -195,26 +893,68 @@ class Database:
 
     async def get_users_by_city(self, city: str) -> List[Dict]:
         """Get all visible users who selected a specific city."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
-                SELECT *
-                FROM users
-                WHERE COALESCE(is_hidden, 0) = 0
-                  AND instr(
-                      ',' || replace(current_city, ', ', ',') || ',',
-                      ',' || replace(?, ', ', ',') || ','
-                  ) > 0
-                ORDER BY name
-            """, (city,)) as cursor:
+                SELECT u.*
+                FROM user_cities uc
+                JOIN users u ON u.user_id = uc.user_id
+                WHERE uc.city = ? AND COALESCE(u.is_hidden, 0) = 0
+                ORDER BY u.name
+            """, (city.strip(),)) as cursor:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
 
+    async def get_resource_items(self, category: str, subcategory: Optional[str] = None) -> List[Dict]:
+        """Get questionnaire resources in a category (optionally one subcategory), one entry per visible owner"""
+        query = """
+            SELECT ri.user_id, ri.item, ri.city, ri.extra,
+                   u.name, u.username, u.instagram, u.points, u.main_city
+            FROM resource_items ri
+            JOIN users u ON ri.user_id = u.user_id
+            WHERE ri.category = ? {subcategory_filter} AND COALESCE(u.is_hidden, 0) = 0
+            ORDER BY u.name, ri.user_id, ri.position
+        """
+        if subcategory is None:
+            query, params = query.format(subcategory_filter=""), (category,)
+        else:
+            query, params = query.format(subcategory_filter="AND ri.subcategory = ?"), (category, subcategory)
+
+        async with self._connection() as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+
+        resources = []
+        for row in rows:
+            if not resources or resources[-1]["user_id"] != row["user_id"]:
+                resources.append({
+                    "user_id": row["user_id"],
+                    "name": row["name"],
+                    "username": row["username"],
+                    "instagram": row["instagram"],
+                    "points": row["points"],
+                    "main_city": row["main_city"],
+                    "items": [],
+                    "cities": [],
+                    "extra": row["extra"].split("\n") if row["extra"] else [],
+                })
+            resource = resources[-1]
+            if row["item"] not in resource["items"]:
+                resource["items"].append(row["item"])
+            if row["city"] and row["city"] not in resource["cities"]:
+                resource["cities"].append(row["city"])
+
+        for resource in resources:
+            if not resource["cities"]:
+                resource["cities"] = [resource["main_city"] or ""]
+        return resources
+
     async def get_all_cities(self) -> List[str]:
         """Get list of all cities where users are located"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             async with db.execute(
-                "SELECT DISTINCT current_city FROM users ORDER BY current_city"
+                "SELECT DISTINCT city FROM user_cities ORDER BY city"
             ) as cursor:
                 rows = await cursor.fetchall()
                 return [row[0] for row in rows]
@@ -224,7 +964,7 @@ class Database:
                           description: str, city: str) -> bool:
         """Add new resource"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 await db.execute("""
                     INSERT INTO resources (user_id, category, title, description, city)
                     VALUES (?, ?, ?, ?, ?)
@@ -237,7 +977,7 @@ class Database:
 
     async def get_resources_by_city_and_category(self, city: str, category: str) -> List[Dict]:
         """Get resources filtered by city and category"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT r.*, u.name, u.instagram, u.points
@@ -251,7 +991,7 @@ class Database:
 
     async def get_resource_cities(self) -> List[str]:
         """Get list of cities with resources"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             async with db.execute(
                 "SELECT DISTINCT city FROM resources ORDER BY city"
             ) as cursor:
@@ -265,20 +1005,21 @@ class Database:
                      status: str = "pending") -> Optional[int]:
         """Add new lot (share or seek), returns lot ID"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 cursor = await db.execute("""
                     INSERT INTO lots (user_id, type, title, description, category, location_text, availability, status)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """, (user_id, lot_type, title, description, category, location_text, availability, status))
                 await db.commit()
-                return cursor.lastrowid
+            self._invalidate_search()
+            return cursor.lastrowid
         except Exception as e:
             print(f"Error adding lot: {e}")
             return None
 
     async def get_user_lots(self, user_id: int, lot_type: str) -> List[Dict]:
         """Get user lots by type (share or seek) - shows all statuses for owner"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM lots
@@ -291,7 +1032,7 @@ class Database:
     async def get_lots_by_category(self, category: str) -> List[Dict]:
         """Get approved lots by category (of type 'share' usually, or both?)"""
         # Assuming we only show 'share' lots in Resources section as per prompt context
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT l.*, u.name, u.instagram, u.points, u.username
@@ -305,7 +1046,7 @@ class Database:
 
     async def get_active_lots(self, lot_type: str) -> List[Dict]:
         """Get all active approved lots by type (excludes hidden users)"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT l.*, u.name, u.instagram, u.points, u.username
@@ -319,7 +1060,7 @@ class Database:
 
     async def get_lot(self, lot_id: int) -> Optional[Dict]:
         """Get lot by ID"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("SELECT * FROM lots WHERE id = ?", (lot_id,)) as cursor:
                 row = await cursor.fetchone()
@@ -327,7 +1068,7 @@ class Database:
 
     async def get_pending_lots(self) -> List[Dict]:
         """Get all pending lots for moderation"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT l.*, u.name as user_name, u.username
@@ -342,12 +1083,13 @@ class Database:
     async def update_lot_status(self, lot_id: int, status: str) -> bool:
         """Update lot status (approve/reject)"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 await db.execute(
                     "UPDATE lots SET status = ? WHERE id = ?",
                     (status, lot_id)
                 )
                 await db.commit()
+            self._invalidate_search()
             return True
         except Exception as e:
             print(f"Error updating lot status: {e}")
@@ -356,12 +1098,13 @@ class Database:
     async def delete_lot(self, lot_id: int, user_id: int) -> bool:
         """Delete lot if it belongs to user"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 await db.execute(
                     "DELETE FROM lots WHERE id = ? AND user_id = ?",
                     (lot_id, user_id)
                 )
                 await db.commit()
+            self._invalidate_search()
             return True
         except Exception as e:
             print(f"Error deleting lot: {e}")
@@ -373,7 +1116,7 @@ class Database:
                                city: str = "") -> bool:
         """Add open resource"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 await db.execute("""
                     INSERT INTO open_resources (section, title, description, link, city)
                     VALUES (?, ?, ?, ?, ?)
@@ -386,7 +1129,7 @@ class Database:
 
     async def get_open_resources(self, section: str) -> List[Dict]:
         """Get open resources by section"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM open_resources
@@ -398,7 +1141,7 @@ class Database:
 
     async def get_all_users(self) -> List[Dict]:
         """Get all users (for admin)"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("SELECT * FROM users ORDER BY name") as cursor:
                 rows = await cursor.fetchall()
@@ -408,7 +1151,7 @@ class Database:
     async def add_invite_token(self, token: str) -> bool:
         """Add a new invite token."""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 await db.execute("INSERT INTO invite_tokens (token) VALUES (?)", (token,))
                 await db.commit()
             return True
@@ -418,7 +1161,7 @@ class Database:
 
     async def is_valid_token(self, token: str) -> bool:
         """Check if an invite token is valid and unused."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             async with db.execute(
                 "SELECT * FROM invite_tokens WHERE token = ? AND is_used = FALSE",
                 (token,)
@@ -428,7 +1171,7 @@ class Database:
     async def use_invite_token(self, token: str) -> bool:
         """Mark an invite token as used."""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 await db.execute(
                     "UPDATE invite_tokens SET is_used = TRUE WHERE token = ?",
                     (token,)
@@ -443,7 +1186,7 @@ class Database:
     async def create_deal(self, proposer_id: int, receiver_id: int) -> Optional[int]:
         """Create a new deal."""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 cursor = await db.execute("""
                     INSERT INTO deals (proposer_id, receiver_id, status)
                     VALUES (?, ?, 'pending')
@@ -456,29 +1199,38 @@ class Database:
 
     async def get_deal(self, deal_id: int) -> Optional[Dict]:
         """Get deal by ID."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("SELECT * FROM deals WHERE id = ?", (deal_id,)) as cursor:
                 row = await cursor.fetchone()
                 return dict(row) if row else None
 
-    async def update_deal_status(self, deal_id: int, status: str) -> bool:
-        """Update deal status."""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute(
-                    "UPDATE deals SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                    (status, deal_id)
-                )
+    async def transition_deal(self, deal_id: int, party: str, user_id: int,
+                              expected: str, status: str) -> DealTransition:
+        """Move a deal from expected to status if user_id is its party ("proposer" or "receiver").
+
+        The check and the change are one UPDATE, so of two racing taps only one applies.
+        On conflict the current row is returned for the caller to explain why.
+        """
+        column = DEAL_PARTIES[party]
+        async with self._connection() as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(f"""
+                UPDATE deals SET status = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status = ? AND {column} = ?
+                RETURNING *
+            """, (status, deal_id, expected, user_id)) as cursor:
+                row = await cursor.fetchone()
+            if row is not None:
                 await db.commit()
-            return True
-        except Exception as e:
-            print(f"Error updating deal status: {e}")
-            return False
+                return DealTransition(dict(row), True)
+            async with db.execute("SELECT * FROM deals WHERE id = ?", (deal_id,)) as cursor:
+                row = await cursor.fetchone()
+            return DealTransition(dict(row) if row else None, False)
 
     async def get_user_deals(self, user_id: int) -> List[Dict]:
         """Get all deals for a user."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT d.*, p.name as proposer_name, r.name as receiver_name
@@ -491,22 +1243,61 @@ class Database:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
 
-    async def get_all_registration_data(self) -> List[Dict]:
-        """Get all users' registration data (questionnaire answers) with user info. Excludes hidden users."""
-        async with aiosqlite.connect(self.db_path) as db:
+    async def get_all_registration_data(self, user_ids: Optional[List[int]] = None) -> List[Dict]:
+        """Get all users' registration data (questionnaire answers) with user info. Excludes hidden users.
+        If user_ids is given, only those users are returned."""
+        query = """
+            SELECT ua.user_id, ua.answer_data, u.name, u.username, u.instagram, u.points, u.main_city
+            FROM user_answers ua
+            JOIN users u ON ua.user_id = u.user_id
+            WHERE ua.question_slug = 'registration_data' AND COALESCE(u.is_hidden, 0) = 0
+        """
+        params = ()
+        if user_ids is not None:
+            query += f" AND ua.user_id IN ({', '.join('?' * len(user_ids))})"
+            params = tuple(user_ids)
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT ua.user_id, ua.answer_data, u.name, u.username, u.instagram, u.points, u.main_city
-                FROM user_answers ua
-                JOIN users u ON ua.user_id = u.user_id
-                WHERE ua.question_slug = 'registration_data' AND COALESCE(u.is_hidden, 0) = 0
-            """) as cursor:
+            async with db.execute(query, params) as cursor:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
 
+    async def get_registration_entries(self) -> List[Dict]:
+        """Get decoded registration data of all visible users, served from an in-process cache.
+
+        Each entry has the user info columns of get_all_registration_data plus "data"
+        (the decoded questionnaire dict). Entries are shared, treat them as read-only.
+        """
+        async with self._registration_lock:
+            if not self._registration_cache_loaded:
+                # Invalidations that happen while we read are kept for the next call
+                self._registration_stale.clear()
+                rows = await self.get_all_registration_data()
+                self._registration_cache = {}
+                self._registration_cache_loaded = True
+            elif self._registration_stale:
+                stale, self._registration_stale = list(self._registration_stale), set()
+                rows = await self.get_all_registration_data(stale)
+            else:
+                rows = []
+
+            loaded = 0
+            for row in rows:
+                try:
+                    data = json.loads(row.pop("answer_data"))
+                except (TypeError, ValueError):
+                    continue
+                row["data"] = data
+                self._registration_cache[row["user_id"]] = row
+                loaded += 1
+
+            self.registration_cache_misses += loaded
+            self.registration_cache_hits += len(self._registration_cache) - loaded
+            return list(self._registration_cache.values())
+
     async def get_all_lots(self, lot_type: str = None) -> List[Dict]:
         """Get all lots (optionally filtered by type) for admin"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             if lot_type:
                 async with db.execute("""
@@ -531,20 +1322,26 @@ class Database:
     async def admin_delete_lot(self, lot_id: int) -> bool:
         """Admin delete lot (no user_id check)"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 await db.execute("DELETE FROM lots WHERE id = ?", (lot_id,))
                 await db.commit()
+            self._invalidate_search()
             return True
         except Exception as e:
             print(f"Error deleting lot: {e}")
             return False
 
-    async def delete_user_answer(self, user_id: int, question_slug: str = "registration_data") -> bool:
+    async def delete_user_answer(self, user_id: int, question_slug: str = REGISTRATION_SLUG) -> bool:
         """Delete user registration data"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 await db.execute("DELETE FROM user_answers WHERE user_id = ? AND question_slug = ?", (user_id, question_slug))
+                if question_slug == REGISTRATION_SLUG:
+                    await self._index_resource_items(db, user_id, None)
                 await db.commit()
+            if question_slug == REGISTRATION_SLUG:
+                self._invalidate_registration(user_id)
+                self._invalidate_search()
             return True
         except Exception as e:
             print(f"Error deleting user answer: {e}")
@@ -553,13 +1350,18 @@ class Database:
     async def delete_user(self, user_id: int) -> bool:
         """Fully delete user and their data from DB"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 await db.execute("DELETE FROM user_answers WHERE user_id = ?", (user_id,))
                 await db.execute("DELETE FROM lots WHERE user_id = ?", (user_id,))
                 await db.execute("DELETE FROM resources WHERE user_id = ?", (user_id,))
                 await db.execute("DELETE FROM deals WHERE proposer_id = ? OR receiver_id = ?", (user_id, user_id))
+                await db.execute("DELETE FROM user_cities WHERE user_id = ?", (user_id,))
+                await db.execute("DELETE FROM resource_items WHERE user_id = ?", (user_id,))
+                await db.execute("DELETE FROM points_ledger WHERE user_id = ?", (user_id,))
                 await db.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
                 await db.commit()
+            self._invalidate_user(user_id)
+            self._invalidate_search()
             return True
         except Exception as e:
             print(f"Error deleting user: {e}")
@@ -568,9 +1370,11 @@ class Database:
     async def set_user_hidden(self, user_id: int, hidden: bool) -> bool:
         """Hide or unhide a user profile"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._connection() as db:
                 await db.execute("UPDATE users SET is_hidden = ? WHERE user_id = ?", (1 if hidden else 0, user_id))
                 await db.commit()
+            self._invalidate_user(user_id)
+            self._invalidate_search()
             return True
         except Exception as e:
             print(f"Error setting user hidden: {e}")
@@ -578,7 +1382,7 @@ class Database:
 
     async def get_visible_users(self) -> List[Dict]:
         """Get all non-hidden users"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("SELECT * FROM users WHERE is_hidden = 0 ORDER BY name") as cursor:
                 rows = await cursor.fetchall()
@@ -586,7 +1390,7 @@ class Database:
 
     async def get_all_deals(self) -> List[Dict]:
         """Get all deals for admin view"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT d.*, p.name as proposer_name, p.username as proposer_username,
@@ -598,3 +1402,204 @@ class Database:
             """) as cursor:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
+
+    # Keyset pagination: each page method returns (rows, next_cursor); next_cursor is None on the last page
+    async def _created_at_page(self, select: str, conditions: List[str], params: list, alias: str,
+                               cursor: Optional[str], limit: int) -> Tuple[List[Dict], Optional[str]]:
+        """Page through rows ordered by (created_at, id) DESC, starting after cursor"""
+        conditions = list(conditions)
+        params = list(params)
+        position = decode_cursor(cursor) if cursor else None
+        if position:
+            conditions.append(f"({alias}.created_at, {alias}.id) < (?, ?)")
+            params.extend(position)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"{select} {where} ORDER BY {alias}.created_at DESC, {alias}.id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        async with self._connection() as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(query, params) as db_cursor:
+                rows = [dict(row) for row in await db_cursor.fetchall()]
+
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+    async def get_active_lots_page(self, lot_type: str, cursor: Optional[str] = None,
+                                   limit: int = 10) -> Tuple[List[Dict], Optional[str]]:
+        """Page of active approved lots by type (excludes hidden users), newest first"""
+        return await self._created_at_page(
+            """
+            SELECT l.*, u.name, u.instagram, u.points, u.username
+            FROM lots l
+            JOIN users u ON l.user_id = u.user_id
+            """,
+            ["l.type = ?", "l.status = 'approved'", "COALESCE(u.is_hidden, 0) = 0"],
+            [lot_type], "l", cursor, limit
+        )
+
+    async def get_all_lots_page(self, lot_type: str = None, cursor: Optional[str] = None,
+                                limit: int = 20) -> Tuple[List[Dict], Optional[str]]:
+        """Page of all lots (optionally filtered by type) for admin, newest first"""
+        return await self._created_at_page(
+            """
+            SELECT l.*, u.name as user_name, u.username
+            FROM lots l
+            JOIN users u ON l.user_id = u.user_id
+            """,
+            ["l.type = ?"] if lot_type else [],
+            [lot_type] if lot_type else [], "l", cursor, limit
+        )
+
+    async def get_all_deals_page(self, cursor: Optional[str] = None,
+                                 limit: int = 20) -> Tuple[List[Dict], Optional[str]]:
+        """Page of all deals for admin view, newest first"""
+        return await self._created_at_page(
+            """
+            SELECT d.*, p.name as proposer_name, p.username as proposer_username,
+                   r.name as receiver_name, r.username as receiver_username
+            FROM deals d
+            JOIN users p ON d.proposer_id = p.user_id
+            JOIN users r ON d.receiver_id = r.user_id
+            """,
+            [], [], "d", cursor, limit
+        )
+
+    async def get_all_users_page(self, cursor: Optional[str] = None,
+                                 limit: int = 20) -> Tuple[List[Dict], Optional[str]]:
+        """Page of all users ordered by (name, user_id). The cursor is the last user_id of
+        the previous page (names are too long for callback data); the page after a
+        deleted user is empty."""
+        query = "SELECT * FROM users"
+        params = []
+        if cursor and cursor.isdigit():
+            query += " WHERE (name, user_id) > ((SELECT name FROM users WHERE user_id = ?), ?)"
+            params.extend([int(cursor), int(cursor)])
+        query += " ORDER BY name, user_id LIMIT ?"
+        params.append(limit + 1)
+
+        async with self._connection() as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(query, params) as db_cursor:
+                rows = [dict(row) for row in await db_cursor.fetchall()]
+
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, str(rows[-1]["user_id"])
+
+    async def count_lots(self, lot_type: str = None) -> int:
+        """Count lots (optionally of one type)"""
+        async with self._connection() as db:
+            if lot_type:
+                query, params = "SELECT COUNT(*) FROM lots WHERE type = ?", (lot_type,)
+            else:
+                query, params = "SELECT COUNT(*) FROM lots", ()
+            async with db.execute(query, params) as cursor:
+                return (await cursor.fetchone())[0]
+
+    async def count_deals(self) -> int:
+        """Count all deals"""
+        async with self._connection() as db:
+            async with db.execute("SELECT COUNT(*) FROM deals") as cursor:
+                return (await cursor.fetchone())[0]
+
+    # Search methods
+    async def search(self, query: str, offset: int = 0,
+                     limit: int = 10) -> Tuple[List[Dict], Optional[int]]:
+        """Page of visible lots, profiles and questionnaire items matching every word of
+        query as a prefix, best bm25 rank first (titles weigh 10× bodies). An owner's
+        item listed for several cities is one result. Returns (results, next offset or None).
+
+        Pages are cached for search_cache_ttl seconds per normalized query, so queries
+        typed as "Pho", "phot", "photo" each get an entry and repeats are free."""
+        match = fts_query(query)
+        if match is None:
+            return [], None
+
+        key = (match, offset, limit)
+        now = asyncio.get_running_loop().time()
+        cached = self._search_cache.get(key)
+        if cached and cached[0] > now:
+            self._search_cache.move_to_end(key)
+            self.search_cache_hits += 1
+            return [dict(result) for result in cached[1]], cached[2]
+        self.search_cache_misses += 1
+
+        # bm25() and snippet() cannot run inside the GROUP BY, so the matches are
+        # materialized first
+        async with self._connection() as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute("""
+                WITH hits AS MATERIALIZED (
+                    SELECT rowid AS key, user_id, title,
+                           snippet(search_index, 2, '', '', '…', 12) AS excerpt,
+                           bm25(search_index, 0.0, 10.0, 1.0) AS score
+                    FROM search_index
+                    WHERE search_index MATCH ?
+                )
+                SELECT h.key & 3 AS kind, h.key >> 2 AS ref_id, h.user_id, h.title, h.excerpt,
+                       l.type AS lot_type, u.name, u.username, MIN(h.score) AS score
+                FROM hits h
+                JOIN users u ON u.user_id = h.user_id
+                LEFT JOIN lots l ON h.key & 3 = 0 AND l.id = h.key >> 2
+                WHERE COALESCE(u.is_hidden, 0) = 0 AND (h.key & 3 != 0 OR l.status = 'approved')
+                GROUP BY CASE WHEN h.key & 3 = 2 THEN h.user_id || char(31) || h.title ELSE h.key END
+                ORDER BY score, h.key
+                LIMIT ? OFFSET ?
+            """, (match, limit + 1, offset)) as cursor:
+                rows = await cursor.fetchall()
+
+        results = []
+        for row in rows[:limit]:
+            result = dict(row)
+            result["kind"] = SEARCH_KINDS[row["kind"]]
+            del result["score"]
+            results.append(result)
+        next_offset = offset + limit if len(rows) > limit else None
+
+        if self.search_cache_size > 0:
+            self._search_cache[key] = (now + self.search_cache_ttl, results, next_offset)
+            self._search_cache.move_to_end(key)
+            while len(self._search_cache) > self.search_cache_size:
+                self._search_cache.popitem(last=False)
+        return [dict(result) for result in results], next_offset
+
+    # FSM storage methods
+    async def get_fsm_record(self, key: str, min_updated_at: int = 0) -> Optional[tuple]:
+        """(state, data) stored for key, ignoring records last written before min_updated_at"""
+        async with self._connection() as db:
+            async with db.execute(
+                "SELECT state, data FROM fsm_states WHERE key = ? AND updated_at >= ?",
+                (key, min_updated_at)
+            ) as cursor:
+                return await cursor.fetchone()
+
+    async def save_fsm_records(self, records: List[tuple]) -> bool:
+        """Write (key, state, data, updated_at) records in one transaction; a record
+        with neither state nor data is deleted"""
+        try:
+            async with self._connection() as db:
+                await db.executemany(
+                    "DELETE FROM fsm_states WHERE key = ?",
+                    [(key,) for key, state, data, _ in records if state is None and data is None]
+                )
+                await db.executemany("""
+                    INSERT INTO fsm_states (key, state, data, updated_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        state = excluded.state, data = excluded.data, updated_at = excluded.updated_at
+                """, [record for record in records if record[1] is not None or record[2] is not None])
+                await db.commit()
+                return True
+        except Exception as e:
+            print(f"Error saving FSM records: {e}")
+            return False
+
+    async def delete_stale_fsm_records(self, before: int) -> int:
+        """Delete FSM records last written before the given unix time"""
+        async with self._connection() as db:
+            cursor = await db.execute("DELETE FROM fsm_states WHERE updated_at < ?", (before,))
+            await db.commit()
+            return cursor.rowcount
@@ -179,10 +179,6 @@ SKILL_CATEGORIES = {
     }
 }
 
-ALL_SKILLS = []
-for cat in SKILL_CATEGORIES.values():
-    ALL_SKILLS.extend(cat['items'])
-
 OFFER_FORMATS = [
     "Professional consultations", "Access to courses / materials", "Private Sessions & Appointments",
     "Workshops", "Professional coaching", "Individual programs",
@@ -744,3 +740,13 @@ ART_FORMS = [
     "Textile / objects",
     "Other"
 ]
+
+
+def __getattr__(name):
+    # Derived lists are built on first use instead of at import
+    if name == "ALL_SKILLS":
+        value = [item for cat in SKILL_CATEGORIES.values() for item in cat['items']]
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
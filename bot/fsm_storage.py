@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Set
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from bot.database import Database
+
+logger = logging.getLogger(__name__)
+
+
+def storage_key_id(key: StorageKey) -> str:
+    """Flat primary key for a StorageKey"""
+    return ":".join(
+        "" if part is None else str(part)
+        for part in (key.bot_id, key.chat_id, key.user_id, key.thread_id,
+                     key.business_connection_id, key.destiny)
+    )
+
+
+def dumps_data(data: Dict[str, Any]) -> Optional[str]:
+    """Compact JSON for FSM data (None for empty data); sets and tuples become lists"""
+    if not data:
+        return None
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=list)
+
+
+class _Record:
+    __slots__ = ("state", "data", "touched_at")
+
+    def __init__(self, state: Optional[str], data: Optional[str], touched_at: float):
+        self.state = state
+        self.data = data
+        self.touched_at = touched_at
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM storage persisted in the bot database so in-progress flows survive restarts.
+
+    Active sessions are kept in memory and written behind: changed keys are flushed in
+    one transaction every flush_interval seconds (and on close). Sessions untouched for
+    idle_eviction seconds are dropped from memory once saved, and records not written
+    for ttl seconds expire from the database.
+    """
+
+    def __init__(self, db: Database, ttl: float = 7 * 24 * 3600, flush_interval: float = 1.0,
+                 idle_eviction: float = 600, sweep_interval: float = 3600):
+        self.db = db
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.idle_eviction = idle_eviction
+        self.sweep_interval = sweep_interval
+
+        self._records: Dict[str, _Record] = {}
+        self._dirty: Set[str] = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self._last_sweep = 0.0
+
+    def start(self):
+        """Start the background flush loop; until then every change is written immediately"""
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                self._evict_idle()
+                await self._sweep()
+            except Exception as e:
+                logger.error(f"FSM storage maintenance failed: {e}", exc_info=True)
+
+    async def flush(self):
+        """Write all changed sessions in one transaction"""
+        if not self._dirty:
+            return
+        keys, self._dirty = self._dirty, set()
+        records = [
+            (key, record.state, record.data, int(record.touched_at))
+            for key, record in ((key, self._records.get(key)) for key in keys)
+            if record is not None
+        ]
+        saved = False
+        try:
+            saved = await self.db.save_fsm_records(records)
+        finally:
+            if not saved:
+                # Keep them for the next attempt (newer changes are already in _dirty)
+                self._dirty |= keys
+
+    def _evict_idle(self):
+        cutoff = time.time() - self.idle_eviction
+        for key in [key for key, record in self._records.items() if record.touched_at < cutoff]:
+            if key not in self._dirty:
+                del self._records[key]
+
+    async def _sweep(self):
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        deleted = await self.db.delete_stale_fsm_records(int(now - self.ttl))
+        if deleted:
+            logger.info(f"Expired {deleted} stale FSM sessions")
+
+    async def _record(self, key: StorageKey) -> _Record:
+        key_id = storage_key_id(key)
+        record = self._records.get(key_id)
+        now = time.time()
+        if record is None:
+            row = await self.db.get_fsm_record(key_id, int(now - self.ttl))
+            loaded = _Record(row[0], row[1], now) if row else _Record(None, None, now)
+            # Another update for this key may have loaded it while we were waiting
+            record = self._records.setdefault(key_id, loaded)
+        record.touched_at = now
+        return record
+
+    async def _changed(self, key: StorageKey):
+        self._dirty.add(storage_key_id(key))
+        if self._flusher is None:
+            await self.flush()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._record(key)
+        record.state = state.state if isinstance(state, State) else state
+        await self._changed(key)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._record(key)).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._record(key)
+        record.data = dumps_data(data)
+        await self._changed(key)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        # Decoded on every read so callers never share (and silently mutate) cached objects
+        record = await self._record(key)
+        return json.loads(record.data) if record.data else {}
+
+    def cached_sessions(self) -> int:
+        """Number of sessions currently held in memory"""
+        return len(self._records)
@@ -16,6 +16,7 @@ from bot.keyboards import (
     get_lot_moderation_keyboard
 )
 from bot.config import ADMIN_IDS
+from bot.metrics import metrics
 
 router = Router()
 
@@ -33,11 +34,34 @@ class AddOpenResource(StatesGroup):
     city = State()
 
 
+ADMIN_PAGE_SIZE = 20
+
+
 def is_admin(user_id: int) -> bool:
     """Check if user is admin"""
     return user_id in ADMIN_IDS
 
 
+def page_cursor(data: str, base: str) -> str:
+    """Cursor from paged callback data "<base>:<cursor>" (None for the first page)"""
+    if data.startswith(base + ":"):
+        return data[len(base) + 1:] or None
+    return None
+
+
+def add_next_button(builder: InlineKeyboardBuilder, base: str, next_cursor: str):
+    if next_cursor:
+        builder.row(InlineKeyboardButton(text="Next ➡️", callback_data=f"{base}:{next_cursor}"))
+
+
+@router.message(Command("metrics"))
+async def show_metrics(message: Message):
+    if not is_admin(message.from_user.id):
+        await message.answer("❌ You don't have access to this section.")
+        return
+    await message.answer(metrics.summary())
+
+
 @router.message(F.text == "⚙️Admin Panel")
 async def show_admin_panel(message: Message):
     if not is_admin(message.from_user.id):
@@ -65,12 +89,13 @@ async def manage_users_menu(callback: CallbackQuery, db: Database):
     await callback.answer()
 
 
-@router.callback_query(F.data == "admin:users_list")
+@router.callback_query((F.data == "admin:users_list") | F.data.startswith("admin:users_list:"))
 async def list_all_users(callback: CallbackQuery, db: Database):
     if not is_admin(callback.from_user.id):
         await callback.answer("Access denied", show_alert=True)
         return
-    users = await db.get_all_users()
+    cursor = page_cursor(callback.data, "admin:users_list")
+    users, next_cursor = await db.get_all_users_page(cursor, ADMIN_PAGE_SIZE)
     if not users:
         await callback.answer("No users found", show_alert=True)
         return
@@ -86,35 +111,44 @@ async def list_all_users(callback: CallbackQuery, db: Database):
             f"IG: {user['instagram'] if user['instagram'] else 'none'}\n"
             f"💰 {user['points']} pts | 📅 {user['registered_at'][:10]}\n\n"
         )
+    builder = InlineKeyboardBuilder()
+    add_next_button(builder, "admin:users_list", next_cursor)
+    markup = builder.as_markup() if next_cursor else None
     if len(users_text) > 4096:
         chunks = [users_text[i:i+4096] for i in range(0, len(users_text), 4096)]
-        await callback.message.answer(chunks[0])
-        for chunk in chunks[1:]:
+        for chunk in chunks[:-1]:
             await callback.message.answer(chunk)
+        await callback.message.answer(chunks[-1], reply_markup=markup)
     else:
-        await callback.message.answer(users_text)
+        await callback.message.answer(users_text, reply_markup=markup)
     await callback.answer()
 
 
-@router.callback_query(F.data == "admin:users_remove")
-async def show_users_for_remove(callback: CallbackQuery, db: Database):
-    if not is_admin(callback.from_user.id):
-        await callback.answer("Access denied", show_alert=True)
-        return
-    users = await db.get_all_users()
-    if not users:
-        await callback.answer("No users found", show_alert=True)
-        return
+def remove_users_keyboard(users: list, next_cursor: str) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     for user in users:
         builder.row(InlineKeyboardButton(
             text=f"🗑 {user['name']} (@{user['username'] or 'none'})",
             callback_data=f"admin:usr_rm:{user['user_id']}"
         ))
+    add_next_button(builder, "admin:users_remove", next_cursor)
     builder.row(InlineKeyboardButton(text="🔙 Back", callback_data="admin:users"))
+    return builder.as_markup()
+
+
+@router.callback_query((F.data == "admin:users_remove") | F.data.startswith("admin:users_remove:"))
+async def show_users_for_remove(callback: CallbackQuery, db: Database):
+    if not is_admin(callback.from_user.id):
+        await callback.answer("Access denied", show_alert=True)
+        return
+    cursor = page_cursor(callback.data, "admin:users_remove")
+    users, next_cursor = await db.get_all_users_page(cursor, ADMIN_PAGE_SIZE)
+    if not users:
+        await callback.answer("No users found", show_alert=True)
+        return
     await callback.message.edit_text(
         "🗑 Remove User\n\nUser will be fully deleted from DB and can re-register.\n\nSelect user:",
-        reply_markup=builder.as_markup()
+        reply_markup=remove_users_keyboard(users, next_cursor)
     )
     await callback.answer()
 
@@ -157,27 +191,21 @@ async def execute_remove_user(callback: CallbackQuery, db: Database):
         await callback.answer(f"✅ {name} deleted", show_alert=True)
     else:
         await callback.answer("❌ Failed to delete", show_alert=True)
-    # Refresh remove list
-    users = await db.get_all_users()
-    builder = InlineKeyboardBuilder()
-    for u in users:
-        builder.row(InlineKeyboardButton(
-            text=f"🗑 {u['name']} (@{u['username'] or 'none'})",
-            callback_data=f"admin:usr_rm:{u['user_id']}"
-        ))
-    builder.row(InlineKeyboardButton(text="🔙 Back", callback_data="admin:users"))
+    # Refresh remove list (first page)
+    users, next_cursor = await db.get_all_users_page(limit=ADMIN_PAGE_SIZE)
     await callback.message.edit_text(
         "🗑 Remove User\n\nSelect user:",
-        reply_markup=builder.as_markup()
+        reply_markup=remove_users_keyboard(users, next_cursor)
     )
 
 
-@router.callback_query(F.data == "admin:users_hide")
+@router.callback_query((F.data == "admin:users_hide") | F.data.startswith("admin:users_hide:"))
 async def show_users_for_hide(callback: CallbackQuery, db: Database):
     if not is_admin(callback.from_user.id):
         await callback.answer("Access denied", show_alert=True)
         return
-    users = await db.get_all_users()
+    cursor = page_cursor(callback.data, "admin:users_hide")
+    users, next_cursor = await db.get_all_users_page(cursor, ADMIN_PAGE_SIZE)
     if not users:
         await callback.answer("No users found", show_alert=True)
         return
@@ -194,6 +222,7 @@ async def show_users_for_hide(callback: CallbackQuery, db: Database):
                 text=f"🙈 Hide — {user['name']}",
                 callback_data=f"admin:usr_hide:{user['user_id']}"
             ))
+    add_next_button(builder, "admin:users_hide", next_cursor)
     builder.row(InlineKeyboardButton(text="🔙 Back", callback_data="admin:users"))
     await callback.message.edit_text(
         "🙈 Hide / Unhide Profile\n\nHidden users won't appear in Resources.\n\nSelect user:",
@@ -242,27 +271,23 @@ async def moderate_lots_menu(callback: CallbackQuery, db: Database):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin:lots_list:"))
-async def show_lots_list(callback: CallbackQuery, db: Database):
-    if not is_admin(callback.from_user.id):
-        await callback.answer("Access denied", show_alert=True)
-        return
-    lot_type = callback.data.split(":")[2]
-    lots = await db.get_all_lots(lot_type)
+async def render_lots_list(callback: CallbackQuery, db: Database, lot_type: str, cursor: str = None,
+                           empty_text: str = None):
+    """Edit the message into one page of the admin lots list with delete buttons"""
+    lots, next_cursor = await db.get_all_lots_page(lot_type, cursor, ADMIN_PAGE_SIZE)
     type_name = "Lots (Share)" if lot_type == "share" else "Requests (Seek)"
     if not lots:
         await callback.message.edit_text(
-            f"🎯 {type_name}\n\n✅ No {lot_type} lots found.",
+            f"🎯 {type_name}\n\n{empty_text or f'✅ No {lot_type} lots found.'}",
             reply_markup=InlineKeyboardMarkup(inline_keyboard=[
                 [InlineKeyboardButton(text="🔙 Back", callback_data="admin:lots")]
             ])
         )
-        await callback.answer()
         return
     # Show lots with delete buttons
-    text = f"🎯 {type_name} ({len(lots)} total)\n\n"
+    text = f"🎯 {type_name} ({await db.count_lots(lot_type)} total)\n\n"
     builder = InlineKeyboardBuilder()
-    for lot in lots[:20]:  # limit to 20
+    for lot in lots:
         status_emoji = {"approved": "✅", "pending": "⏳", "rejected": "❌"}.get(lot['status'], "❓")
         text += (
             f"━━━━━━━━━━━━━━━\n"
@@ -273,10 +298,23 @@ async def show_lots_list(callback: CallbackQuery, db: Database):
             text=f"🗑 Delete #{lot['id']} — {lot['title'][:30]}",
             callback_data=f"admin:lot_del:{lot['id']}"
         ))
+    add_next_button(builder, f"admin:lots_list:{lot_type}", next_cursor)
     builder.row(InlineKeyboardButton(text="🔙 Back", callback_data="admin:lots"))
     if len(text) > 4096:
         text = text[:4090] + "..."
     await callback.message.edit_text(text, reply_markup=builder.as_markup())
+
+
+@router.callback_query(F.data.startswith("admin:lots_list:"))
+async def show_lots_list(callback: CallbackQuery, db: Database):
+    """admin:lots_list:<type>[:<cursor>]"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("Access denied", show_alert=True)
+        return
+    parts = callback.data.split(":", 3)
+    lot_type = parts[2]
+    cursor = parts[3] if len(parts) > 3 else None
+    await render_lots_list(callback, db, lot_type, cursor)
     await callback.answer()
 
 
@@ -292,28 +330,8 @@ async def delete_lot_admin(callback: CallbackQuery, db: Database):
         return
     await db.admin_delete_lot(lot_id)
     await callback.answer(f"✅ Lot #{lot_id} deleted", show_alert=True)
-    # Refresh the list
-    lot_type = lot['type']
-    lots = await db.get_all_lots(lot_type)
-    type_name = "Lots (Share)" if lot_type == "share" else "Requests (Seek)"
-    if not lots:
-        await callback.message.edit_text(
-            f"🎯 {type_name}\n\n✅ No lots remaining.",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🔙 Back", callback_data="admin:lots")]
-            ])
-        )
-        return
-    text = f"🎯 {type_name} ({len(lots)} total)\n\n"
-    builder = InlineKeyboardBuilder()
-    for l in lots[:20]:
-        status_emoji = {"approved": "✅", "pending": "⏳", "rejected": "❌"}.get(l['status'], "❓")
-        text += f"━━━━━━━━━━━━━━━\n#{l['id']} {status_emoji} {l['title']}\n👤 {l['user_name']} | 📅 {l['created_at'][:10]}\n"
-        builder.row(InlineKeyboardButton(text=f"🗑 Delete #{l['id']} — {l['title'][:30]}", callback_data=f"admin:lot_del:{l['id']}"))
-    builder.row(InlineKeyboardButton(text="🔙 Back", callback_data="admin:lots"))
-    if len(text) > 4096:
-        text = text[:4090] + "..."
-    await callback.message.edit_text(text, reply_markup=builder.as_markup())
+    # Refresh the list (first page)
+    await render_lots_list(callback, db, lot['type'], empty_text="✅ No lots remaining.")
 
 
 # Pending lots moderation (existing flow)
@@ -451,7 +469,7 @@ async def manage_resources(callback: CallbackQuery, db: Database):
         await callback.answer("Access denied", show_alert=True)
         return
     # Get all registration data to find which categories have resources
-    all_data = await db.get_all_registration_data()
+    all_data = await db.get_registration_entries()
     # Count resources per category
     categories = {
         "selected_ra_items": "🏢 Businesses, Spaces & Platforms",
@@ -467,7 +485,7 @@ async def manage_resources(callback: CallbackQuery, db: Database):
     counts = {}
     for entry in all_data:
         try:
-            reg = json.loads(entry['answer_data'])
+            reg = entry['data']
             for key in categories:
                 items = reg.get(key, [])
                 if items:
@@ -508,13 +526,13 @@ async def show_resource_category_users(callback: CallbackQuery, db: Database):
         "specialists_list": "🩵 Specialists",
     }
     cat_name = categories.get(cat_key, cat_key)
-    all_data = await db.get_all_registration_data()
+    all_data = await db.get_registration_entries()
     builder = InlineKeyboardBuilder()
     text = f"📦 {cat_name}\n\nUsers with resources:\n\n"
     user_count = 0
     for entry in all_data:
         try:
-            reg = json.loads(entry['answer_data'])
+            reg = entry['data']
             items = reg.get(cat_key, [])
             if items:
                 user_count += 1
@@ -551,22 +569,30 @@ async def delete_user_resource(callback: CallbackQuery, db: Database):
     parts = callback.data.split(":")
     uid = int(parts[2])
     cat_key = parts[3]
-    # Get user's registration data, remove the category, save back
-    answers = await db.get_user_answers(uid)
-    for ans in answers:
-        if ans['question_slug'] == 'registration_data':
-            try:
-                reg = json.loads(ans['answer_data'])
-                if cat_key in reg:
-                    reg[cat_key] = []
-                    await db.add_user_answer(uid, 'registration_data', json.dumps(reg, default=str))
-                    user = await db.get_user(uid)
-                    await callback.answer(f"✅ Cleared {cat_key} for {user['name']}", show_alert=True)
-                else:
-                    await callback.answer("Category not found in user data", show_alert=True)
-            except Exception as e:
-                await callback.answer(f"Error: {e}", show_alert=True)
-            break
+    # Get user's registration data, remove the category, save back. One transaction,
+    # so an edit the user saves meanwhile is not overwritten with the old data
+    found = None
+    try:
+        async with db.unit_of_work() as unit:
+            answers = await db.get_user_answers(uid)
+            for ans in answers:
+                if ans['question_slug'] == 'registration_data':
+                    reg = json.loads(ans['answer_data'])
+                    found = cat_key in reg
+                    if found:
+                        reg[cat_key] = []
+                        await db.add_user_answer(uid, 'registration_data', json.dumps(reg, default=str))
+                    break
+    except Exception as e:
+        await callback.answer(f"Error: {e}", show_alert=True)
+    else:
+        if found and unit.committed:
+            user = await db.get_user(uid)
+            await callback.answer(f"✅ Cleared {cat_key} for {user['name']}", show_alert=True)
+        elif found:
+            await callback.answer("Error: could not save user data", show_alert=True)
+        elif found is not None:
+            await callback.answer("Category not found in user data", show_alert=True)
     # Refresh the category view
     await show_resource_category_users(callback, db)
 
@@ -586,27 +612,34 @@ async def manage_points_menu(callback: CallbackQuery, db: Database):
     await callback.answer()
 
 
-@router.callback_query(F.data.in_({"admin:points_add", "admin:points_remove"}))
+def points_users_keyboard(users: list, action: str, next_cursor: str) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    for user in users:
+        builder.row(InlineKeyboardButton(
+            text=f"{user['name']} — {user['points']} pts",
+            callback_data=f"admin:pt:{action}:{user['user_id']}"
+        ))
+    add_next_button(builder, f"admin:points_{action}", next_cursor)
+    builder.row(InlineKeyboardButton(text="🔙 Back", callback_data="admin:points"))
+    return builder.as_markup()
+
+
+@router.callback_query(F.data.startswith(("admin:points_add", "admin:points_remove")))
 async def show_users_for_points(callback: CallbackQuery, db: Database):
+    """admin:points_<add|remove>[:<cursor>]"""
     if not is_admin(callback.from_user.id):
         await callback.answer("Access denied", show_alert=True)
         return
-    action = "add" if "add" in callback.data else "remove"
-    users = await db.get_all_users()
+    action = "add" if callback.data.startswith("admin:points_add") else "remove"
+    cursor = page_cursor(callback.data, f"admin:points_{action}")
+    users, next_cursor = await db.get_all_users_page(cursor, ADMIN_PAGE_SIZE)
     if not users:
         await callback.answer("No users found", show_alert=True)
         return
     action_text = "➕ Add a Point" if action == "add" else "➖ Remove a Point"
-    builder = InlineKeyboardBuilder()
-    for user in users:
-        builder.row(InlineKeyboardButton(
-            text=f"{user['name']} — {user['points']} pts",
-            callback_data=f"admin:pt:{action}:{user['user_id']}"
-        ))
-    builder.row(InlineKeyboardButton(text="🔙 Back", callback_data="admin:points"))
     await callback.message.edit_text(
         f"💰 {action_text}\n\nSelect a user:",
-        reply_markup=builder.as_markup()
+        reply_markup=points_users_keyboard(users, action, next_cursor)
     )
     await callback.answer()
 
@@ -623,32 +656,32 @@ async def adjust_user_points(callback: CallbackQuery, db: Database):
     if not user:
         await callback.answer("User not found", show_alert=True)
         return
-    current = user['points']
-    new_points = current + 1 if action == "add" else max(0, current - 1)
-    await db.update_user_points(uid, new_points)
+    delta = 1 if action == "add" else -1
+    new_points = await db.add_points(uid, delta, "admin")
+    if new_points is None:
+        await callback.answer(f"{user['name']} has no points to remove", show_alert=True)
+        return
     action_text = "+1" if action == "add" else "-1"
-    await callback.answer(f"✅ {user['name']}: {current} → {new_points} ({action_text})", show_alert=True)
-    # Refresh user list
-    users = await db.get_all_users()
+    await callback.answer(f"✅ {user['name']}: {new_points - delta} → {new_points} ({action_text})", show_alert=True)
+    # Refresh user list (first page)
+    users, next_cursor = await db.get_all_users_page(limit=ADMIN_PAGE_SIZE)
     action_label = "➕ Add a Point" if action == "add" else "➖ Remove a Point"
-    builder = InlineKeyboardBuilder()
-    for u in users:
-        builder.row(InlineKeyboardButton(
-            text=f"{u['name']} — {u['points']} pts",
-            callback_data=f"admin:pt:{action}:{u['user_id']}"
-        ))
-    builder.row(InlineKeyboardButton(text="🔙 Back", callback_data="admin:points"))
-    await callback.message.edit_text(f"💰 {action_label}\n\nSelect a user:", reply_markup=builder.as_markup())
+    await callback.message.edit_text(
+        f"💰 {action_label}\n\nSelect a user:",
+        reply_markup=points_users_keyboard(users, action, next_cursor)
+    )
 
 
 # ==================== GENERATE TOKEN ====================
 
-@router.callback_query(F.data == "admin:deals")
+@router.callback_query((F.data == "admin:deals") | F.data.startswith("admin:deals:"))
 async def view_all_deals(callback: CallbackQuery, db: Database):
+    """admin:deals[:<cursor>]"""
     if not is_admin(callback.from_user.id):
         await callback.answer("Access denied", show_alert=True)
         return
-    deals = await db.get_all_deals()
+    cursor = page_cursor(callback.data, "admin:deals")
+    deals, next_cursor = await db.get_all_deals_page(cursor, ADMIN_PAGE_SIZE)
     if not deals:
         await callback.message.edit_text(
             "🤝 All Deals\n\n✅ No deals yet.",
@@ -658,28 +691,27 @@ async def view_all_deals(callback: CallbackQuery, db: Database):
         )
         await callback.answer()
         return
-    text = f"🤝 All Deals ({len(deals)} total)\n\n"
-    status_emoji = {"pending": "⏳", "accepted": "✅", "completed": "🎉", "declined": "❌"}
+    text = f"🤝 All Deals ({await db.count_deals()} total)\n\n"
+    status_emoji = {"pending": "⏳", "accepted": "✅", "completion_requested": "🤞", "completed": "🎉", "declined": "❌"}
     for deal in deals:
         emoji = status_emoji.get(deal['status'], "❓")
         text += (
             f"━━━━━━━━━━━━━━━\n"
-            f"{emoji} {deal['status'].capitalize()}\n"
+            f"{emoji} {deal['status'].replace('_', ' ').capitalize()}\n"
             f"👤 {deal['proposer_name']} → {deal['receiver_name']}\n"
             f"📅 {deal['created_at'][:10]}\n"
         )
+    builder = InlineKeyboardBuilder()
+    add_next_button(builder, "admin:deals", next_cursor)
+    builder.row(InlineKeyboardButton(text="🔙 Back", callback_data="admin:back"))
     if len(text) > 4096:
         chunks = [text[i:i+4096] for i in range(0, len(text), 4096)]
         await callback.message.edit_text(chunks[0])
-        for chunk in chunks[1:]:
+        for chunk in chunks[1:-1]:
             await callback.message.answer(chunk)
+        await callback.message.answer(chunks[-1], reply_markup=builder.as_markup())
     else:
-        await callback.message.edit_text(
-            text,
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🔙 Back", callback_data="admin:back")]
-            ])
-        )
+        await callback.message.edit_text(text, reply_markup=builder.as_markup())
     await callback.answer()
 
 
@@ -5,6 +5,13 @@ from bot.keyboards import get_confirmation_keyboard, get_deal_completion_keyboar
 
 router = Router()
 
+# Deals created before completion_requested existed may have had completion requested
+# while they stayed "accepted"; only those may still be confirmed from "accepted".
+# Remove the fallback in confirm_deal_completion (and this constant) once
+#   SELECT COUNT(*) FROM deals WHERE status = 'accepted' AND created_at < '2026-10-18 15:05:00'
+# returns 0. A proposer whose deal falls outside it simply taps Complete again.
+LEGACY_COMPLETION_BEFORE = "2026-10-18 15:05:00"
+
 
 @router.callback_query(F.data.startswith("deal:propose:"))
 async def propose_deal(callback: CallbackQuery, db: Database):
@@ -35,79 +42,72 @@ async def propose_deal(callback: CallbackQuery, db: Database):
         await callback.answer("Failed to propose the deal.", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("confirm:deal:"))
-async def accept_deal(callback: CallbackQuery, db: Database):
-    """Handle deal acceptance."""
-    deal_id = int(callback.data.split(":")[-1])
-    deal = await db.get_deal(deal_id)
+async def _respond_to_deal(callback: CallbackQuery, db: Database, deal_id: int, status: str):
+    """Move a pending deal to status on behalf of its receiver; answer and return None if it can't be"""
+    deal, applied = await db.transition_deal(deal_id, "receiver", callback.from_user.id, "pending", status)
 
     if not deal or deal['receiver_id'] != callback.from_user.id:
         await callback.answer("This deal is not for you.", show_alert=True)
-        return
+        return None
 
-    if deal['status'] != 'pending':
+    if not applied:
         await callback.answer("This deal has already been responded to.", show_alert=True)
-        return
+        return None
 
-    success = await db.update_deal_status(deal_id, "accepted")
+    return deal
 
-    if success:
-        proposer = await db.get_user(deal['proposer_id'])
-        await callback.message.bot.send_message(
-            deal['proposer_id'],
-            f"✅ Deal Accepted\n\n"
-            f"{callback.from_user.full_name} has accepted your deal proposal.",
-            reply_markup=get_deal_completion_keyboard(deal_id)
-        )
-        await callback.message.edit_text("You have accepted the deal.")
-    else:
-        await callback.answer("Failed to accept the deal.", show_alert=True)
+
+@router.callback_query(F.data.startswith("confirm:deal:"))
+async def accept_deal(callback: CallbackQuery, db: Database):
+    """Handle deal acceptance."""
+    deal_id = int(callback.data.split(":")[-1])
+    deal = await _respond_to_deal(callback, db, deal_id, "accepted")
+    if deal is None:
+        return
+
+    await callback.message.bot.send_message(
+        deal['proposer_id'],
+        f"✅ Deal Accepted\n\n"
+        f"{callback.from_user.full_name} has accepted your deal proposal.",
+        reply_markup=get_deal_completion_keyboard(deal_id)
+    )
+    await callback.message.edit_text("You have accepted the deal.")
 
 
 @router.callback_query(F.data.startswith("cancel:deal:"))
 async def decline_deal(callback: CallbackQuery, db: Database):
     """Handle deal declination."""
     deal_id = int(callback.data.split(":")[-1])
-    deal = await db.get_deal(deal_id)
-
-    if not deal or deal['receiver_id'] != callback.from_user.id:
-        await callback.answer("This deal is not for you.", show_alert=True)
+    deal = await _respond_to_deal(callback, db, deal_id, "declined")
+    if deal is None:
         return
 
-    if deal['status'] != 'pending':
-        await callback.answer("This deal has already been responded to.", show_alert=True)
-        return
-
-    success = await db.update_deal_status(deal_id, "declined")
-
-    if success:
-        proposer = await db.get_user(deal['proposer_id'])
-        await callback.message.bot.send_message(
-            deal['proposer_id'],
-            f"❌ Deal Declined\n\n"
-            f"{callback.from_user.full_name} has declined your deal proposal."
-        )
-        await callback.message.edit_text("You have declined the deal.")
-    else:
-        await callback.answer("Failed to decline the deal.", show_alert=True)
+    await callback.message.bot.send_message(
+        deal['proposer_id'],
+        f"❌ Deal Declined\n\n"
+        f"{callback.from_user.full_name} has declined your deal proposal."
+    )
+    await callback.message.edit_text("You have declined the deal.")
 
 
 @router.callback_query(F.data.startswith("deal:complete:"))
 async def complete_deal(callback: CallbackQuery, db: Database):
     """Handle deal completion by the proposer."""
     deal_id = int(callback.data.split(":")[-1])
-    deal = await db.get_deal(deal_id)
+    # Only the tap that moves the deal on sends the receiver a confirmation request
+    deal, applied = await db.transition_deal(
+        deal_id, "proposer", callback.from_user.id, "accepted", "completion_requested"
+    )
 
     if not deal or deal['proposer_id'] != callback.from_user.id:
         await callback.answer("This is not your deal to complete.", show_alert=True)
         return
 
-    if deal['status'] != 'accepted':
+    if not applied:
         await callback.answer("This deal is not in an accepted state.", show_alert=True)
         return
 
     # Notify the receiver for confirmation
-    receiver = await db.get_user(deal['receiver_id'])
     await callback.message.bot.send_message(
         deal['receiver_id'],
         f"🎉 Complete the Deal\n\n"
@@ -123,30 +123,36 @@ async def complete_deal(callback: CallbackQuery, db: Database):
 async def confirm_deal_completion(callback: CallbackQuery, db: Database):
     """Handle deal completion confirmation by the receiver."""
     deal_id = int(callback.data.split(":")[-1])
-    deal = await db.get_deal(deal_id)
+    # Completing the deal and awarding its point commit together: if the award fails the
+    # deal stays in completion_requested and the receiver can confirm again
+    async with db.unit_of_work() as unit:
+        deal, applied = await db.transition_deal(
+            deal_id, "receiver", callback.from_user.id, "completion_requested", "completed"
+        )
+        if (not applied and deal and deal['status'] == "accepted"
+                and (deal['created_at'] or "") < LEGACY_COMPLETION_BEFORE):
+            # Requested before completion_requested existed, see LEGACY_COMPLETION_BEFORE
+            deal, applied = await db.transition_deal(deal_id, "receiver", callback.from_user.id, "accepted", "completed")
+        if applied and await db.add_points(deal['proposer_id'], 1, "deal", ref_id=deal_id) is None:
+            unit.failed = True
 
     if not deal or deal['receiver_id'] != callback.from_user.id:
         await callback.answer("This is not your deal to confirm.", show_alert=True)
         return
 
-    if deal['status'] != 'accepted':
-        await callback.answer("This deal is not in an accepted state.", show_alert=True)
+    if not applied:
+        await callback.answer("This deal is not awaiting confirmation.", show_alert=True)
         return
 
-    success = await db.update_deal_status(deal_id, "completed")
-
-    if success:
-        # Award point to the proposer
-        proposer = await db.get_user(deal['proposer_id'])
-        await db.update_user_points(deal['proposer_id'], proposer['points'] + 1)
+    if not unit.committed:
+        await callback.answer("Could not complete the deal. Please try again.", show_alert=True)
+        return
 
-        await callback.message.bot.send_message(
-            deal['proposer_id'],
-            f"Congratulations! You've earned a point for completing the deal with {callback.from_user.full_name}."
-        )
-        await callback.message.edit_text("You have confirmed the deal. A point has been awarded.")
-    else:
-        await callback.answer("Failed to confirm the deal.", show_alert=True)
+    await callback.message.bot.send_message(
+        deal['proposer_id'],
+        f"Congratulations! You've earned a point for completing the deal with {callback.from_user.full_name}."
+    )
+    await callback.message.edit_text("You have confirmed the deal. A point has been awarded.")
 
 
 @router.message(F.text == "🍀My Deals")
@@ -172,7 +178,7 @@ async def show_my_deals(message: Message, db: Database):
             f"━━━━━━━━━━━━━━━\n"
             f"**Deal with:** {partner_name}\n"
             f"**Role:** {role}\n"
-            f"**Status:** {deal['status'].capitalize()}\n"
+            f"**Status:** {deal['status'].replace('_', ' ').capitalize()}\n"
             f"**Date:** {deal['created_at'][:10]}\n"
         )
 
@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
@@ -8,11 +9,9 @@ router = Router()
 
 
 @router.message(F.text == "🫂Friends")
-async def show_friends_menu(message: Message, db: Database):
+async def show_friends_menu(message: Message, profile: Optional[Dict]):
     """Show friends section - list of cities"""
-    user = await db.get_user(message.from_user.id)
-
-    if not user:
+    if not profile:
         await message.answer("❌ You are not registered. Please use /start to register.")
         return
 
@@ -33,6 +32,9 @@ async def show_city_users(callback: CallbackQuery, db: Database):
         await callback.answer(f"No users found in {city}", show_alert=True)
         return
 
+    # Answer first: sending the cards can take longer than the callback stays valid
+    await callback.answer()
+
     # Show each user as a card with inline buttons
     for user in users:
         user_text = (
@@ -45,8 +47,6 @@ async def show_city_users(callback: CallbackQuery, db: Database):
             reply_markup=get_user_card_keyboard(user['user_id'], user['instagram'])
         )
 
-    await callback.answer()
-
 
 @router.callback_query(F.data == "back_to_friends")
 async def back_to_friends(callback: CallbackQuery, db: Database):
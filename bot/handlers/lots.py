@@ -1,4 +1,5 @@
 import logging
+from typing import Dict, Optional
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove
 from aiogram.fsm.context import FSMContext
@@ -6,6 +7,7 @@ from aiogram.fsm.state import State, StatesGroup
 from bot.database import Database
 from bot.keyboards import (
     get_lots_type_keyboard,
+    get_lots_page_keyboard,
     get_add_lot_keyboard,
     get_cancel_keyboard,
     get_menu_keyboard,
@@ -20,6 +22,14 @@ from datetime import datetime
 router = Router()
 logger = logging.getLogger(__name__)
 
+LOTS_PER_PAGE = 10
+
+# lot type -> title of the active lots list
+LOT_LIST_TITLES = {
+    "share": "Active Resources 🫧",
+    "seek": "Active Requests 👀",
+}
+
 
 class AddLot(StatesGroup):
     selecting_type = State() # A or C
@@ -31,11 +41,9 @@ class AddLot(StatesGroup):
 
 
 @router.message(F.text == "🩵Lots")
-async def show_lots_menu(message: Message, db: Database):
+async def show_lots_menu(message: Message, profile: Optional[Dict]):
     """Show lots section menu"""
-    user = await db.get_user(message.from_user.id)
-
-    if not user:
+    if not profile:
         await message.answer("❌ You are not registered. Please use /start to register.")
         return
 
@@ -50,19 +58,30 @@ async def show_lots_menu(message: Message, db: Database):
 # --- B. Browse active resources (Offers) ---
 @router.callback_query(F.data == "lots:browse_b")
 async def browse_active_offers(callback: CallbackQuery, db: Database):
-    await show_active_lots(callback, db, "share", "Active Resources 🫧")
+    await show_active_lots(callback, db, "share", LOT_LIST_TITLES["share"])
 
 
 # --- D. Help a resident (Requests) ---
 @router.callback_query(F.data == "lots:help_d")
 async def browse_active_requests(callback: CallbackQuery, db: Database):
-    await show_active_lots(callback, db, "seek", "Active Requests 👀")
+    await show_active_lots(callback, db, "seek", LOT_LIST_TITLES["seek"])
+
+
+@router.callback_query(F.data.startswith("lots_pg:"))
+async def page_active_lots(callback: CallbackQuery, db: Database):
+    """Next page of active lots: lots_pg:<type>:<cursor>"""
+    _, lot_type, cursor = callback.data.split(":", 2)
+    if lot_type not in LOT_LIST_TITLES:
+        await callback.answer()
+        return
+    await show_active_lots(callback, db, lot_type, LOT_LIST_TITLES[lot_type], cursor)
 
 
-async def show_active_lots(callback: CallbackQuery, db: Database, lot_type: str, title_text: str):
-    """Helper to show active lots"""
+async def show_active_lots(callback: CallbackQuery, db: Database, lot_type: str, title_text: str,
+                           cursor: str = None):
+    """Helper to show a page of active lots"""
     try:
-        lots = await db.get_active_lots(lot_type)
+        lots, next_cursor = await db.get_active_lots_page(lot_type, cursor, LOTS_PER_PAGE)
 
         instructions = ""
         if lot_type == "share":
@@ -113,12 +132,12 @@ async def show_active_lots(callback: CallbackQuery, db: Database, lot_type: str,
 
                 await callback.message.answer(
                     "Select an option:",
-                    reply_markup=get_lots_type_keyboard()
+                    reply_markup=get_lots_page_keyboard(lot_type, next_cursor)
                 )
             else:
                 await callback.message.edit_text(
                     lots_text,
-                    reply_markup=get_lots_type_keyboard()
+                    reply_markup=get_lots_page_keyboard(lot_type, next_cursor)
                 )
 
     except Exception as e:
@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from aiogram import Router, F
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
@@ -9,29 +10,28 @@ router = Router()
 
 
 @router.message(F.text == "🗿My Profile")
-async def show_profile(message: Message, db: Database):
+async def show_profile(message: Message, profile: Optional[Dict]):
     """Show user profile"""
-    user = await db.get_user(message.from_user.id)
     keyboard = get_menu_keyboard(message.from_user.id)
 
-    if not user:
+    if not profile:
         await message.answer("❌ You are not registered. Please use /start to register.", reply_markup=keyboard)
         return
 
     profile_text = (
         f"⚫️ Your Profile\n\n"
-        f"🆔 ID: {user['user_id']}\n"
-        f"🐥 {user['name']}\n"
-        f"🪩 {user['main_city']}\n"
-        f"✉️ {user['about']}\n"
-        f"🩵 Points: {user['points']}\n"
-        f"Registered: {user['registered_at'][:10]}"
+        f"🆔 ID: {profile['user_id']}\n"
+        f"🐥 {profile['name']}\n"
+        f"🪩 {profile['main_city']}\n"
+        f"✉️ {profile['about']}\n"
+        f"🩵 Points: {profile['points']}\n"
+        f"Registered: {profile['registered_at'][:10]}"
     )
 
     # Build inline buttons for instagram link
     builder = InlineKeyboardBuilder()
-    if user['instagram']:
-        ig = user['instagram'].lstrip('@')
+    if profile['instagram']:
+        ig = profile['instagram'].lstrip('@')
         builder.row(InlineKeyboardButton(text="📸 Instagram", url=f"https://instagram.com/{ig}"))
 
     if builder.buttons:
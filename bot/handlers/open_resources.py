@@ -1,11 +1,11 @@
+from typing import Dict, Optional
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from bot.database import Database
-from bot.keyboards import get_back_keyboard
+from bot.keyboards import get_back_keyboard, frozen_keyboard
 from bot.form_data import CITIES
-import hashlib
-import json
+from bot.item_hashes import hash_item, find_item_by_hash
 
 router = Router()
 
@@ -21,6 +21,7 @@ CITY_MAPS = {
 }
 
 
+@frozen_keyboard
 def get_maps_keyboard() -> InlineKeyboardMarkup:
     """Keyboard with all cities"""
     builder = InlineKeyboardBuilder()
@@ -28,12 +29,12 @@ def get_maps_keyboard() -> InlineKeyboardMarkup:
     for i in range(0, len(CITIES), 2):
         row_btns = []
         city1 = CITIES[i]
-        city_hash1 = hashlib.md5(city1.encode()).hexdigest()[:8]
+        city_hash1 = hash_item(city1)
         row_btns.append(InlineKeyboardButton(text=city1, callback_data=f"map:{city_hash1}"))
         
         if i + 1 < len(CITIES):
             city2 = CITIES[i + 1]
-            city_hash2 = hashlib.md5(city2.encode()).hexdigest()[:8]
+            city_hash2 = hash_item(city2)
             row_btns.append(InlineKeyboardButton(text=city2, callback_data=f"map:{city_hash2}"))
         
         builder.row(*row_btns)
@@ -44,17 +45,13 @@ def get_maps_keyboard() -> InlineKeyboardMarkup:
 
 def find_city_by_hash(city_hash: str) -> str | None:
     """Find city name by its hash"""
-    for city in CITIES:
-        if hashlib.md5(city.encode()).hexdigest()[:8] == city_hash:
-            return city
-    return None
+    return find_item_by_hash(CITIES, city_hash)
 
 
 @router.message(F.text == "🌎Maps")
-async def show_maps_menu(message: Message, db: Database):
+async def show_maps_menu(message: Message, profile: Optional[Dict]):
     """Show MAPS section - List of cities"""
-    user = await db.get_user(message.from_user.id)
-    if not user:
+    if not profile:
         await message.answer("❌ You are not registered. Please use /start to register.")
         return
 
@@ -88,11 +85,9 @@ async def show_city_map(callback: CallbackQuery, db: Database):
         builder.row(InlineKeyboardButton(text="🗺 Open Hanna's Map", url=hanna_link))
 
     # 2. User-submitted maps from registration data
-    all_reg_data = await db.get_all_registration_data()
-    for user_data in all_reg_data:
+    for user_data in await db.get_registration_entries():
         try:
-            reg_data = json.loads(user_data["answer_data"])
-            user_maps = reg_data.get("user_maps", [])
+            user_maps = user_data["data"].get("user_maps", [])
             for m in user_maps:
                 if m.get("city") == city:
                     has_maps = True
@@ -104,7 +99,7 @@ async def show_city_map(callback: CallbackQuery, db: Database):
                             text=f"🗺 Open {user_name}'s Map",
                             url=map_link
                         ))
-        except (json.JSONDecodeError, KeyError):
+        except (AttributeError, KeyError):
             continue
 
     builder.row(InlineKeyboardButton(text="🔙 Back", callback_data="back_to_maps"))
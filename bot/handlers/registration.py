@@ -67,7 +67,7 @@ from bot.config import ADMIN_IDS
 from bot.form_data import (
 
  RESOURCE_ACCESS_CATEGORIES,
- SKILL_CATEGORIES, ALL_SKILLS, OFFER_FORMATS, RESULT_TYPES,
+ SKILL_CATEGORIES, OFFER_FORMATS, RESULT_TYPES,
 
  CITIES, INTRO_CATEGORIES, 
 
@@ -91,7 +91,9 @@ import json
 
 
 
-import hashlib
+from bot.item_hashes import find_item_by_hash
+from bot.multiselect import edit_markup
+from bot.questionnaire import CategoryItemsQuestion, LocationQuestion, OptionsQuestion, Questionnaire
 
 import pathlib
 
@@ -99,6 +101,8 @@ import pathlib
 
 import asyncio
 
+from typing import Dict, Optional
+
 
 
 
@@ -263,95 +267,6 @@ async def _show_spec_category_items(callback: CallbackQuery, state: FSMContext,
 
 
 
-def find_item_by_hash(items_list, item_hash):
-
-
-
-    """Helper to find item by its hash"""
-
-
-
-    for item in items_list:
-
-
-
-        if hashlib.md5(item.encode()).hexdigest()[:8] == item_hash:
-
-
-
-            return item
-
-
-
-    return None
-
-
-async def _redraw_multiselect_page(
-    callback: CallbackQuery,
-    state: FSMContext,
-    *,
-    page_key: str,
-    selected_key: str,
-    options: list,
-    prefix: str,
-    done_callback: str,
-    back_callback: str,
-):
-    page = int(callback.data.split(":")[1])
-    data = await state.get_data()
-    selected = set(data.get(selected_key, []))
-    await state.update_data(**{page_key: page})
-    await callback.message.edit_reply_markup(
-        reply_markup=get_multiselect_keyboard(
-            options,
-            selected,
-            prefix,
-            done_callback,
-            back_callback,
-            page=page,
-            page_callback_prefix=page_key,
-        )
-    )
-    await callback.answer()
-
-
-async def _redraw_category_items_page(
-    callback: CallbackQuery,
-    state: FSMContext,
-    *,
-    page_key: str,
-    selected_key: str,
-    current_category_key: str,
-    categories: dict,
-    prefix: str,
-    done_callback: str,
-    back_callback: str,
-):
-    page = int(callback.data.split(":")[1])
-    data = await state.get_data()
-    selected = set(data.get(selected_key, []))
-    category_key = data.get(current_category_key)
-    if not category_key:
-        await callback.answer()
-        return
-    await state.update_data(**{page_key: page})
-    await callback.message.edit_reply_markup(
-        reply_markup=get_category_items_keyboard(
-            category_key,
-            categories,
-            selected,
-            prefix,
-            done_callback,
-            back_callback,
-            page=page,
-            page_callback_prefix=page_key,
-        )
-    )
-    await callback.answer()
-
-
-
-
 
 @router.message(Command("cancel"))
 
@@ -685,139 +600,40 @@ class Registration(StatesGroup):
 
 
 
-@router.callback_query(F.data == "noop")
-async def noop_callback(callback: CallbackQuery):
-    await callback.answer()
+# Multiselect steps; option toggles and page flips for all of them go through two
+# generic handlers that find the question by callback prefix
+QUESTIONNAIRE = Questionnaire([
+    LocationQuestion(Registration.main_city, "main_city", "selected_main_cities", CITIES),
+    CategoryItemsQuestion(Registration.resource_access_items, "ra_item", "selected_ra_items",
+                          RESOURCE_ACCESS_CATEGORIES, "current_ra_category", back_callback="ra_back_cat"),
+    CategoryItemsQuestion(Registration.skill_items, "q_item", "selected_skill_items",
+                          SKILL_CATEGORIES, "current_skill_category", back_callback="skill_back_cat"),
+    CategoryItemsQuestion(Registration.intro_items, "intro_item", "selected_intro_items",
+                          INTRO_CATEGORIES, "current_intro_category", back_callback="intro_back_cat"),
+    LocationQuestion(Registration.intro_location, "intro_city", "selected_intro_cities", CITIES),
+    LocationQuestion(Registration.property_location, "prop_city", "selected_prop_cities", CITIES),
+    OptionsQuestion(Registration.property_type, "prop_type", "selected_property_types", PROPERTY_TYPES),
+    LocationQuestion(Registration.car_location, "car_city", "selected_car_cities", CITIES),
+    OptionsQuestion(Registration.car_info, "car_type", "selected_vehicle_types", VEHICLE_TYPES),
+    LocationQuestion(Registration.equipment_location, "equip_city", "selected_equip_cities", CITIES),
+    OptionsQuestion(Registration.equipment_types, "equip_type", "selected_equipment_types", EQUIPMENT_TYPES),
+    LocationQuestion(Registration.aircraft_location, "air_city", "selected_air_cities", CITIES),
+    OptionsQuestion(Registration.aircraft_type, "air_type", "selected_aircraft_types", AIRCRAFT_TYPES),
+    LocationQuestion(Registration.vessel_location, "vessel_city", "selected_vessel_cities", VESSEL_LOCATIONS,
+                     keyboard_builder=get_vessel_locations_keyboard),
+    OptionsQuestion(Registration.vessel_type, "vessel_type", "selected_vessel_types", VESSEL_TYPES),
+])
+QUESTIONNAIRE.register(router)
 
 
-@router.callback_query(Registration.skill_items, F.data.startswith("q_item_page:"))
-async def page_skill_items(callback: CallbackQuery, state: FSMContext):
-    page = int(callback.data.split(":")[1])
-    data = await state.get_data()
-    category_key = data.get("current_skill_category")
-    if not category_key:
-        await callback.answer()
-        return
-
-    await state.update_data(q_item_page=page)
-    selected = set(data.get("selected_skill_items", []))
-    next_category_key = _get_next_skill_category(category_key)
-    done_text = "Next ➡️" if next_category_key else "🆗 Done"
-
-    await callback.message.edit_reply_markup(
-        reply_markup=get_category_items_keyboard(
-            category_key,
-            SKILL_CATEGORIES,
-            selected,
-            "q_item",
-            "q_item_done",
-            "skill_back_cat",
-            page=page,
-            page_callback_prefix="q_item_page",
-            done_text=done_text,
-        )
-    )
-    await callback.answer()
-
-
-@router.callback_query(Registration.intro_items, F.data.startswith("intro_item_page:"))
-async def page_intro_items(callback: CallbackQuery, state: FSMContext):
-    page = int(callback.data.split(":")[1])
-    data = await state.get_data()
-    category_key = data.get("current_intro_category")
-    if not category_key:
-        await callback.answer()
-        return
-
-    await state.update_data(intro_item_page=page)
-    selected = set(data.get("selected_intro_items", []))
-    next_category_key = _get_next_intro_category(category_key)
-    done_text = "Next ➡️" if next_category_key else "🆗 Done"
-
-    await callback.message.edit_reply_markup(
-        reply_markup=get_category_items_keyboard(
-            category_key,
-            INTRO_CATEGORIES,
-            selected,
-            "intro_item",
-            "intro_item_done",
-            "intro_back_cat",
-            page=page,
-            page_callback_prefix="intro_item_page",
-            done_text=done_text,
-        )
-    )
+@router.callback_query(F.data == "noop")
+async def noop_callback(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(Registration.property_type, F.data.startswith("prop_type_page:"))
-async def page_property_type(callback: CallbackQuery, state: FSMContext):
-    await _redraw_multiselect_page(
-        callback,
-        state,
-        page_key="prop_type_page",
-        selected_key="selected_property_types",
-        options=PROPERTY_TYPES,
-        prefix="prop_type",
-        done_callback="prop_type_done",
-        back_callback="prop_type_back",
-    )
-
-
-@router.callback_query(Registration.car_info, F.data.startswith("car_type_page:"))
-async def page_car_type(callback: CallbackQuery, state: FSMContext):
-    await _redraw_multiselect_page(
-        callback,
-        state,
-        page_key="car_type_page",
-        selected_key="selected_vehicle_types",
-        options=VEHICLE_TYPES,
-        prefix="car_type",
-        done_callback="car_type_done",
-        back_callback="car_type_back",
-    )
-
-
-@router.callback_query(Registration.equipment_types, F.data.startswith("equip_type_page:"))
-async def page_equipment_type(callback: CallbackQuery, state: FSMContext):
-    await _redraw_multiselect_page(
-        callback,
-        state,
-        page_key="equip_type_page",
-        selected_key="selected_equipment_types",
-        options=EQUIPMENT_TYPES,
-        prefix="equip_type",
-        done_callback="equip_type_done",
-        back_callback="equip_type_back",
-    )
-
 
-@router.callback_query(Registration.aircraft_type, F.data.startswith("air_type_page:"))
-async def page_aircraft_type(callback: CallbackQuery, state: FSMContext):
-    await _redraw_multiselect_page(
-        callback,
-        state,
-        page_key="air_type_page",
-        selected_key="selected_aircraft_types",
-        options=AIRCRAFT_TYPES,
-        prefix="air_type",
-        done_callback="air_type_done",
-        back_callback="air_type_back",
-    )
 
 
-@router.callback_query(Registration.vessel_type, F.data.startswith("vessel_type_page:"))
-async def page_vessel_type(callback: CallbackQuery, state: FSMContext):
-    await _redraw_multiselect_page(
-        callback,
-        state,
-        page_key="vessel_type_page",
-        selected_key="selected_vessel_types",
-        options=VESSEL_TYPES,
-        prefix="vessel_type",
-        done_callback="vessel_type_done",
-        back_callback="vessel_type_back",
-    )
 
 
 @router.message(Registration.waiting_for_invite_code, F.text)
@@ -956,7 +772,7 @@ async def process_initial_invite_code(message: Message, state: FSMContext):
 
 
 
-async def cmd_start(message: Message, state: FSMContext, db: Database):
+async def cmd_start(message: Message, state: FSMContext, profile: Optional[Dict]):
 
 
 
@@ -968,13 +784,7 @@ async def cmd_start(message: Message, state: FSMContext, db: Database):
 
 
 
-    user = await db.get_user(message.from_user.id)
-
-
-
-
-
-    if user:
+    if profile:
 
 
 
@@ -990,7 +800,7 @@ async def cmd_start(message: Message, state: FSMContext, db: Database):
 
 
 
-            f"👋 Welcome back, {user['name']}!\n\nChoose an option from the menu below:",
+            f"👋 Welcome back, {profile['name']}!\n\nChoose an option from the menu below:",
 
 
 
@@ -1280,62 +1090,6 @@ async def back_from_main_city(callback: CallbackQuery, state: FSMContext):
 
 
 
-@router.callback_query(Registration.main_city, F.data.startswith("main_city:"))
-
-
-
-async def select_main_city(callback: CallbackQuery, state: FSMContext):
-
-
-
-    city_hash = callback.data.split(":")[1]
-
-
-
-    city = find_item_by_hash(CITIES, city_hash)
-
-
-
-    if city:
-
-
-
-        data = await state.get_data()
-
-
-
-        selected = set(data.get("selected_main_cities", []))
-
-
-
-        if city in selected:
-
-
-
-            selected.remove(city)
-
-
-
-        else:
-
-
-
-            selected.add(city)
-
-
-
-        await state.update_data(selected_main_cities=list(selected))
-
-
-
-        await callback.message.edit_reply_markup(reply_markup=get_cities_select_keyboard("main_city", "main_city_done", selected, "main_city_back"))
-
-
-
-    await callback.answer()
-
-
-
 
 
 @router.callback_query(Registration.main_city, F.data == "main_city_done")
@@ -1579,59 +1333,8 @@ async def start_ra_section(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(Registration.resource_access_items, F.data.startswith("ra_item:"))
-async def toggle_ra_item(callback: CallbackQuery, state: FSMContext):
-    item_hash = callback.data.split(":")[1]
-    data = await state.get_data()
-    category_key = data.get("current_ra_category")
-    items_list = RESOURCE_ACCESS_CATEGORIES.get(category_key, {}).get("items", [])
-    target_item = find_item_by_hash(items_list, item_hash)
-    if target_item:
-        selected = set(data.get("selected_ra_items", []))
-        if target_item in selected:
-            selected.remove(target_item)
-        else:
-            selected.add(target_item)
-        await state.update_data(selected_ra_items=list(selected))
-        next_category_key = _get_next_ra_category(category_key)
-        await callback.message.edit_reply_markup(
-            reply_markup=get_category_items_keyboard(
-                category_key,
-                RESOURCE_ACCESS_CATEGORIES,
-                selected,
-                "ra_item",
-                "ra_item_done",
-                "ra_back_cat",
-                page=data.get("ra_item_page", 0),
-                page_callback_prefix="ra_item_page",
-                done_text="Next \u27a1\ufe0f" if next_category_key else "\U0001f197 Done"
-            )
-        )
-    await callback.answer()
 
 
-@router.callback_query(Registration.resource_access_items, F.data.startswith("ra_item_page:"))
-async def page_ra_items(callback: CallbackQuery, state: FSMContext):
-    page = int(callback.data.split(":")[1])
-    data = await state.get_data()
-    category_key = data.get("current_ra_category")
-    selected = set(data.get("selected_ra_items", []))
-    await state.update_data(ra_item_page=page)
-    next_category_key = _get_next_ra_category(category_key)
-    await callback.message.edit_reply_markup(
-        reply_markup=get_category_items_keyboard(
-            category_key,
-            RESOURCE_ACCESS_CATEGORIES,
-            selected,
-            "ra_item",
-            "ra_item_done",
-            "ra_back_cat",
-            page=page,
-            page_callback_prefix="ra_item_page",
-            done_text="Next \u27a1\ufe0f" if next_category_key else "\U0001f197 Done"
-        )
-    )
-    await callback.answer()
 
 
 @router.callback_query(Registration.resource_access_items, F.data == "ra_back_cat")
@@ -1788,61 +1491,6 @@ async def back_to_skill_categories(callback: CallbackQuery, state: FSMContext):
 
 
 
-@router.callback_query(Registration.skill_items, F.data.startswith("q_item:"))
-
-async def process_skill_item_toggle(callback: CallbackQuery, state: FSMContext):
-
-    item_hash = callback.data.split(":")[1]
-
-    data = await state.get_data()
-
-    category_key = data.get("current_skill_category")
-
-
-
-    # Search in current category items
-
-    items_list = SKILL_CATEGORIES.get(category_key, {}).get("items", [])
-
-    target_item = find_item_by_hash(items_list, item_hash)
-
-
-
-    if target_item:
-
-        selected_items = set(data.get("selected_skill_items", []))
-
-        if target_item in selected_items:
-
-            selected_items.remove(target_item)
-
-        else:
-
-            selected_items.add(target_item)
-
-        await state.update_data(selected_skill_items=list(selected_items))
-
-        next_category_key = _get_next_skill_category(category_key)
-
-        await callback.message.edit_reply_markup(
-
-            reply_markup=get_category_items_keyboard(
-
-                category_key,
-                SKILL_CATEGORIES,
-                selected_items,
-                "q_item",
-                "q_item_done",
-                "skill_back_cat",
-                page=data.get("q_item_page", 0),
-                page_callback_prefix="q_item_page",
-                done_text="Next ➡️" if next_category_key else "🆗 Done"
-
-            )
-
-        )
-
-    await callback.answer()
 
 
 
@@ -2044,53 +1692,6 @@ async def process_intro_category(callback: CallbackQuery, state: FSMContext):
 
 
 
-@router.callback_query(Registration.intro_items, F.data.startswith("intro_item:"))
-
-async def toggle_intro_item(callback: CallbackQuery, state: FSMContext):
-
-    item_hash = callback.data.split(":")[1]
-
-    data = await state.get_data()
-
-    category_key = data.get("current_intro_category")
-
-    items_list = INTRO_CATEGORIES.get(category_key, {}).get("items", [])
-
-    target_item = find_item_by_hash(items_list, item_hash)
-
-    if target_item:
-
-        selected = set(data.get("selected_intro_items", []))
-
-        if target_item in selected:
-
-            selected.remove(target_item)
-
-        else:
-
-            selected.add(target_item)
-
-        await state.update_data(selected_intro_items=list(selected))
-
-        next_category_key = _get_next_intro_category(category_key)
-
-        await callback.message.edit_reply_markup(
-
-            reply_markup=get_category_items_keyboard(
-                category_key,
-                INTRO_CATEGORIES,
-                selected,
-                "intro_item",
-                "intro_item_done",
-                "intro_back_cat",
-                page=data.get("intro_item_page", 0),
-                page_callback_prefix="intro_item_page",
-                done_text="Next ➡️" if next_category_key else "🆗 Done"
-            )
-
-        )
-
-    await callback.answer()
 
 
 
@@ -2179,33 +1780,6 @@ async def back_from_intro_city(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(Registration.intro_location, F.data.startswith("intro_city:"))
-
-async def select_intro_city(callback: CallbackQuery, state: FSMContext):
-
-    city_hash = callback.data.split(":")[1]
-
-    city = find_item_by_hash(CITIES, city_hash)
-
-    if city:
-
-        data = await state.get_data()
-
-        selected = set(data.get("selected_intro_cities", []))
-
-        if city in selected:
-
-            selected.remove(city)
-
-        else:
-
-            selected.add(city)
-
-        await state.update_data(selected_intro_cities=list(selected))
-
-        await callback.message.edit_reply_markup(reply_markup=get_cities_select_keyboard("intro_city", "intro_city_done", selected, "intro_city_back"))
-
-    await callback.answer()
 
 
 @router.callback_query(Registration.real_estate_section, F.data == "re_sec_back")
@@ -2476,62 +2050,6 @@ async def back_from_prop_city(callback: CallbackQuery, state: FSMContext):
 
 
 
-@router.callback_query(Registration.property_location, F.data.startswith("prop_city:"))
-
-
-
-async def select_property_city(callback: CallbackQuery, state: FSMContext):
-
-
-
-    city_hash = callback.data.split(":")[1]
-
-
-
-    city = find_item_by_hash(CITIES, city_hash)
-
-
-
-    if city:
-
-
-
-        data = await state.get_data()
-
-
-
-        selected = set(data.get("selected_prop_cities", []))
-
-
-
-        if city in selected:
-
-
-
-            selected.remove(city)
-
-
-
-        else:
-
-
-
-            selected.add(city)
-
-
-
-        await state.update_data(selected_prop_cities=list(selected))
-
-
-
-        await callback.message.edit_reply_markup(reply_markup=get_cities_select_keyboard("prop_city", "prop_city_done", selected, "prop_city_back"))
-
-
-
-    await callback.answer()
-
-
-
 
 
 @router.callback_query(Registration.property_location, F.data == "prop_city_done")
@@ -2632,62 +2150,6 @@ async def back_from_prop_type(callback: CallbackQuery, state: FSMContext):
 
 
 
-@router.callback_query(Registration.property_type, F.data.startswith("prop_type:"))
-
-
-
-async def toggle_property_type(callback: CallbackQuery, state: FSMContext):
-
-
-
-    item_hash = callback.data.split(":")[1]
-
-
-
-    data = await state.get_data()
-
-
-
-    selected = set(data.get("selected_property_types", []))
-
-
-
-    target_item = find_item_by_hash(PROPERTY_TYPES, item_hash)
-
-
-
-    if target_item:
-
-
-
-        if target_item in selected:
-
-
-
-            selected.remove(target_item)
-
-
-
-        else:
-
-
-
-            selected.add(target_item)
-
-
-
-        await state.update_data(selected_property_types=list(selected))
-
-
-
-        await callback.message.edit_reply_markup(reply_markup=get_multiselect_keyboard(PROPERTY_TYPES, selected, "prop_type", "prop_type_done", "prop_type_back", page=data.get("prop_type_page", 0), page_callback_prefix="prop_type_page"))
-
-
-
-    await callback.answer()
-
-
-
 
 
 @router.callback_query(Registration.property_type, F.data == "prop_type_done")
@@ -2970,62 +2432,6 @@ async def back_from_car_city(callback: CallbackQuery, state: FSMContext):
 
 
 
-@router.callback_query(Registration.car_location, F.data.startswith("car_city:"))
-
-
-
-async def select_car_city(callback: CallbackQuery, state: FSMContext):
-
-
-
-    city_hash = callback.data.split(":")[1]
-
-
-
-    city = find_item_by_hash(CITIES, city_hash)
-
-
-
-    if city:
-
-
-
-        data = await state.get_data()
-
-
-
-        selected = set(data.get("selected_car_cities", []))
-
-
-
-        if city in selected:
-
-
-
-            selected.remove(city)
-
-
-
-        else:
-
-
-
-            selected.add(city)
-
-
-
-        await state.update_data(selected_car_cities=list(selected))
-
-
-
-        await callback.message.edit_reply_markup(reply_markup=get_cities_select_keyboard("car_city", "car_city_done", selected, "car_city_back"))
-
-
-
-    await callback.answer()
-
-
-
 
 
 @router.callback_query(Registration.car_location, F.data == "car_city_done")
@@ -3126,62 +2532,6 @@ async def back_from_car_type(callback: CallbackQuery, state: FSMContext):
 
 
 
-@router.callback_query(Registration.car_info, F.data.startswith("car_type:"))
-
-
-
-async def toggle_vehicle_type(callback: CallbackQuery, state: FSMContext):
-
-
-
-    item_hash = callback.data.split(":")[1]
-
-
-
-    data = await state.get_data()
-
-
-
-    selected = set(data.get("selected_vehicle_types", []))
-
-
-
-    target_item = find_item_by_hash(VEHICLE_TYPES, item_hash)
-
-
-
-    if target_item:
-
-
-
-        if target_item in selected:
-
-
-
-            selected.remove(target_item)
-
-
-
-        else:
-
-
-
-            selected.add(target_item)
-
-
-
-        await state.update_data(selected_vehicle_types=list(selected))
-
-
-
-        await callback.message.edit_reply_markup(reply_markup=get_multiselect_keyboard(VEHICLE_TYPES, selected, "car_type", "car_type_done", "car_type_back", page=data.get("car_type_page", 0), page_callback_prefix="car_type_page"))
-
-
-
-    await callback.answer()
-
-
-
 
 
 @router.callback_query(Registration.car_info, F.data == "car_type_done")
@@ -3390,115 +2740,57 @@ async def start_equipment_section(callback: CallbackQuery, state: FSMContext):
 
 
 
-        reply_markup=get_cities_select_keyboard("equip_city", "equip_city_done", selected, "equip_city_back")
-
-
-
-    )
-
-
-
-    await state.set_state(Registration.equipment_location)
-
-
-
-    await callback.answer()
-
-
-
-
-
-@router.callback_query(Registration.equipment_location, F.data == "equip_city_back")
-
-
-
-async def back_from_equip_location(callback: CallbackQuery, state: FSMContext):
-
-
-
-    equipment_text = (
-
-
-
-        "6|11 🎧 Equipment\n\n"
-
-
-
-        "Please provide information about the equipment you are willing to make available to community residents.\n\n"
-
-
-
-        "By providing clear details about the resources you're open to sharing, you help the community grow stronger."
-
-
-
-    )
-
-
-
-    await callback.message.edit_text(equipment_text, reply_markup=get_section_intro_keyboard("equipment_start", "equipment_skip", "equip_sec_back"))
-
-
-
-    await state.set_state(Registration.equipment_section)
-
-
-
-    await callback.answer()
-
-
-
+        reply_markup=get_cities_select_keyboard("equip_city", "equip_city_done", selected, "equip_city_back")
 
 
-@router.callback_query(Registration.equipment_location, F.data.startswith("equip_city:"))
 
+    )
 
 
-async def select_equipment_city(callback: CallbackQuery, state: FSMContext):
 
+    await state.set_state(Registration.equipment_location)
 
 
-    city_hash = callback.data.split(":")[1]
 
+    await callback.answer()
 
 
-    city = find_item_by_hash(CITIES, city_hash)
 
 
 
-    if city:
+@router.callback_query(Registration.equipment_location, F.data == "equip_city_back")
 
 
 
-        data = await state.get_data()
+async def back_from_equip_location(callback: CallbackQuery, state: FSMContext):
 
 
 
-        selected = set(data.get("selected_equip_cities", []))
+    equipment_text = (
 
 
 
-        if city in selected:
+        "6|11 🎧 Equipment\n\n"
 
 
 
-            selected.remove(city)
+        "Please provide information about the equipment you are willing to make available to community residents.\n\n"
 
 
 
-        else:
+        "By providing clear details about the resources you're open to sharing, you help the community grow stronger."
 
 
 
-            selected.add(city)
+    )
 
 
 
-        await state.update_data(selected_equip_cities=list(selected))
+    await callback.message.edit_text(equipment_text, reply_markup=get_section_intro_keyboard("equipment_start", "equipment_skip", "equip_sec_back"))
 
 
 
-        await callback.message.edit_reply_markup(reply_markup=get_cities_select_keyboard("equip_city", "equip_city_done", selected, "equip_city_back"))
+    await state.set_state(Registration.equipment_section)
 
 
 
@@ -3508,6 +2800,8 @@ async def select_equipment_city(callback: CallbackQuery, state: FSMContext):
 
 
 
+
+
 @router.callback_query(Registration.equipment_location, F.data == "equip_city_done")
 
 
@@ -3606,62 +2900,6 @@ async def back_from_equip_types(callback: CallbackQuery, state: FSMContext):
 
 
 
-@router.callback_query(Registration.equipment_types, F.data.startswith("equip_type:"))
-
-
-
-async def toggle_equipment_type(callback: CallbackQuery, state: FSMContext):
-
-
-
-    item_hash = callback.data.split(":")[1]
-
-
-
-    data = await state.get_data()
-
-
-
-    selected = set(data.get("selected_equipment_types", []))
-
-
-
-    target_item = find_item_by_hash(EQUIPMENT_TYPES, item_hash)
-
-
-
-    if target_item:
-
-
-
-        if target_item in selected:
-
-
-
-            selected.remove(target_item)
-
-
-
-        else:
-
-
-
-            selected.add(target_item)
-
-
-
-        await state.update_data(selected_equipment_types=list(selected))
-
-
-
-        await callback.message.edit_reply_markup(reply_markup=get_multiselect_keyboard(EQUIPMENT_TYPES, selected, "equip_type", "equip_type_done", "equip_type_back", page=data.get("equip_type_page", 0), page_callback_prefix="equip_type_page"))
-
-
-
-    await callback.answer()
-
-
-
 
 
 @router.callback_query(Registration.equipment_types, F.data == "equip_type_done")
@@ -3900,62 +3138,6 @@ async def back_from_air_city(callback: CallbackQuery, state: FSMContext):
 
 
 
-@router.callback_query(Registration.aircraft_location, F.data.startswith("air_city:"))
-
-
-
-async def select_aircraft_city(callback: CallbackQuery, state: FSMContext):
-
-
-
-    city_hash = callback.data.split(":")[1]
-
-
-
-    city = find_item_by_hash(CITIES, city_hash)
-
-
-
-    if city:
-
-
-
-        data = await state.get_data()
-
-
-
-        selected = set(data.get("selected_air_cities", []))
-
-
-
-        if city in selected:
-
-
-
-            selected.remove(city)
-
-
-
-        else:
-
-
-
-            selected.add(city)
-
-
-
-        await state.update_data(selected_air_cities=list(selected))
-
-
-
-        await callback.message.edit_reply_markup(reply_markup=get_cities_select_keyboard("air_city", "air_city_done", selected, "air_city_back"))
-
-
-
-    await callback.answer()
-
-
-
 
 
 @router.callback_query(Registration.aircraft_location, F.data == "air_city_done")
@@ -4048,62 +3230,6 @@ async def back_from_air_type(callback: CallbackQuery, state: FSMContext):
 
 
 
-@router.callback_query(Registration.aircraft_type, F.data.startswith("air_type:"))
-
-
-
-async def toggle_aircraft_type(callback: CallbackQuery, state: FSMContext):
-
-
-
-    item_hash = callback.data.split(":")[1]
-
-
-
-    data = await state.get_data()
-
-
-
-    selected = set(data.get("selected_aircraft_types", []))
-
-
-
-    target_item = find_item_by_hash(AIRCRAFT_TYPES, item_hash)
-
-
-
-    if target_item:
-
-
-
-        if target_item in selected:
-
-
-
-            selected.remove(target_item)
-
-
-
-        else:
-
-
-
-            selected.add(target_item)
-
-
-
-        await state.update_data(selected_aircraft_types=list(selected))
-
-
-
-        await callback.message.edit_reply_markup(reply_markup=get_multiselect_keyboard(AIRCRAFT_TYPES, selected, "air_type", "air_type_done", "air_type_back", page=data.get("air_type_page", 0), page_callback_prefix="air_type_page"))
-
-
-
-    await callback.answer()
-
-
-
 
 
 @router.callback_query(Registration.aircraft_type, F.data == "air_type_done")
@@ -4346,62 +3472,6 @@ async def back_from_vessel_location(callback: CallbackQuery, state: FSMContext):
 
 
 
-@router.callback_query(Registration.vessel_location, F.data.startswith("vessel_city:"))
-
-
-
-async def select_vessel_city(callback: CallbackQuery, state: FSMContext):
-
-
-
-    city_hash = callback.data.split(":")[1]
-
-
-
-    city = find_item_by_hash(VESSEL_LOCATIONS, city_hash)
-
-
-
-    if city:
-
-
-
-        data = await state.get_data()
-
-
-
-        selected = set(data.get("selected_vessel_cities", []))
-
-
-
-        if city in selected:
-
-
-
-            selected.remove(city)
-
-
-
-        else:
-
-
-
-            selected.add(city)
-
-
-
-        await state.update_data(selected_vessel_cities=list(selected))
-
-
-
-        await callback.message.edit_reply_markup(reply_markup=get_vessel_locations_keyboard("vessel_city", "vessel_city_done", selected, "vessel_city_back"))
-
-
-
-    await callback.answer()
-
-
-
 
 
 @router.callback_query(Registration.vessel_location, F.data == "vessel_city_done")
@@ -4494,62 +3564,6 @@ async def back_from_vessel_type(callback: CallbackQuery, state: FSMContext):
 
 
 
-@router.callback_query(Registration.vessel_type, F.data.startswith("vessel_type:"))
-
-
-
-async def toggle_vessel_type(callback: CallbackQuery, state: FSMContext):
-
-
-
-    item_hash = callback.data.split(":")[1]
-
-
-
-    data = await state.get_data()
-
-
-
-    selected = set(data.get("selected_vessel_types", []))
-
-
-
-    target_item = find_item_by_hash(VESSEL_TYPES, item_hash)
-
-
-
-    if target_item:
-
-
-
-        if target_item in selected:
-
-
-
-            selected.remove(target_item)
-
-
-
-        else:
-
-
-
-            selected.add(target_item)
-
-
-
-        await state.update_data(selected_vessel_types=list(selected))
-
-
-
-        await callback.message.edit_reply_markup(reply_markup=get_multiselect_keyboard(VESSEL_TYPES, selected, "vessel_type", "vessel_type_done", "vessel_type_back", page=data.get("vessel_type_page", 0), page_callback_prefix="vessel_type_page"))
-
-
-
-    await callback.answer()
-
-
-
 
 
 @router.callback_query(Registration.vessel_type, F.data == "vessel_type_done")
@@ -4809,7 +3823,8 @@ async def page_specialist_items(callback: CallbackQuery, state: FSMContext):
 
     await state.update_data(spec_item_page=page)
     next_cat = _get_next_spec_category(category_key)
-    await callback.message.edit_reply_markup(
+    await edit_markup(
+        callback.message,
         reply_markup=get_category_single_select_keyboard(
             category_key, SPECIALIST_CATEGORIES, "spec_item", "spec_back_cat",
             page=page, page_callback_prefix="spec_item_page",
@@ -5394,7 +4409,8 @@ async def select_art_city(callback: CallbackQuery, state: FSMContext):
 
 
 
-        await callback.message.edit_reply_markup(
+        await edit_markup(
+            callback.message,
 
 
 
@@ -5830,59 +4846,57 @@ async def finish_registration(message: Message, user: User, state: FSMContext, d
 
 
 
-    # Save user to DB
-
+    # Save user and answers to DB in one transaction
 
 
-    success = await db.add_user(
 
+    async with db.unit_of_work() as unit:
 
 
-        user_id=user_id,
 
+        if await db.add_user(
 
 
-        username=username,
 
+            user_id=user_id,
 
 
-        name=name,
 
+            username=username,
 
 
-        main_city=main_city,
 
+            name=name,
 
 
-        current_city=current_city,
 
+            main_city=main_city,
 
 
-        about=about,
 
+            current_city=current_city,
 
 
-        instagram=instagram
 
+            about=about,
 
 
-    )
-
 
+            instagram=instagram
 
 
 
-    if success:
+        ):
 
 
 
-        # Save answers
+            await db.add_user_answer(user_id, "registration_data", json.dumps(data, default=str))
 
 
 
-        await db.add_user_answer(user_id, "registration_data", json.dumps(data, default=str))
 
 
+    if unit.committed:
 
 
 
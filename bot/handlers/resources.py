@@ -1,3 +1,5 @@
+import math
+from typing import Dict, Optional
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
@@ -6,157 +8,57 @@ from bot.keyboards import (
     get_resource_categories_keyboard,
     get_resource_subcategories_keyboard,
     get_back_keyboard,
-    get_resource_card_keyboard
+    get_resource_page_keyboard
 )
 from bot.form_data import SKILL_CATEGORIES, INTRO_CATEGORIES, SPECIALIST_CATEGORIES, RESOURCE_ACCESS_CATEGORIES
-import json
 
 router = Router()
 
-# Mapping from category to questionnaire data keys
-CATEGORY_DATA_MAPPING = {
-    "Businesses, Spaces & Platforms": {
-        "items_key": "selected_ra_items",
-        "cities_key": None,
-        "extra_keys": []
-    },
-    "Skills and Knowledge": {
-        "items_key": "selected_skill_items",
-        "cities_key": None,
-        "extra_keys": []
-    },
-    "Personal Introductions to Key People": {
-        "items_key": "selected_intro_items",
-        "cities_key": "selected_intro_cities",
-        "extra_keys": []
-    },
-    "Real Estate": {
-        "items_key": "selected_property_types",
-        "cities_key": "selected_prop_cities",
-        "extra_keys": []
-    },
-    "Cars and Other Vehicles": {
-        "items_key": "car_info",  # Single value
-        "cities_key": "selected_car_cities",
-        "extra_keys": []
-    },
-    "Equipment": {
-        "items_key": "selected_equipment_types",
-        "cities_key": "selected_equip_cities",
-        "extra_keys": []
-    },
-    "Air Transport": {
-        "items_key": "selected_aircraft_types",
-        "cities_key": "selected_air_cities",
-        "extra_keys": []
-    },
-    "Water Transport / Vessels": {
-        "items_key": "selected_vessel_types",
-        "cities_key": "selected_vessel_cities",
-        "extra_keys": []
-    },
-    "Specialists": {
-        "items_key": "specialists_list",
-        "cities_key": None,
-        "extra_keys": []
-    },
-    "Artworks": {
-        "items_key": "art_form",
-        "cities_key": "art_location",
-        "extra_keys": ["art_author_name", "art_link"]
-    }
+RESOURCES_PER_PAGE = 5
+
+# Category Descriptions
+CATEGORY_DESCRIPTIONS = {
+    "Businesses, Spaces & Platforms": "\U0001f3e2 Businesses, Spaces & Platforms\n\nBusinesses, spaces, and platforms shared by members.",
+    "Real Estate": "🗽 Real Estate\n\nProperties available for exchange or temporary use.",
+    "Cars and Other Vehicles": "🖤 Cars\n\nVehicles available for sharing within the community.",
+    "Air Transport": "🛩️ Aircrafts\n\nPrivate jets, helicopters, and aircraft available.",
+    "Water Transport / Vessels": "💎 Boats\n\nYachts, boats, and watercraft available.",
+    "Equipment": "🎧 Equipment\n\nTools and equipment available for sharing.",
+    "Skills and Knowledge": "🧑🏼‍💻 Skills and Knowledge\n\nExpertise and educational resources offered by members.",
+    "Unique opportunities": "🫆 Unique Opportunities\n\nSpecial opportunities and unique experiences.",
+    "Artworks": "🫧 Art & Creative Works\n\nArtwork and creative works available.",
+    "Personal Introductions to Key People": "🤝🏻 Personal Introduction\n\nConnections to professional or social circles.",
+    "Specialists": "🫆 Specialists\n\nTrusted professionals recommended by members."
 }
 
+# Subcategory list views: callback prefix -> (category, subcategories, title, back callback)
+SUBCATEGORY_VIEWS = {
+    "res_skill_sub": ("Skills and Knowledge", SKILL_CATEGORIES, "🧑🏼‍💻 Skills and Knowledge", "back_to_skill_subs"),
+    "res_intro_sub": ("Personal Introductions to Key People", INTRO_CATEGORIES, "🤝🏻 Personal Introduction", "back_to_intro_subs"),
+    "res_spec_sub": ("Specialists", SPECIALIST_CATEGORIES, "🫆 Specialists", "back_to_spec_subs"),
+    "res_ra_sub": ("Businesses, Spaces & Platforms", RESOURCE_ACCESS_CATEGORIES, "🏢 Businesses, Spaces & Platforms", "back_to_ra_subs"),
+}
 
-def extract_resources_from_registration(reg_data: dict, category: str, user_info: dict, subcategory_key: str = None) -> list:
-    """Extract resources for a specific category from registration data.
-    If subcategory_key is provided, filter specialists by their category key."""
-    resources = []
-    mapping = CATEGORY_DATA_MAPPING.get(category)
-    
-    if not mapping:
-        return resources
-    
-    items_key = mapping["items_key"]
-    cities_key = mapping["cities_key"]
-    extra_keys = mapping["extra_keys"]
-    
-    # Get items
-    items = reg_data.get(items_key, [])
-    if not items:
-        return resources
-    
-    # Handle single value vs list
-    if isinstance(items, str):
-        items = [items]
-    
-    # Format Specialist dictionaries if we are in the Specialists category
-    if category == "Specialists":
-        formatted_items = []
-        for spec in items:
-            if isinstance(spec, dict):
-                # Filter by subcategory key if provided
-                if subcategory_key and spec.get("category") != subcategory_key:
-                    continue
-                spec_name = spec.get("name", "Unknown")
-                spec_cat = spec.get("category", "")
-                spec_contact = spec.get("contact", "")
-                spec_ref = spec.get("referral", "")
-                spec_conn = spec.get("connection", "")
-                
-                info = f"{spec_name}"
-                if spec_contact: info += f" — {spec_contact}"
-                formatted_items.append(info)
-            else:
-                formatted_items.append(str(spec))
-        items = formatted_items
-        if not items:
-            return resources
-    
-    # Get cities
-    cities = []
-    if cities_key:
-        cities = reg_data.get(cities_key, [])
-        if isinstance(cities, str):
-            cities = [cities]
-    
-    # Get extra info
-    extra_info = []
-    for key in extra_keys:
-        value = reg_data.get(key)
-        if value:
-            # specifically check for art link to format it nicely
-            if key == "art_link":
-                extra_info.append(f"🔗 Link: {value}")
-            elif key == "art_author_name":
-                extra_info.append(f"🐥 Author: {value}")
-            elif isinstance(value, list):
-                extra_info.extend(value)
-            else:
-                extra_info.append(str(value))
-    
-    # Build resource entry
-    resource = {
-        "user_id": user_info["user_id"],
-        "name": user_info["name"],
-        "username": user_info.get("username"),
-        "instagram": user_info.get("instagram"),
-        "points": user_info.get("points", 0),
-        "items": items,
-        "cities": cities if cities else [user_info.get("main_city", "")],
-        "extra": extra_info
-    }
-    
-    resources.append(resource)
-    return resources
+
+def _resolve_resource_view(origin: str):
+    """Map the callback that opened a list (e.g. "res_cat:Real Estate", "res_skill_sub:A")
+    to (category, description, back_callback, subcategory), or None if unknown"""
+    prefix, _, key = origin.partition(":")
+    if prefix == "res_cat":
+        return key, CATEGORY_DESCRIPTIONS.get(key, f"📦 {key}"), "back_to_resources", None
+    if prefix not in SUBCATEGORY_VIEWS:
+        return None
+    category, subcategories, title, back_callback = SUBCATEGORY_VIEWS[prefix]
+    cat_data = subcategories.get(key)
+    if not cat_data:
+        return None
+    return category, f"{title} — {cat_data['name']}", back_callback, key
 
 
 @router.message(F.text == "🪩Resources")
-async def show_resources_menu(message: Message, db: Database):
+async def show_resources_menu(message: Message, profile: Optional[Dict]):
     """Show resources section - List Categories"""
-    user = await db.get_user(message.from_user.id)
-
-    if not user:
+    if not profile:
         await message.answer("❌ You are not registered. Please use /start to register.")
         return
 
@@ -172,24 +74,9 @@ async def show_resources_in_category(callback: CallbackQuery, db: Database):
     """Show resources in selected category"""
     category = callback.data.split(":", 1)[1]
 
-    # Category Descriptions
-    category_descriptions = {
-        "Businesses, Spaces & Platforms": "\U0001f3e2 Businesses, Spaces & Platforms\n\nBusinesses, spaces, and platforms shared by members.",
-        "Real Estate": "🗽 Real Estate\n\nProperties available for exchange or temporary use.",
-        "Cars and Other Vehicles": "🖤 Cars\n\nVehicles available for sharing within the community.",
-        "Air Transport": "🛩️ Aircrafts\n\nPrivate jets, helicopters, and aircraft available.",
-        "Water Transport / Vessels": "💎 Boats\n\nYachts, boats, and watercraft available.",
-        "Equipment": "🎧 Equipment\n\nTools and equipment available for sharing.",
-        "Skills and Knowledge": "🧑🏼‍💻 Skills and Knowledge\n\nExpertise and educational resources offered by members.",
-        "Unique opportunities": "🫆 Unique Opportunities\n\nSpecial opportunities and unique experiences.",
-        "Artworks": "🫧 Art & Creative Works\n\nArtwork and creative works available.",
-        "Personal Introductions to Key People": "🤝🏻 Personal Introduction\n\nConnections to professional or social circles.",
-        "Specialists": "🫆 Specialists\n\nTrusted professionals recommended by members."
-    }
-
     # For Skills, Introductions, Specialists — show subcategories first
     if category == "Skills and Knowledge":
-        desc = category_descriptions[category]
+        desc = CATEGORY_DESCRIPTIONS[category]
         await callback.message.edit_text(
             f"{desc}\n\nSelect a category:",
             reply_markup=get_resource_subcategories_keyboard(SKILL_CATEGORIES, "res_skill_sub", "back_to_resources")
@@ -198,7 +85,7 @@ async def show_resources_in_category(callback: CallbackQuery, db: Database):
         return
 
     if category == "Personal Introductions to Key People":
-        desc = category_descriptions[category]
+        desc = CATEGORY_DESCRIPTIONS[category]
         await callback.message.edit_text(
             f"{desc}\n\nSelect a category:",
             reply_markup=get_resource_subcategories_keyboard(INTRO_CATEGORIES, "res_intro_sub", "back_to_resources")
@@ -207,7 +94,7 @@ async def show_resources_in_category(callback: CallbackQuery, db: Database):
         return
 
     if category == "Specialists":
-        desc = category_descriptions[category]
+        desc = CATEGORY_DESCRIPTIONS[category]
         await callback.message.edit_text(
             f"{desc}\n\nSelect a category:",
             reply_markup=get_resource_subcategories_keyboard(SPECIALIST_CATEGORIES, "res_spec_sub", "back_to_resources")
@@ -216,7 +103,7 @@ async def show_resources_in_category(callback: CallbackQuery, db: Database):
         return
 
     if category == "Businesses, Spaces & Platforms":
-        desc = category_descriptions[category]
+        desc = CATEGORY_DESCRIPTIONS[category]
         await callback.message.edit_text(
             f"{desc}\n\nSelect a category:",
             reply_markup=get_resource_subcategories_keyboard(RESOURCE_ACCESS_CATEGORIES, "res_ra_sub", "back_to_resources")
@@ -224,156 +111,126 @@ async def show_resources_in_category(callback: CallbackQuery, db: Database):
         await callback.answer()
         return
 
-    description = category_descriptions.get(category, f"📦 {category}")
+    await _show_resources_list(callback, db, callback.data)
 
-    await _show_resources_list(callback, db, category, description, "back_to_resources")
 
+def _format_questionnaire_card(number: int, res: dict, category: str) -> str:
+    cities_str = ", ".join(res['cities']) if res['cities'] else "Not specified"
 
-async def _show_resources_list(callback: CallbackQuery, db: Database, category: str, description: str, back_callback: str, subcategory_items: set = None, subcategory_key: str = None):
-    """Show resources list, optionally filtered by subcategory items or key"""
-    await callback.message.edit_text(f"{description}\n\nLoading resources...")
+    # Format items as a bulleted list or comma-separated depending on length, show all
+    if category == "Specialists":
+        items_str = "\n".join(res['items'])
+    else:
+        items_str = ", ".join(str(i) for i in res['items'])
+
+    extra_str = ""
+    if res['extra']:
+        # Format each extra stat on a new line
+        extra_str = "\n".join(res['extra']) + "\n"
+
+    return (
+        f"━━━━━━━━━━━━━━━\n"
+        f"{number}. 🐥 {res['name']}\n"
+        f"🪩 {cities_str}\n"
+        f"✉️ {items_str}\n"
+        f"{extra_str}"
+        f"🩵 Points: {res['points']}"
+    )
 
-    # Get resources from Lots (manually added)
+
+def _format_lot_card(number: int, res: dict) -> str:
+    location = f"📍 {res['location_text']}\n" if res['location_text'] else ""
+    avail = f"📅 {res['availability']}\n" if res['availability'] else ""
+
+    return (
+        f"━━━━━━━━━━━━━━━\n"
+        f"{number}. 📌 {res['title']}\n"
+        f"{location}"
+        f"📝 {res['description']}\n"
+        f"{avail}"
+        f"🐥 {res['name']}"
+    )
+
+
+async def _show_resources_list(callback: CallbackQuery, db: Database, origin: str, page: int = 0):
+    """Show one page of a resources list by editing the current message.
+
+    origin is the callback data that opened the list; it is echoed in the Prev/Next
+    buttons ("res_pg:<origin>:<page>") so the page can be rebuilt from the callback alone.
+    """
+    view = _resolve_resource_view(origin)
+    if not view:
+        await callback.answer("Category not found")
+        return
+    category, description, back_callback, subcategory = view
+
+    # Questionnaire resources (pre-extracted into resource_items) first, then Lots
+    questionnaire_resources = await db.get_resource_items(category, subcategory)
     lots_resources = await db.get_lots_by_category(category)
-    
-    # Get resources from registration questionnaires
-    all_reg_data = await db.get_all_registration_data()
-    questionnaire_resources = []
-    
-    for user_data in all_reg_data:
-        try:
-            reg_data = json.loads(user_data["answer_data"])
-            user_info = {
-                "user_id": user_data["user_id"],
-                "name": user_data["name"],
-                "username": user_data["username"],
-                "instagram": user_data["instagram"],
-                "points": user_data["points"],
-                "main_city": user_data["main_city"]
-            }
-            # For specialists, pass subcategory_key to filter at extraction level
-            if category == "Specialists" and subcategory_key:
-                extracted = extract_resources_from_registration(reg_data, category, user_info, subcategory_key=subcategory_key)
-                questionnaire_resources.extend(extracted)
-            else:
-                extracted = extract_resources_from_registration(reg_data, category, user_info)
-                # Filter by subcategory items for Skills/Introductions
-                if subcategory_items is not None and extracted:
-                    for res in extracted:
-                        filtered = [i for i in res['items'] if i in subcategory_items]
-                        if filtered:
-                            res['items'] = filtered
-                            questionnaire_resources.append(res)
-                else:
-                    questionnaire_resources.extend(extracted)
-        except (json.JSONDecodeError, KeyError):
-            continue
-
-    # Build response text
-    resources_text = f"{description}\n\n"
-    has_resources = False
-
-    # Show questionnaire resources
-    if questionnaire_resources:
-        has_resources = True
-        for res in questionnaire_resources:
-            cities_str = ", ".join(res['cities']) if res['cities'] else "Not specified"
-            
-            # Format items as a bulleted list or comma-separated depending on length, show all
-            if category == "Specialists":
-                items_str = "\n".join(res['items'])
-            else:
-                items_str = ", ".join(str(i) for i in res['items'])
-            
-            extra_str = ""
-            if res['extra']:
-                # Format each extra stat on a new line
-                extra_str = "\n".join(res['extra']) + "\n"
-            
-            card_text = (
-                f"━━━━━━━━━━━━━━━\n"
-                f"🐥 {res['name']}\n"
-                f"🪩 {cities_str}\n"
-                f"✉️ {items_str}\n"
-                f"{extra_str}"
-                f"🩵 Points: {res['points']}"
-            )
-
-            await callback.message.answer(
-                card_text,
-                reply_markup=get_resource_card_keyboard(res['user_id'], res.get('instagram', ''))
-            )
-
-    # Show lots resources
-    if lots_resources:
-        has_resources = True
-        
-        for res in lots_resources:
-            location = f"📍 {res['location_text']}\n" if res['location_text'] else ""
-            avail = f"📅 {res['availability']}\n" if res['availability'] else ""
-
-            card_text = (
-                f"━━━━━━━━━━━━━━━\n"
-                f"📌 {res['title']}\n"
-                f"{location}"
-                f"📝 {res['description']}\n"
-                f"{avail}"
-                f"🐥 {res['name']}"
-            )
-
-            await callback.message.answer(
-                card_text,
-                reply_markup=get_resource_card_keyboard(res['user_id'], res.get('instagram', ''))
-            )
-
-    if not has_resources:
-        resources_text += "No resources found in this category yet."
-        await callback.message.edit_text(resources_text, reply_markup=get_back_keyboard(back_callback))
-    else:
-        # Header was already shown via edit_text, just add back button at the end
-        await callback.message.answer("End of list", reply_markup=get_back_keyboard(back_callback))
+    cards = (
+        [("questionnaire", res) for res in questionnaire_resources]
+        + [("lot", res) for res in lots_resources]
+    )
 
+    if not cards:
+        await callback.message.edit_text(
+            f"{description}\n\nNo resources found in this category yet.",
+            reply_markup=get_back_keyboard(back_callback)
+        )
+        await callback.answer()
+        return
+
+    total_pages = math.ceil(len(cards) / RESOURCES_PER_PAGE)
+    page = max(0, min(page, total_pages - 1))
+    start = page * RESOURCES_PER_PAGE
+
+    card_texts = []
+    card_owners = []
+    for number, (kind, res) in enumerate(cards[start:start + RESOURCES_PER_PAGE], start=start + 1):
+        if kind == "questionnaire":
+            card_texts.append(_format_questionnaire_card(number, res, category))
+        else:
+            card_texts.append(_format_lot_card(number, res))
+        card_owners.append((number, res['user_id'], res.get('instagram') or ""))
+
+    text = f"{description}\n\n" + "\n\n".join(card_texts)
+    if len(text) > 4096:
+        text = text[:4090] + "..."
+
+    await callback.message.edit_text(
+        text,
+        reply_markup=get_resource_page_keyboard(
+            card_owners, page, total_pages, f"res_pg:{origin}", back_callback
+        )
+    )
     await callback.answer()
 
 
+@router.callback_query(F.data.startswith("res_pg:"))
+async def page_resources_list(callback: CallbackQuery, db: Database):
+    """Switch a resources list to another page"""
+    origin, page = callback.data.split(":", 1)[1].rsplit(":", 1)
+    await _show_resources_list(callback, db, origin, int(page))
+
+
 # --- Subcategory handlers ---
 
 @router.callback_query(F.data.startswith("res_skill_sub:"))
 async def show_skill_subcategory(callback: CallbackQuery, db: Database):
     """Show resources for a specific Skills subcategory"""
-    sub_key = callback.data.split(":", 1)[1]
-    cat_data = SKILL_CATEGORIES.get(sub_key)
-    if not cat_data:
-        await callback.answer("Category not found")
-        return
-    items = set(cat_data["items"])
-    desc = f"🧑🏼‍💻 Skills and Knowledge — {cat_data['name']}"
-    await _show_resources_list(callback, db, "Skills and Knowledge", desc, "back_to_skill_subs", subcategory_items=items)
+    await _show_resources_list(callback, db, callback.data)
 
 
 @router.callback_query(F.data.startswith("res_intro_sub:"))
 async def show_intro_subcategory(callback: CallbackQuery, db: Database):
     """Show resources for a specific Personal Introduction subcategory"""
-    sub_key = callback.data.split(":", 1)[1]
-    cat_data = INTRO_CATEGORIES.get(sub_key)
-    if not cat_data:
-        await callback.answer("Category not found")
-        return
-    items = set(cat_data["items"])
-    desc = f"🤝🏻 Personal Introduction — {cat_data['name']}"
-    await _show_resources_list(callback, db, "Personal Introductions to Key People", desc, "back_to_intro_subs", subcategory_items=items)
+    await _show_resources_list(callback, db, callback.data)
 
 
 @router.callback_query(F.data.startswith("res_spec_sub:"))
 async def show_spec_subcategory(callback: CallbackQuery, db: Database):
     """Show resources for a specific Specialists subcategory"""
-    sub_key = callback.data.split(":", 1)[1]
-    cat_data = SPECIALIST_CATEGORIES.get(sub_key)
-    if not cat_data:
-        await callback.answer("Category not found")
-        return
-    desc = f"🫆 Specialists — {cat_data['name']}"
-    await _show_resources_list(callback, db, "Specialists", desc, "back_to_spec_subs", subcategory_key=sub_key)
+    await _show_resources_list(callback, db, callback.data)
 
 
 # --- Back to subcategories ---
@@ -408,14 +265,7 @@ async def back_to_spec_subs(callback: CallbackQuery):
 @router.callback_query(F.data.startswith("res_ra_sub:"))
 async def show_ra_subcategory(callback: CallbackQuery, db: Database):
     """Show resources for a specific Resources & Access subcategory"""
-    sub_key = callback.data.split(":", 1)[1]
-    cat_data = RESOURCE_ACCESS_CATEGORIES.get(sub_key)
-    if not cat_data:
-        await callback.answer("Category not found")
-        return
-    items = set(cat_data["items"])
-    desc = f"🏢 Businesses, Spaces & Platforms — {cat_data['name']}"
-    await _show_resources_list(callback, db, "Businesses, Spaces & Platforms", desc, "back_to_ra_subs", subcategory_items=items)
+    await _show_resources_list(callback, db, callback.data)
 
 
 @router.callback_query(F.data == "back_to_ra_subs")
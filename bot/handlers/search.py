@@ -0,0 +1,145 @@
+from typing import Dict, List, Optional
+from aiogram import Router, F
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.types import (
+    Message, CallbackQuery, InlineQuery, InlineQueryResultArticle, InlineQueryResultsButton,
+    InputTextMessageContent
+)
+from bot.config import INLINE_CACHE_TIME
+from bot.database import Database
+from bot.keyboards import get_search_page_keyboard
+
+router = Router()
+
+RESULTS_PER_PAGE = 10
+INLINE_RESULTS_PER_PAGE = 20  # Telegram allows up to 50 per answer
+TITLE_LIMIT = 80
+
+# lot type -> label shown before a lot result
+LOT_LABELS = {
+    "share": "🫧 Resource",
+    "seek": "👀 Request",
+}
+
+
+def _clip(text: Optional[str], limit: int = TITLE_LIMIT) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _owner(result: Dict) -> str:
+    return result["name"] + (f" @{result['username']}" if result.get("username") else "")
+
+
+def _headline(result: Dict) -> str:
+    """First line of a search hit: what was found"""
+    if result["kind"] == "lot":
+        return f"{LOT_LABELS.get(result['lot_type'], '📌 Lot')}: {_clip(result['title'])}"
+    if result["kind"] == "profile":
+        return f"🐥 {_owner(result)}"
+    return f"🧰 {_clip(result['title'])} ({result['excerpt']})"
+
+
+def format_search_result(result: Dict) -> str:
+    """One search hit as a few lines of plain text"""
+    text = _headline(result)
+    if result["kind"] != "profile":
+        text += f"\n👤 {_owner(result)}"
+    if result["kind"] != "item" and result["excerpt"]:
+        text += f"\n✉️ {result['excerpt']}"
+    return text
+
+
+def format_search_page(query: str, results: List[Dict], offset: int) -> str:
+    """Text of one page of /search results"""
+    if not results:
+        return f"🔎 Nothing found for “{_clip(query)}”."
+    lines = [f"🔎 Results for “{_clip(query)}”"]
+    for i, result in enumerate(results, start=offset + 1):
+        lines.append(f"{i}. {format_search_result(result)}")
+    return "\n\n".join(lines)
+
+
+@router.message(Command("search"))
+async def search_command(message: Message, command: CommandObject, db: Database,
+                         state: FSMContext, profile: Optional[Dict]):
+    """Full-text search over lots, profiles and questionnaire resources: /search <query>"""
+    if not profile:
+        await message.answer("❌ You are not registered. Please use /start to register.")
+        return
+
+    query = (command.args or "").strip()
+    if not query:
+        await message.answer(
+            "🔎 Search\n\n"
+            "Send /search followed by what you are looking for, e.g.\n"
+            "/search photo studio"
+        )
+        return
+
+    # Page buttons only carry the offset; the query stays with the user
+    await state.update_data(search_query=query)
+    results, next_offset = await db.search(query, 0, RESULTS_PER_PAGE)
+    await message.answer(
+        format_search_page(query, results, 0),
+        reply_markup=get_search_page_keyboard(0, RESULTS_PER_PAGE, next_offset)
+    )
+
+
+@router.callback_query(F.data.startswith("search_pg:"))
+async def page_search_results(callback: CallbackQuery, db: Database, state: FSMContext):
+    """Another page of the user's last search: search_pg:<offset>"""
+    offset = callback.data.split(":", 1)[1]
+    query = (await state.get_data()).get("search_query")
+    if not query or not offset.isdigit():
+        await callback.answer("This search has expired. Please run /search again.", show_alert=True)
+        return
+
+    offset = int(offset)
+    results, next_offset = await db.search(query, offset, RESULTS_PER_PAGE)
+    await callback.message.edit_text(
+        format_search_page(query, results, offset),
+        reply_markup=get_search_page_keyboard(offset, RESULTS_PER_PAGE, next_offset)
+    )
+    await callback.answer()
+
+
+def _inline_article(result: Dict) -> InlineQueryResultArticle:
+    """A search hit as an inline result; choosing it posts the hit's card to the chat"""
+    if result["kind"] == "profile":
+        description = result["excerpt"]
+    elif result["kind"] == "item":
+        description = _owner(result)
+    else:
+        description = " · ".join(filter(None, (_owner(result), result["excerpt"])))
+    return InlineQueryResultArticle(
+        id=f"{result['kind']}:{result['ref_id']}",
+        title=_headline(result),
+        description=description or None,
+        input_message_content=InputTextMessageContent(message_text=format_search_result(result))
+    )
+
+
+@router.inline_query()
+async def inline_search(inline_query: InlineQuery, db: Database, profile: Optional[Dict]):
+    """@bot <query> from any chat: the /search results, paged through Telegram's next_offset.
+
+    Results are the same for every member, but non-members must not see them, so the
+    answers Telegram caches (for INLINE_CACHE_TIME) are kept per user.
+    """
+    if not profile:
+        await inline_query.answer(
+            [], cache_time=INLINE_CACHE_TIME, is_personal=True,
+            button=InlineQueryResultsButton(text="Register to search the community", start_parameter="inline")
+        )
+        return
+
+    offset = int(inline_query.offset) if inline_query.offset.isdigit() else 0
+    results, next_offset = await db.search(inline_query.query, offset, INLINE_RESULTS_PER_PAGE)
+    await inline_query.answer(
+        [_inline_article(result) for result in results],
+        cache_time=INLINE_CACHE_TIME,
+        is_personal=True,
+        next_offset="" if next_offset is None else str(next_offset)
+    )
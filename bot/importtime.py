@@ -0,0 +1,54 @@
+"""Startup import-time report built on `python -X importtime`"""
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Records from -X importtime stderr lines (`import time: self | cumulative | name`)"""
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the header line
+        name = parts[2].rstrip()
+        stripped = name.lstrip(" ")
+        records.append(ImportRecord(stripped, int(parts[0]), int(parts[1]), (len(name) - len(stripped)) // 2))
+    return records
+
+
+def collect(module: str) -> List[ImportRecord]:
+    """Import module in a fresh interpreter and return its import times"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def format_report(records: List[ImportRecord], top: int = 20) -> str:
+    """Total, per-package self time and the slowest modules by cumulative time"""
+    total = sum(record.self_us for record in records)
+    packages: Dict[str, int] = defaultdict(int)
+    for record in records:
+        packages[record.module.split(".")[0]] += record.self_us
+
+    lines = [f"Total import time: {total / 1000:.1f} ms ({len(records)} modules)", "", "By package (self time):"]
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"  {self_us / 1000:9.1f} ms  {package}")
+    lines += ["", "Slowest imports (cumulative):"]
+    for record in sorted(records, key=lambda r: -r.cumulative_us)[:top]:
+        lines.append(f"  {record.cumulative_us / 1000:9.1f} ms  {record.self_us / 1000:7.1f} ms self  {record.module}")
+    return "\n".join(lines)
@@ -0,0 +1,66 @@
+import hashlib
+from functools import lru_cache
+from typing import Collection, Dict, Iterable, Optional
+
+from bot import form_data
+
+
+def _md5_prefix(item: str) -> str:
+    return hashlib.md5(item.encode()).hexdigest()[:8]
+
+
+def _form_items() -> Iterable[str]:
+    """Every option string in form_data: plain lists and the items of category dicts"""
+    for name in dir(form_data):
+        if not name.isupper():
+            continue
+        value = getattr(form_data, name)
+        if isinstance(value, list):
+            yield from (item for item in value if isinstance(item, str))
+        elif isinstance(value, dict):
+            for category in value.values():
+                if isinstance(category, dict):
+                    yield from category.get("items", [])
+
+
+def _build_index():
+    item_to_hash: Dict[str, str] = {}
+    hash_to_item: Dict[str, str] = {}
+    for item in _form_items():
+        if item in item_to_hash:
+            continue
+        item_hash = _md5_prefix(item)
+        other = hash_to_item.get(item_hash)
+        if other is not None:
+            raise ValueError(f"Callback hash collision in form_data: {other!r} and {item!r} -> {item_hash}")
+        item_to_hash[item] = item_hash
+        hash_to_item[item_hash] = item
+    return item_to_hash, hash_to_item
+
+
+# Built once at import; a colliding form_data edit fails at startup instead of
+# silently selecting the wrong option
+ITEM_TO_HASH, HASH_TO_ITEM = _build_index()
+
+
+@lru_cache(maxsize=4096)
+def _runtime_hash(item: str) -> str:
+    return _md5_prefix(item)
+
+
+def hash_item(item: str) -> str:
+    """Short callback id of an option (first 8 hex digits of its md5)"""
+    item_hash = ITEM_TO_HASH.get(item)
+    return item_hash if item_hash is not None else _runtime_hash(item)
+
+
+def find_item_by_hash(items: Collection[str], item_hash: str) -> Optional[str]:
+    """The option among items whose callback id is item_hash, or None"""
+    item = HASH_TO_ITEM.get(item_hash)
+    if item is not None and item in items:
+        return item
+    # Options built at runtime are not in the index
+    for item in items:
+        if hash_item(item) == item_hash:
+            return item
+    return None
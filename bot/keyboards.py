@@ -1,10 +1,108 @@
+import functools
+import inspect
+from collections import OrderedDict
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import ReplyKeyboardBuilder, InlineKeyboardBuilder
-from typing import List, Dict, Set, Any
+from pydantic import BaseModel, ConfigDict, WrapSerializer
+from typing import Annotated, List, Dict, Set, Any, Optional, Tuple, get_args, get_origin
 from bot.config import ADMIN_IDS
 from bot.form_data import SKILL_CATEGORIES, OFFER_FORMATS, VESSEL_LOCATIONS
+from bot.item_hashes import hash_item
 
 
+# --- Frozen keyboard registry ---
+
+_FROZEN_TYPES: Dict[type, type] = {}
+_KEYBOARD_CACHES: List[OrderedDict] = []
+
+
+def _as_lists(value):
+    return [_as_lists(item) for item in value] if isinstance(value, tuple) else value
+
+
+def _rows_as_lists(value, handler):
+    """Serializer for frozen rows: dump them as the lists the unfrozen markup has"""
+    return _as_lists(handler(value))
+
+
+def _tuple_annotation(annotation):
+    """list[list[X]] -> tuple[tuple[X, ...], ...]"""
+    if get_origin(annotation) is list:
+        return Tuple[_tuple_annotation(get_args(annotation)[0]), ...]
+    return annotation
+
+
+def _frozen_type(cls: type) -> type:
+    """Subclass of an aiogram type that rejects attribute assignment and keeps
+    list fields (keyboard rows) as tuples"""
+    frozen = _FROZEN_TYPES.get(cls)
+    if frozen is None:
+        tuple_fields = {
+            # aiogram's request encoder only walks lists
+            name: Annotated[_tuple_annotation(field.annotation), WrapSerializer(_rows_as_lists)]
+            for name, field in cls.model_fields.items() if get_origin(field.annotation) is list
+        }
+        frozen = _FROZEN_TYPES[cls] = type(f"Frozen{cls.__name__}", (cls,), {
+            "__annotations__": tuple_fields,
+            "model_config": ConfigDict(frozen=True),
+        })
+    return frozen
+
+
+def freeze_markup(value):
+    """Copy of a markup (and its buttons) that can't be modified: models reject
+    assignment and rows are tuples, so appending a row or button raises too"""
+    if isinstance(value, list):
+        return [freeze_markup(item) for item in value]
+    if isinstance(value, BaseModel):
+        fields = {name: freeze_markup(getattr(value, name)) for name in value.model_fields_set}
+        return _frozen_type(type(value))(**fields)
+    return value
+
+
+def frozen_keyboard(func=None, *, maxsize: int = 256):
+    """Memoize a keyboard function by its arguments and return shared frozen markup.
+
+    Only for keyboards that depend on nothing but their arguments. dict/list arguments
+    are keyed by identity, so pass module-level constants (form_data), not built values.
+    """
+    if func is None:
+        return functools.partial(frozen_keyboard, maxsize=maxsize)
+
+    cache: OrderedDict = OrderedDict()
+    _KEYBOARD_CACHES.append(cache)
+    signature = inspect.signature(func)
+
+    def arg_key(value):
+        return ("id", id(value)) if isinstance(value, (dict, list, set)) else value
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Normalized so f("x") and f(prefix="x") share an entry
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = tuple(arg_key(value) for value in bound.arguments.values())
+        entry = cache.get(key)
+        if entry is None:
+            # Keep the arguments alive so identity keys can't be reused by other objects
+            entry = cache[key] = (freeze_markup(func(*args, **kwargs)), args, kwargs)
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return entry[0]
+
+    return wrapper
+
+
+def clear_keyboard_cache():
+    """Drop all memoized keyboards (e.g. after changing ADMIN_IDS or form_data in tests)"""
+    for cache in _KEYBOARD_CACHES:
+        cache.clear()
+
+
+
+@frozen_keyboard
 def get_main_menu_keyboard() -> ReplyKeyboardMarkup:
     """Main menu keyboard"""
     builder = ReplyKeyboardBuilder()
@@ -26,6 +124,7 @@ def get_main_menu_keyboard() -> ReplyKeyboardMarkup:
     return builder.as_markup(resize_keyboard=True)
 
 
+@frozen_keyboard
 def get_admin_menu_keyboard() -> ReplyKeyboardMarkup:
     """Admin menu keyboard"""
     builder = ReplyKeyboardBuilder()
@@ -48,6 +147,7 @@ def get_admin_menu_keyboard() -> ReplyKeyboardMarkup:
     return builder.as_markup(resize_keyboard=True)
 
 
+@frozen_keyboard
 def get_cancel_keyboard() -> ReplyKeyboardMarkup:
     """Cancel keyboard"""
     builder = ReplyKeyboardBuilder()
@@ -55,11 +155,11 @@ def get_cancel_keyboard() -> ReplyKeyboardMarkup:
     return builder.as_markup(resize_keyboard=True)
 
 
+@frozen_keyboard
 def get_cities_keyboard(prefix: str = "city") -> InlineKeyboardMarkup:
     """Keyboard with city buttons"""
     from bot.form_data import CITIES
     builder = InlineKeyboardBuilder()
-    import hashlib
     # Create rows with 2 columns for better visibility
     for i in range(0, len(CITIES), 2):
         row_btns = []
@@ -90,6 +190,7 @@ def get_cities_keyboard(prefix: str = "city") -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@frozen_keyboard
 def get_resource_categories_keyboard(prefix: str = "res_cat") -> InlineKeyboardMarkup:
     """Keyboard with resource categories"""
     # Categories as requested
@@ -113,6 +214,7 @@ def get_resource_categories_keyboard(prefix: str = "res_cat") -> InlineKeyboardM
     builder.row(InlineKeyboardButton(text="🔙 Back", callback_data="back_to_menu"))
     return builder.as_markup()
 
+@frozen_keyboard
 def get_resource_subcategories_keyboard(categories_dict: dict, prefix: str, back_callback: str) -> InlineKeyboardMarkup:
     """Keyboard with subcategories for Skills/Introductions/Specialists resources view"""
     builder = InlineKeyboardBuilder()
@@ -123,6 +225,7 @@ def get_resource_subcategories_keyboard(categories_dict: dict, prefix: str, back
 
 
 
+@frozen_keyboard
 def get_lots_type_keyboard() -> InlineKeyboardMarkup:
     """Keyboard for selecting lot type - 4 options A, B, C, D"""
     builder = InlineKeyboardBuilder()
@@ -134,6 +237,17 @@ def get_lots_type_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def get_lots_page_keyboard(lot_type: str, next_cursor: Optional[str]) -> InlineKeyboardMarkup:
+    """Lot type menu preceded by a Next button when more active lots follow"""
+    builder = InlineKeyboardBuilder()
+    if next_cursor:
+        builder.row(InlineKeyboardButton(text="Next ➡️", callback_data=f"lots_pg:{lot_type}:{next_cursor}"))
+    # The builder wants lists; the shared (frozen) buttons themselves can be reused
+    builder.attach(InlineKeyboardBuilder([list(row) for row in get_lots_type_keyboard().inline_keyboard]))
+    return builder.as_markup()
+
+
+@frozen_keyboard
 def get_create_lot_type_keyboard() -> InlineKeyboardMarkup:
     """Keyboard for selecting lot type to create - Deprecated or used internally?"""
     # We might reuse this or use specific flows.
@@ -146,6 +260,7 @@ def get_create_lot_type_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@frozen_keyboard
 def get_open_resources_keyboard() -> InlineKeyboardMarkup:
     """Keyboard for open resources sections - MAPS, etc."""
     builder = InlineKeyboardBuilder()
@@ -156,6 +271,7 @@ def get_open_resources_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@frozen_keyboard
 def get_back_keyboard(callback_data: str = "back_to_menu") -> InlineKeyboardMarkup:
     """Simple back button"""
     builder = InlineKeyboardBuilder()
@@ -176,19 +292,64 @@ def get_user_card_keyboard(user_id: int, instagram: str = "") -> InlineKeyboardM
     return builder.as_markup()
 
 
-def get_resource_card_keyboard(owner_id: int, instagram: str = "") -> InlineKeyboardMarkup:
-    """Keyboard for resource card"""
-    builder = InlineKeyboardBuilder()
+def _resource_card_buttons(builder: InlineKeyboardBuilder, owner_id: int, instagram: str = "", label: str = ""):
+    """Add Contact / Propose Deal / Instagram buttons for one resource card"""
     builder.row(
-        InlineKeyboardButton(text="💬 Contact", url=f"tg://user?id={owner_id}"),
-        InlineKeyboardButton(text="🤝 Propose Deal", callback_data=f"deal:propose:{owner_id}")
+        InlineKeyboardButton(text=f"💬 {label}Contact", url=f"tg://user?id={owner_id}"),
+        InlineKeyboardButton(text=f"🤝 {label}Propose Deal", callback_data=f"deal:propose:{owner_id}")
     )
     if instagram:
-        builder.row(InlineKeyboardButton(text="📸 Instagram", url=f"https://instagram.com/{instagram.lstrip('@')}"))
+        builder.row(InlineKeyboardButton(text=f"📸 {label}Instagram", url=f"https://instagram.com/{instagram.lstrip('@')}"))
+
+
+def get_resource_card_keyboard(owner_id: int, instagram: str = "") -> InlineKeyboardMarkup:
+    """Keyboard for resource card"""
+    builder = InlineKeyboardBuilder()
+    _resource_card_buttons(builder, owner_id, instagram)
     builder.row(InlineKeyboardButton(text="🔙 Back", callback_data="back_to_category_res"))
     return builder.as_markup()
 
 
+def get_resource_page_keyboard(
+    cards: List[tuple],
+    page: int,
+    total_pages: int,
+    page_callback_prefix: str,
+    back_callback: str,
+) -> InlineKeyboardMarkup:
+    """Keyboard for one page of resource cards.
+    cards is a list of (number, owner_id, instagram); each card gets its numbered card buttons."""
+    builder = InlineKeyboardBuilder()
+    for number, owner_id, instagram in cards:
+        _resource_card_buttons(builder, owner_id, instagram, label=f"{number}. ")
+
+    if total_pages > 1:
+        nav_buttons = []
+        if page > 0:
+            nav_buttons.append(InlineKeyboardButton(text="⬅️ Prev", callback_data=f"{page_callback_prefix}:{page-1}"))
+        nav_buttons.append(InlineKeyboardButton(text=f"{page+1}/{total_pages}", callback_data="noop"))
+        if page < total_pages - 1:
+            nav_buttons.append(InlineKeyboardButton(text="Next ➡️", callback_data=f"{page_callback_prefix}:{page+1}"))
+        builder.row(*nav_buttons)
+
+    builder.row(InlineKeyboardButton(text="🔙 Back", callback_data=back_callback))
+    return builder.as_markup()
+
+
+@frozen_keyboard
+def get_search_page_keyboard(offset: int, per_page: int, next_offset: Optional[int]) -> Optional[InlineKeyboardMarkup]:
+    """Prev/Next buttons for a page of /search results; None when everything fits on one page"""
+    nav_buttons = []
+    if offset > 0:
+        nav_buttons.append(InlineKeyboardButton(text="⬅️ Prev", callback_data=f"search_pg:{max(0, offset - per_page)}"))
+    if next_offset is not None:
+        nav_buttons.append(InlineKeyboardButton(text="Next ➡️", callback_data=f"search_pg:{next_offset}"))
+    if not nav_buttons:
+        return None
+    return InlineKeyboardMarkup(inline_keyboard=[nav_buttons])
+
+
+@frozen_keyboard
 def get_add_lot_keyboard() -> InlineKeyboardMarkup:
     """Keyboard for adding new lot"""
     builder = InlineKeyboardBuilder()
@@ -197,6 +358,7 @@ def get_add_lot_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@frozen_keyboard
 def get_admin_panel_keyboard() -> InlineKeyboardMarkup:
     """Admin panel keyboard"""
     builder = InlineKeyboardBuilder()
@@ -249,6 +411,7 @@ def get_menu_keyboard(user_id: int) -> ReplyKeyboardMarkup:
 
 # --- Questionnaire Keyboards ---
 
+@frozen_keyboard
 def get_skill_categories_keyboard() -> InlineKeyboardMarkup:
     """Keyboard for selecting skill category (Single Choice)"""
     builder = InlineKeyboardBuilder()
@@ -271,8 +434,7 @@ def get_skill_items_keyboard(category_key: str, selected: Set[str]) -> InlineKey
         # Let's try to use short identifier.
         # Actually, callback_data limit is 64 chars. Some items are long.
         # We need a way to map them.
-        import hashlib
-        item_hash = hashlib.md5(item.encode()).hexdigest()[:8]
+        item_hash = hash_item(item)
         builder.row(InlineKeyboardButton(text=text, callback_data=f"q_item:{item_hash}"))
 
     builder.row(InlineKeyboardButton(text="🆗 Done", callback_data="q_item_done"))
@@ -291,7 +453,6 @@ def get_multiselect_keyboard(
 ) -> InlineKeyboardMarkup:
     """Generic multiselect keyboard"""
     builder = InlineKeyboardBuilder()
-    import hashlib
 
     import math
 
@@ -304,7 +465,7 @@ def get_multiselect_keyboard(
     for item in current_items:
         is_selected = item in selected
         text = f"{'✅' if is_selected else '⬜️'} {item}"
-        item_hash = hashlib.md5(item.encode()).hexdigest()[:8]
+        item_hash = hash_item(item)
         builder.row(InlineKeyboardButton(text=text, callback_data=f"{prefix}:{item_hash}"))
 
     if total_pages > 1:
@@ -327,10 +488,9 @@ def get_multiselect_keyboard(
 def get_single_select_keyboard(options: List[str], prefix: str, back_callback: str = None) -> InlineKeyboardMarkup:
     """Generic single select keyboard"""
     builder = InlineKeyboardBuilder()
-    import hashlib
 
     for item in options:
-        item_hash = hashlib.md5(item.encode()).hexdigest()[:8]
+        item_hash = hash_item(item)
         builder.row(InlineKeyboardButton(text=item, callback_data=f"{prefix}:{item_hash}"))
 
     if back_callback:
@@ -338,6 +498,7 @@ def get_single_select_keyboard(options: List[str], prefix: str, back_callback: s
     return builder.as_markup()
 
 
+@frozen_keyboard
 def get_skip_keyboard(skip_callback: str, back_callback: str = None) -> InlineKeyboardMarkup:
     """Keyboard with skip option"""
     builder = InlineKeyboardBuilder()
@@ -347,6 +508,7 @@ def get_skip_keyboard(skip_callback: str, back_callback: str = None) -> InlineKe
     return builder.as_markup()
 
 
+@frozen_keyboard
 def get_section_intro_keyboard(start_callback: str, skip_callback: str, back_callback: str = None) -> InlineKeyboardMarkup:
     """Keyboard for section intro with start/skip options"""
     builder = InlineKeyboardBuilder()
@@ -361,7 +523,6 @@ def get_cities_select_keyboard(prefix: str, done_callback: str = None, selected:
     """Keyboard for city selection with multi-select support"""
     from bot.form_data import CITIES
     builder = InlineKeyboardBuilder()
-    import hashlib
 
     selected = selected or set()
 
@@ -372,14 +533,14 @@ def get_cities_select_keyboard(prefix: str, done_callback: str = None, selected:
         city1 = CITIES[i]
         is_selected1 = city1 in selected
         text1 = f"{'✅ ' if is_selected1 else ''}{city1}"
-        city_hash1 = hashlib.md5(city1.encode()).hexdigest()[:8]
+        city_hash1 = hash_item(city1)
         row_btns.append(InlineKeyboardButton(text=text1, callback_data=f"{prefix}:{city_hash1}"))
 
         if i + 1 < len(CITIES):
             city2 = CITIES[i+1]
             is_selected2 = city2 in selected
             text2 = f"{'✅ ' if is_selected2 else ''}{city2}"
-            city_hash2 = hashlib.md5(city2.encode()).hexdigest()[:8]
+            city_hash2 = hash_item(city2)
             row_btns.append(InlineKeyboardButton(text=text2, callback_data=f"{prefix}:{city_hash2}"))
 
         builder.row(*row_btns)
@@ -395,7 +556,6 @@ def get_cities_select_keyboard(prefix: str, done_callback: str = None, selected:
 def get_vessel_locations_keyboard(prefix: str, done_callback: str = None, selected: Set[str] = None, back_callback: str = None) -> InlineKeyboardMarkup:
     """Keyboard for vessel/boat location selection with multi-select support"""
     builder = InlineKeyboardBuilder()
-    import hashlib
 
     selected = selected or set()
 
@@ -406,14 +566,14 @@ def get_vessel_locations_keyboard(prefix: str, done_callback: str = None, select
         loc1 = VESSEL_LOCATIONS[i]
         is_selected1 = loc1 in selected
         text1 = f"{'✅ ' if is_selected1 else ''}{loc1}"
-        loc_hash1 = hashlib.md5(loc1.encode()).hexdigest()[:8]
+        loc_hash1 = hash_item(loc1)
         row_btns.append(InlineKeyboardButton(text=text1, callback_data=f"{prefix}:{loc_hash1}"))
 
         if i + 1 < len(VESSEL_LOCATIONS):
             loc2 = VESSEL_LOCATIONS[i+1]
             is_selected2 = loc2 in selected
             text2 = f"{'✅ ' if is_selected2 else ''}{loc2}"
-            loc_hash2 = hashlib.md5(loc2.encode()).hexdigest()[:8]
+            loc_hash2 = hash_item(loc2)
             row_btns.append(InlineKeyboardButton(text=text2, callback_data=f"{prefix}:{loc_hash2}"))
 
         builder.row(*row_btns)
@@ -426,6 +586,7 @@ def get_vessel_locations_keyboard(prefix: str, done_callback: str = None, select
     return builder.as_markup()
 
 
+@frozen_keyboard
 def get_category_keyboard(categories: Dict, prefix: str, back_callback: str = None) -> InlineKeyboardMarkup:
     """Keyboard for category selection (like intro_categories, specialist_categories)"""
     builder = InlineKeyboardBuilder()
@@ -450,7 +611,6 @@ def get_category_items_keyboard(
 ) -> InlineKeyboardMarkup:
     """Keyboard for selecting items within a category"""
     builder = InlineKeyboardBuilder()
-    import hashlib
     items = categories.get(category_key, {}).get("items", [])
 
     import math
@@ -464,7 +624,7 @@ def get_category_items_keyboard(
     for item in current_items:
         is_selected = item in selected
         text = f"{'✅' if is_selected else '⬜️'} {item}"
-        item_hash = hashlib.md5(item.encode()).hexdigest()[:8]
+        item_hash = hash_item(item)
         builder.row(InlineKeyboardButton(text=text, callback_data=f"{prefix}:{item_hash}"))
 
     if total_pages > 1:
@@ -497,7 +657,7 @@ def get_category_single_select_keyboard(
 ) -> InlineKeyboardMarkup:
     """Keyboard for single-selecting one item within a category (no checkboxes)."""
     builder = InlineKeyboardBuilder()
-    import hashlib, math
+    import math
     items = categories.get(category_key, {}).get("items", [])
     total_pages = max(1, math.ceil(len(items) / items_per_page))
     page = max(0, min(page, total_pages - 1))
@@ -506,7 +666,7 @@ def get_category_single_select_keyboard(
     current_items = items[start_index:end_index]
 
     for item in current_items:
-        item_hash = hashlib.md5(item.encode()).hexdigest()[:8]
+        item_hash = hash_item(item)
         builder.row(InlineKeyboardButton(text=item, callback_data=f"{prefix}:{item_hash}"))
 
     if total_pages > 1:
@@ -537,7 +697,6 @@ def get_paginated_multiselect_keyboard(
     page_callback_prefix: str = "page"
 ) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
-    import hashlib
     import math
 
     total_pages = math.ceil(len(items) / items_per_page)
@@ -548,7 +707,7 @@ def get_paginated_multiselect_keyboard(
     for item in current_items:
         is_selected = item in selected
         text = f"{'✅' if is_selected else '⬜️'} {item}"
-        item_hash = hashlib.md5(item.encode()).hexdigest()[:8]
+        item_hash = hash_item(item)
         builder.row(InlineKeyboardButton(text=text, callback_data=f"{prefix}:{item_hash}"))
 
     # Navigation buttons
@@ -1,13 +1,24 @@
 import asyncio
 import logging
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.base import BaseStorage
 
-from bot.config import BOT_TOKEN, DATABASE_PATH
+from bot.config import (
+    BOT_TOKEN, DATABASE_PATH, DATABASE_POOL_SIZE, DATABASE_PRAGMAS,
+    SEND_GLOBAL_RATE, SEND_CHAT_RATE, SEND_CHAT_BURST, SEND_MAX_RETRIES,
+    ADMIN_IDS, BOT_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT,
+    FSM_STATE_TTL, FSM_FLUSH_INTERVAL, USER_CACHE_SIZE, USER_CACHE_TTL, POINTS_RECONCILE_INTERVAL,
+    METRICS_HOST, METRICS_PORT, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL
+)
 from bot.database import Database
+from bot.fsm_storage import SQLiteStorage
+from bot.metrics import ApiCallMetricsMiddleware, instrument_dispatcher, metrics, start_metrics_server
+from bot.multiselect import MarkupEditorMiddleware, markup_editor
+from bot.routing import index_callback_routes
+from bot.send_queue import SendQueue, SendQueueMiddleware
 
 # Import handlers
-from bot.handlers import registration, menu, friends, resources, lots, open_resources, admin, deals
+from bot.handlers import registration, menu, friends, resources, lots, open_resources, admin, deals, search
 
 # Configure logging
 logging.basicConfig(
@@ -17,22 +28,49 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def main():
-    """Main function to start the bot"""
-    # Initialize bot and dispatcher
-    bot = Bot(token=BOT_TOKEN)
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+async def reconcile_points_periodically(db: Database, interval: float):
+    """Check users.points against points_ledger every interval seconds"""
+    while True:
+        try:
+            fixed = await db.reconcile_points()
+            for user_id, stored, balance in fixed:
+                logger.warning(f"Points of user {user_id} were {stored}, ledger says {balance}; corrected")
+        except Exception as e:
+            logger.error(f"Points reconciliation failed: {e}", exc_info=True)
+        await asyncio.sleep(interval)
 
-    # Initialize database
-    db = Database(DATABASE_PATH)
-    await db.init_db()
-    logger.info("Database initialized")
+
+def setup_bot_session(bot: Bot, send_queue: SendQueue):
+    """Install the outgoing request middlewares on bot's session"""
+    # Counted in the handler's context, before the send queue takes the request over
+    bot.session.middleware(ApiCallMetricsMiddleware(metrics))
+    bot.session.middleware(SendQueueMiddleware(send_queue))
+    # Multiselect keyboard edits are debounced; direct edits of the same message win
+    bot.session.middleware(MarkupEditorMiddleware(markup_editor))
+
+
+def create_dispatcher(db: Database, storage: BaseStorage, send_queue: SendQueue) -> Dispatcher:
+    """Dispatcher with the bot's middlewares and routers. The routers are module-level,
+    so this can be called once per process."""
+    # No events isolation: it would hold a per-chat lock across queued sends and never
+    # free it. Multiselect handlers lock their own FSM read-modify-write (bot.questionnaire)
+    dp = Dispatcher(storage=storage)
+    # Per-handler wall time and DB / Bot API call counts
+    instrument_dispatcher(dp, metrics)
 
     # Register middleware to pass database to handlers
     @dp.update.middleware()
     async def db_middleware(handler, event, data):
         data['db'] = db
+        data['send_queue'] = send_queue
+        return await handler(event, data)
+
+    # Resolve the sender's profile once per update (None if not registered);
+    # handlers receive it by declaring a `profile` argument
+    @dp.update.middleware()
+    async def profile_middleware(handler, event, data):
+        from_user = data.get('event_from_user')
+        data['profile'] = await db.get_user(from_user.id) if from_user else None
         return await handler(event, data)
 
     # Include routers
@@ -44,14 +82,90 @@ async def main():
     dp.include_router(open_resources.router)
     dp.include_router(admin.router)
     dp.include_router(deals.router)
+    dp.include_router(search.router)
 
-    logger.info("Bot started")
+    # Let callbacks skip routers that have no handler for their prefix
+    indexed = index_callback_routes(dp)
+    logger.info(f"Callback routing indexed for {indexed} routers")
+    return dp
+
+
+async def main():
+    """Main function to start the bot"""
+    # Initialize database
+    db = Database(
+        DATABASE_PATH,
+        pool_size=DATABASE_POOL_SIZE,
+        pragmas=DATABASE_PRAGMAS,
+        user_cache_size=USER_CACHE_SIZE,
+        user_cache_ttl=USER_CACHE_TTL,
+        search_cache_size=SEARCH_CACHE_SIZE,
+        search_cache_ttl=SEARCH_CACHE_TTL
+    )
+    await db.init_db()
+    db.set_query_hook(metrics.record_query)
+    logger.info("Database initialized")
+
+    # Initialize bot and dispatcher; FSM state lives in the database so restarts keep it
+    bot = Bot(token=BOT_TOKEN)
+    storage = SQLiteStorage(db, ttl=FSM_STATE_TTL, flush_interval=FSM_FLUSH_INTERVAL)
+    storage.start()
+
+    # Throttle outgoing messages to Telegram's limits and retry on flood control
+    send_queue = SendQueue(
+        global_rate=SEND_GLOBAL_RATE,
+        chat_rate=SEND_CHAT_RATE,
+        chat_burst=SEND_CHAT_BURST,
+        max_retries=SEND_MAX_RETRIES
+    )
+    send_queue.start()
+    setup_bot_session(bot, send_queue)
+
+    dp = create_dispatcher(db, storage, send_queue)
+
+    metrics.add_collector("send_queue", send_queue.stats)
+    metrics.add_collector("user_cache", db.user_cache_stats)
+    metrics.add_collector("registration_cache", db.registration_cache_stats)
+    metrics.add_collector("search_cache", db.search_cache_stats)
+    metrics.add_collector("markup_editor", markup_editor.stats)
+    metrics_runner = None
+    if METRICS_PORT:
+        metrics_runner = await start_metrics_server(metrics, METRICS_HOST, METRICS_PORT)
+        logger.info(f"Metrics served on http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
+    reconciler = None
+    if POINTS_RECONCILE_INTERVAL > 0:
+        reconciler = asyncio.create_task(reconcile_points_periodically(db, POINTS_RECONCILE_INTERVAL))
+
+    logger.info(f"Bot started ({BOT_MODE} mode, {len(ADMIN_IDS)} admins configured)")
 
     try:
-        # Start polling
-        await dp.start_polling(bot)
+        if BOT_MODE == "webhook":
+            # aiohttp's server side is only needed in webhook mode
+            from bot.webhook import run_webhook
+
+            await run_webhook(
+                dp, bot,
+                host=WEBAPP_HOST,
+                port=WEBAPP_PORT,
+                path=WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET,
+                webhook_url=WEBHOOK_URL
+            )
+        else:
+            # Polling does not work while a webhook is registered
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
     finally:
+        if reconciler is not None:
+            reconciler.cancel()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await markup_editor.close()
+        await send_queue.close()
         await bot.session.close()
+        await storage.close()
+        await db.close()
 
 
 if __name__ == "__main__":
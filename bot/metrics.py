@@ -0,0 +1,231 @@
+"""Per-update handler latency and DB / Bot API call counts, aggregated into histograms"""
+import math
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CALL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+# Observers left unlabelled: "update" only dispatches to the others, "error" runs after them
+_UNLABELLED_OBSERVERS = {"update", "error"}
+
+
+class Histogram:
+    """Bucket counts plus sum and count, in the shape Prometheus expects"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (inf past the last bound)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                break
+        return self.bounds[i] if i < len(self.bounds) else math.inf
+
+
+class UpdateStats:
+    """Counters for the update being handled in the current context"""
+
+    __slots__ = ("handler", "db_calls", "api_calls")
+
+    def __init__(self):
+        self.handler: Optional[str] = None
+        self.db_calls = 0
+        self.api_calls = 0
+
+
+_current_update: ContextVar[Optional[UpdateStats]] = ContextVar("metrics_current_update", default=None)
+
+
+class Metrics:
+    """Histograms keyed by (metric, label) plus gauges read from registered collectors"""
+
+    def __init__(self):
+        self.histograms: Dict[str, Dict[str, Histogram]] = {}
+        self._label_names: Dict[str, str] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, int]]] = {}
+        self.started_at = time.time()
+
+    def observe(self, metric: str, label_name: str, label: str, value: float,
+                buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        series = self.histograms.setdefault(metric, {})
+        self._label_names[metric] = label_name
+        histogram = series.get(label)
+        if histogram is None:
+            histogram = series[label] = Histogram(buckets)
+        histogram.observe(value)
+
+    def add_collector(self, name: str, collect: Callable[[], Dict[str, int]]):
+        """Export collect()'s counters as gauges named bot_<name>_<key>"""
+        self._collectors[name] = collect
+
+    def record_query(self, method: str, seconds: float):
+        """Database query hook: time per method, and one more DB call for the current update"""
+        self.observe("bot_db_query_seconds", "method", method, seconds)
+        stats = _current_update.get()
+        if stats is not None:
+            stats.db_calls += 1
+
+    def record_update(self, stats: UpdateStats, seconds: float):
+        handler = stats.handler or "unhandled"
+        self.observe("bot_handler_seconds", "handler", handler, seconds)
+        self.observe("bot_handler_db_calls", "handler", handler, stats.db_calls, CALL_COUNT_BUCKETS)
+        self.observe("bot_handler_api_calls", "handler", handler, stats.api_calls, CALL_COUNT_BUCKETS)
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        for metric, series in sorted(self.histograms.items()):
+            label_name = self._label_names[metric]
+            lines.append(f"# TYPE {metric} histogram")
+            for label, histogram in sorted(series.items()):
+                label_value = label.replace("\\", "\\\\").replace('"', '\\"')
+                cumulative = 0
+                for bound, n in zip(histogram.bounds + (math.inf,), histogram.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == math.inf else repr(float(bound))
+                    lines.append(f'{metric}_bucket{{{label_name}="{label_value}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{label_name}="{label_value}"}} {histogram.sum:.6f}')
+                lines.append(f'{metric}_count{{{label_name}="{label_value}"}} {histogram.count}')
+        for name, collect in sorted(self._collectors.items()):
+            for key, value in collect().items():
+                lines.append(f"# TYPE bot_{name}_{key} gauge")
+                lines.append(f"bot_{name}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, top: int = 10) -> str:
+        """Short plain-text digest for the admin /metrics command"""
+        handlers = self.histograms.get("bot_handler_seconds", {})
+        db_calls = self.histograms.get("bot_handler_db_calls", {})
+        api_calls = self.histograms.get("bot_handler_api_calls", {})
+        total = sum(histogram.count for histogram in handlers.values())
+        uptime_hours = (time.time() - self.started_at) / 3600
+
+        lines = [f"📈 Metrics: {total} updates in {uptime_hours:.1f} h", "", "Handlers by total time:"]
+        for name, histogram in sorted(handlers.items(), key=lambda item: -item[1].sum)[:top]:
+            lines.append(
+                f"• {name}: {histogram.count}×, p50 {_ms(histogram.quantile(0.5))}, "
+                f"p95 {_ms(histogram.quantile(0.95))}, "
+                f"DB {db_calls[name].sum / db_calls[name].count:.1f}, "
+                f"API {api_calls[name].sum / api_calls[name].count:.1f} per update"
+            )
+
+        queries = self.histograms.get("bot_db_query_seconds", {})
+        if queries:
+            lines += ["", "DB methods by total time:"]
+            for name, histogram in sorted(queries.items(), key=lambda item: -item[1].sum)[:top]:
+                lines.append(f"• {name}: {histogram.count}×, p95 {_ms(histogram.quantile(0.95))}")
+
+        for name, collect in sorted(self._collectors.items()):
+            values = ", ".join(f"{key} {value}" for key, value in collect().items())
+            lines += ["", f"{name}: {values}"]
+        return "\n".join(lines)
+
+
+def _ms(seconds: float) -> str:
+    """Bucket bound as shown to admins: "≤25 ms", or "> last bound" for the overflow bucket"""
+    if seconds == math.inf:
+        return f">{LATENCY_BUCKETS[-1]:g} s"
+    return f"≤{seconds * 1000:g} ms"
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer update middleware timing each update and recording its DB and API calls"""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+
+    async def __call__(self, handler, event, data):
+        stats = UpdateStats()
+        token = _current_update.set(stats)
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            _current_update.reset(token)
+            self.metrics.record_update(stats, time.perf_counter() - start)
+
+
+async def _name_handler(handler, event, data):
+    """Inner middleware: label the current update with the handler that took it"""
+    stats = _current_update.get()
+    if stats is not None:
+        callback = data["handler"].callback
+        module = getattr(callback, "__module__", "") or ""
+        stats.handler = f"{module.rsplit('.', 1)[-1]}.{getattr(callback, '__name__', type(callback).__name__)}"
+    return await handler(event, data)
+
+
+class ApiCallMetricsMiddleware(BaseRequestMiddleware):
+    """Bot session middleware counting Bot API calls per update and timing them per method.
+
+    Register it before the send queue so the time includes waiting for a send slot.
+    """
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+
+    async def __call__(self, make_request, bot, method):
+        stats = _current_update.get()
+        if stats is not None:
+            stats.api_calls += 1
+        start = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            self.metrics.observe("bot_api_request_seconds", "method", type(method).__name__,
+                                 time.perf_counter() - start)
+
+
+def instrument_dispatcher(dp: Dispatcher, metrics: Metrics):
+    """Time every update fed to dp and name the handler that took it.
+
+    Inner middlewares registered on dp also run for handlers of included routers.
+    """
+    dp.update.outer_middleware(UpdateMetricsMiddleware(metrics))
+    for name, observer in dp.observers.items():
+        if name not in _UNLABELLED_OBSERVERS:
+            observer.middleware(_name_handler)
+
+
+async def start_metrics_server(metrics: Metrics, host: str, port: int):
+    """Serve GET /metrics on host:port; returns the runner to clean up on shutdown"""
+    from aiohttp import web
+
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(
+            body=metrics.render_prometheus().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    return runner
+
+
+# Shared by the dispatcher middlewares, the Database hook and the admin command
+metrics = Metrics()
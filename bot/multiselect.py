@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, Optional, Set, Tuple
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import (
+    DeleteMessage, EditMessageCaption, EditMessageMedia, EditMessageReplyMarkup, EditMessageText
+)
+from aiogram.types import InlineKeyboardMarkup, Message
+
+logger = logging.getLogger(__name__)
+
+MessageKey = Tuple[int, int]
+
+# Requests that replace or remove a message's keyboard
+MESSAGE_EDITS = (EditMessageText, EditMessageReplyMarkup, EditMessageCaption, EditMessageMedia, DeleteMessage)
+
+# Set inside the editor's own tasks so the middleware lets their requests through
+_applying: ContextVar[bool] = ContextVar("markup_editor_applying", default=False)
+
+
+def markup_fingerprint(markup: Optional[InlineKeyboardMarkup]) -> str:
+    """Short digest of what a keyboard looks like (button texts and payloads)"""
+    if markup is None:
+        return ""
+    dumped = json.dumps(markup.model_dump(exclude_none=True), sort_keys=True, ensure_ascii=False)
+    return hashlib.md5(dumped.encode()).hexdigest()
+
+
+class MarkupEditor:
+    """Coalescing edit_reply_markup for multiselect keyboards.
+
+    Edits for one message are applied in the background after a short debounce window;
+    a newer keyboard submitted meanwhile replaces the pending one, so a burst of taps
+    becomes a single edit. The rendered keyboard of each message is remembered and edits
+    that would not change it are skipped instead of failing with "message is not modified".
+    """
+
+    def __init__(self, debounce: float = 0.15, max_messages: int = 1024):
+        self.debounce = debounce
+        self.max_messages = max_messages
+
+        self._rendered: "OrderedDict[MessageKey, str]" = OrderedDict()
+        self._pending: Dict[MessageKey, Tuple[Message, InlineKeyboardMarkup]] = {}
+        self._tasks: Dict[MessageKey, asyncio.Task] = {}
+        self._in_flight: Set[MessageKey] = set()
+        self._edits = 0
+        self._skipped = 0
+        self._coalesced = 0
+        self._failed = 0
+
+    async def edit(self, message: Message, reply_markup: InlineKeyboardMarkup):
+        """Schedule message's keyboard to become reply_markup"""
+        key = (message.chat.id, message.message_id)
+        if key not in self._tasks:
+            # Nothing of ours is on the way, so the keyboard the callback came from is on screen
+            self._remember(key, markup_fingerprint(message.reply_markup))
+        if key in self._pending:
+            self._coalesced += 1
+        self._pending[key] = (message, reply_markup)
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._apply(key))
+
+    async def _apply(self, key: MessageKey):
+        _applying.set(True)
+        try:
+            # Loops while taps keep arriving during the debounce or the edit itself
+            while key in self._pending:
+                await asyncio.sleep(self.debounce)
+                pending = self._pending.pop(key, None)
+                if pending is None:
+                    break
+                message, markup = pending
+                fingerprint = markup_fingerprint(markup)
+                if self._rendered.get(key) == fingerprint:
+                    self._skipped += 1
+                    continue
+                self._in_flight.add(key)
+                try:
+                    await message.edit_reply_markup(reply_markup=markup)
+                    self._edits += 1
+                except TelegramBadRequest as e:
+                    if "message is not modified" not in str(e):
+                        logger.warning(f"Keyboard edit failed in chat {key[0]}: {e}")
+                        self._failed += 1
+                        continue
+                    self._skipped += 1
+                except Exception as e:
+                    # Flood control, network errors: nobody awaits this task, so log and
+                    # move on; the next tap re-sends the whole keyboard anyway
+                    logger.warning(f"Keyboard edit failed in chat {key[0]}: {e!r}")
+                    self._failed += 1
+                    continue
+                finally:
+                    self._in_flight.discard(key)
+                self._remember(key, fingerprint)
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+
+    async def supersede(self, key: MessageKey):
+        """Drop the pending keyboard for a message that is being edited by other means.
+
+        An edit already on its way is awaited so the newer request lands after it.
+        """
+        self._pending.pop(key, None)
+        self._rendered.pop(key, None)
+        task = self._tasks.get(key)
+        if task is None:
+            return
+        if key in self._in_flight:
+            await asyncio.gather(task, return_exceptions=True)
+        else:
+            # It may not have started yet, in which case it can't unregister itself
+            del self._tasks[key]
+            task.cancel()
+
+    def _remember(self, key: MessageKey, fingerprint: str):
+        self._rendered[key] = fingerprint
+        self._rendered.move_to_end(key)
+        while len(self._rendered) > self.max_messages:
+            self._rendered.popitem(last=False)
+
+    async def wait_applied(self, chat_id: int):
+        """Wait until the keyboards scheduled for chat_id's messages are on screen"""
+        while True:
+            tasks = [task for key, task in self._tasks.items() if key[0] == chat_id]
+            if not tasks:
+                return
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def close(self):
+        """Apply edits still waiting out their debounce window"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "edits": self._edits,
+            "skipped": self._skipped,
+            "coalesced": self._coalesced,
+            "failed": self._failed,
+            "pending": len(self._pending),
+        }
+
+
+class MarkupEditorMiddleware(BaseRequestMiddleware):
+    """Bot session middleware keeping a MarkupEditor from overwriting newer message edits"""
+
+    def __init__(self, editor: MarkupEditor):
+        self.editor = editor
+
+    async def __call__(self, make_request, bot, method):
+        if isinstance(method, MESSAGE_EDITS) and not _applying.get():
+            chat_id, message_id = getattr(method, "chat_id", None), getattr(method, "message_id", None)
+            if chat_id is not None and message_id is not None:
+                await self.editor.supersede((chat_id, message_id))
+        return await make_request(bot, method)
+
+
+markup_editor = MarkupEditor()
+
+
+async def edit_markup(message: Message, reply_markup: InlineKeyboardMarkup):
+    """Update a multiselect keyboard through the shared editor"""
+    await markup_editor.edit(message, reply_markup)
@@ -0,0 +1,202 @@
+import asyncio
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Set
+
+from aiogram import Router
+from aiogram.filters import Filter
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup
+
+from bot.item_hashes import find_item_by_hash
+from bot.keyboards import get_category_items_keyboard, get_cities_select_keyboard, get_multiselect_keyboard
+from bot.multiselect import edit_markup
+
+
+class Question(ABC):
+    """A multiselect step of the questionnaire.
+
+    Option buttons send `<prefix>:<item hash>` and toggle the item in the FSM data list
+    under selected_key; paginated questions page with `<prefix>_page:<n>`.
+    """
+
+    paginated = False
+
+    def __init__(self, state: State, prefix: str, selected_key: str,
+                 done_callback: Optional[str] = None, back_callback: Optional[str] = None):
+        self.state = state
+        self.prefix = prefix
+        self.selected_key = selected_key
+        self.done_callback = done_callback or f"{prefix}_done"
+        self.back_callback = back_callback or f"{prefix}_back"
+        self.page_key = f"{prefix}_page"
+
+    @abstractmethod
+    def options(self, data: Dict[str, Any]) -> Sequence[str]:
+        """Items the option buttons can select"""
+
+    @abstractmethod
+    def keyboard(self, data: Dict[str, Any], selected: Set[str]) -> InlineKeyboardMarkup:
+        """Keyboard showing the options with selected marked"""
+
+    def ready(self, data: Dict[str, Any]) -> bool:
+        """Whether the FSM data has what keyboard() needs"""
+        return True
+
+
+class OptionsQuestion(Question):
+    """Paginated choice from a fixed option list"""
+
+    paginated = True
+
+    def __init__(self, state: State, prefix: str, selected_key: str, options: Sequence[str], **kwargs):
+        super().__init__(state, prefix, selected_key, **kwargs)
+        self._options = options
+
+    def options(self, data):
+        return self._options
+
+    def keyboard(self, data, selected):
+        return get_multiselect_keyboard(
+            self._options, selected, self.prefix, self.done_callback, self.back_callback,
+            page=data.get(self.page_key, 0), page_callback_prefix=self.page_key,
+        )
+
+
+class LocationQuestion(Question):
+    """Choice of places laid out two per row on one page"""
+
+    def __init__(self, state: State, prefix: str, selected_key: str, options: Sequence[str],
+                 keyboard_builder: Callable[..., InlineKeyboardMarkup] = get_cities_select_keyboard, **kwargs):
+        super().__init__(state, prefix, selected_key, **kwargs)
+        self._options = options
+        self._keyboard_builder = keyboard_builder
+
+    def options(self, data):
+        return self._options
+
+    def keyboard(self, data, selected):
+        return self._keyboard_builder(self.prefix, self.done_callback, selected, self.back_callback)
+
+
+class CategoryItemsQuestion(Question):
+    """Paginated choice among the items of the category stored under category_key.
+
+    Categories are walked in order, so Done reads "Next" until the last one.
+    """
+
+    paginated = True
+
+    def __init__(self, state: State, prefix: str, selected_key: str, categories: Dict[str, Dict],
+                 category_key: str, **kwargs):
+        super().__init__(state, prefix, selected_key, **kwargs)
+        self.categories = categories
+        self.category_key = category_key
+        self._order = list(categories)
+
+    def options(self, data):
+        return self.categories.get(data.get(self.category_key), {}).get("items", [])
+
+    def next_category(self, category: str) -> Optional[str]:
+        if category not in self._order:
+            return None
+        idx = self._order.index(category) + 1
+        return self._order[idx] if idx < len(self._order) else None
+
+    def keyboard(self, data, selected):
+        category = data.get(self.category_key)
+        return get_category_items_keyboard(
+            category, self.categories, selected, self.prefix, self.done_callback, self.back_callback,
+            page=data.get(self.page_key, 0), page_callback_prefix=self.page_key,
+            done_text="Next ➡️" if self.next_category(category) else "🆗 Done",
+        )
+
+    def ready(self, data):
+        return bool(data.get(self.category_key))
+
+
+class _QuestionFilter(Filter):
+    """Resolves a callback to its question with one lookup on the callback prefix"""
+
+    def __init__(self, questions: Dict[str, Question]):
+        self.questions = questions
+
+    async def __call__(self, callback: CallbackQuery, raw_state: Optional[str] = None):
+        prefix, sep, value = (callback.data or "").partition(":")
+        question = self.questions.get(prefix)
+        if question is None or not sep or raw_state != question.state.state:
+            return False
+        return {"question": question, "value": value}
+
+    def callback_heads(self):
+        """Callback prefixes this filter can accept, for routing indexes"""
+        return self.questions.keys()
+
+
+class KeyedLocks:
+    """One asyncio.Lock per key, kept only while someone holds or waits for it"""
+
+    def __init__(self):
+        self._locks: Dict[Hashable, List] = {}  # key -> [lock, holders and waiters]
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable):
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    def __len__(self):
+        return len(self._locks)
+
+
+class Questionnaire:
+    """Generic toggle and page handlers for a set of multiselect questions.
+
+    Rapid taps from one user are handled concurrently, so each handler's read-modify-write
+    of the FSM data runs under a lock for that user's storage key; replies are sent
+    outside it so queued sends never hold up the next tap.
+    """
+
+    def __init__(self, questions: Iterable[Question]):
+        self.questions: Dict[str, Question] = {}
+        for question in questions:
+            if question.prefix in self.questions:
+                raise ValueError(f"Duplicate question prefix: {question.prefix}")
+            self.questions[question.prefix] = question
+        self.pages = {q.page_key: q for q in self.questions.values() if q.paginated}
+        self._locks = KeyedLocks()
+
+    def __getitem__(self, prefix: str) -> Question:
+        return self.questions[prefix]
+
+    def register(self, router: Router):
+        router.callback_query.register(self.toggle, _QuestionFilter(self.questions))
+        router.callback_query.register(self.page, _QuestionFilter(self.pages))
+
+    async def toggle(self, callback: CallbackQuery, state: FSMContext, question: Question, value: str):
+        async with self._locks.hold(state.key):
+            data = await state.get_data()
+            item = find_item_by_hash(question.options(data), value)
+            if item:
+                selected = set(data.get(question.selected_key, []))
+                selected ^= {item}
+                data = await state.update_data({question.selected_key: list(selected)})
+                # Only schedules the (debounced) edit, so this stays quick
+                await edit_markup(callback.message, reply_markup=question.keyboard(data, selected))
+        await callback.answer()
+
+    async def page(self, callback: CallbackQuery, state: FSMContext, question: Question, value: str):
+        async with self._locks.hold(state.key):
+            data = await state.get_data()
+            if value.isdigit() and question.ready(data):
+                data = await state.update_data({question.page_key: int(value)})
+                selected = set(data.get(question.selected_key, []))
+                await edit_markup(callback.message, reply_markup=question.keyboard(data, selected))
+        await callback.answer()
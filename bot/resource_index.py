@@ -0,0 +1,159 @@
+import json
+from typing import Dict, List, Optional, Tuple
+
+from bot.form_data import SKILL_CATEGORIES, INTRO_CATEGORIES, RESOURCE_ACCESS_CATEGORIES
+
+
+# Question slug under which the full questionnaire is stored in user_answers
+REGISTRATION_SLUG = "registration_data"
+
+# Mapping from category to questionnaire data keys
+CATEGORY_DATA_MAPPING = {
+    "Businesses, Spaces & Platforms": {
+        "items_key": "selected_ra_items",
+        "cities_key": None,
+        "extra_keys": []
+    },
+    "Skills and Knowledge": {
+        "items_key": "selected_skill_items",
+        "cities_key": None,
+        "extra_keys": []
+    },
+    "Personal Introductions to Key People": {
+        "items_key": "selected_intro_items",
+        "cities_key": "selected_intro_cities",
+        "extra_keys": []
+    },
+    "Real Estate": {
+        "items_key": "selected_property_types",
+        "cities_key": "selected_prop_cities",
+        "extra_keys": []
+    },
+    "Cars and Other Vehicles": {
+        "items_key": "car_info",  # Single value
+        "cities_key": "selected_car_cities",
+        "extra_keys": []
+    },
+    "Equipment": {
+        "items_key": "selected_equipment_types",
+        "cities_key": "selected_equip_cities",
+        "extra_keys": []
+    },
+    "Air Transport": {
+        "items_key": "selected_aircraft_types",
+        "cities_key": "selected_air_cities",
+        "extra_keys": []
+    },
+    "Water Transport / Vessels": {
+        "items_key": "selected_vessel_types",
+        "cities_key": "selected_vessel_cities",
+        "extra_keys": []
+    },
+    "Specialists": {
+        "items_key": "specialists_list",
+        "cities_key": None,
+        "extra_keys": []
+    },
+    "Artworks": {
+        "items_key": "art_form",
+        "cities_key": "art_location",
+        "extra_keys": ["art_author_name", "art_link"]
+    }
+}
+
+# Categories browsed through subcategories whose items come from form_data
+SUBCATEGORY_SOURCES = {
+    "Businesses, Spaces & Platforms": RESOURCE_ACCESS_CATEGORIES,
+    "Skills and Knowledge": SKILL_CATEGORIES,
+    "Personal Introductions to Key People": INTRO_CATEGORIES,
+}
+
+
+def _build_item_subcategories() -> Dict[str, Dict[str, List[str]]]:
+    """category -> item -> subcategory keys that list this item"""
+    index = {}
+    for category, subcategories in SUBCATEGORY_SOURCES.items():
+        items = index.setdefault(category, {})
+        for key, sub in subcategories.items():
+            for item in sub["items"]:
+                items.setdefault(item, []).append(key)
+    return index
+
+
+ITEM_SUBCATEGORIES = _build_item_subcategories()
+
+
+def format_specialist(spec: Dict) -> str:
+    """One-line description of a recommended specialist"""
+    info = f"{spec.get('name', 'Unknown')}"
+    if spec.get("contact"):
+        info += f" — {spec['contact']}"
+    return info
+
+
+def _as_list(value) -> list:
+    if not value:
+        return []
+    if isinstance(value, (str, dict)):
+        return [value]
+    return list(value)
+
+
+def _extra_info(reg_data: dict, extra_keys: List[str]) -> str:
+    extra_info = []
+    for key in extra_keys:
+        value = reg_data.get(key)
+        if value:
+            # specifically check for art link to format it nicely
+            if key == "art_link":
+                extra_info.append(f"🔗 Link: {value}")
+            elif key == "art_author_name":
+                extra_info.append(f"🐥 Author: {value}")
+            elif isinstance(value, list):
+                extra_info.extend(str(v) for v in value)
+            else:
+                extra_info.append(str(value))
+    return "\n".join(extra_info)
+
+
+def extract_resource_items(reg_data: dict) -> List[Tuple[str, str, str, Optional[str], int, str]]:
+    """Flatten questionnaire answers into resource_items rows.
+
+    Returns (category, subcategory, item, city, position, extra) tuples. city is None
+    when the section has no location (the owner's main city is shown instead) and
+    subcategory is "" for categories that are not split into subcategories.
+    """
+    rows = []
+    for category, mapping in CATEGORY_DATA_MAPPING.items():
+        items = _as_list(reg_data.get(mapping["items_key"]))
+        if not items:
+            continue
+
+        cities = []
+        if mapping["cities_key"]:
+            cities = [city for city in _as_list(reg_data.get(mapping["cities_key"])) if city]
+        extra = _extra_info(reg_data, mapping["extra_keys"])
+        item_subcategories = ITEM_SUBCATEGORIES.get(category, {})
+
+        for position, item in enumerate(items):
+            if category == "Specialists" and isinstance(item, dict):
+                subcategories = [item.get("category") or ""]
+                item = format_specialist(item)
+            else:
+                item = str(item)
+                subcategories = item_subcategories.get(item) or [""]
+            for subcategory in subcategories:
+                for city in cities or [None]:
+                    rows.append((category, subcategory, item, city, position, extra))
+    return rows
+
+
+def extract_resource_items_from_json(answer_data: str) -> List[Tuple[str, str, str, Optional[str], int, str]]:
+    """Same as extract_resource_items, for a stored JSON blob (invalid JSON yields no rows)"""
+    try:
+        reg_data = json.loads(answer_data)
+    except (TypeError, ValueError):
+        return []
+    if not isinstance(reg_data, dict):
+        return []
+    return extract_resource_items(reg_data)
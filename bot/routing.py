@@ -0,0 +1,150 @@
+import logging
+import operator
+from typing import FrozenSet, Iterable, Optional, Set, Tuple
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import FilterObject, HandlerObject
+from aiogram.filters import Filter
+from aiogram.types import CallbackQuery
+from magic_filter import MagicFilter
+from magic_filter.operations import (
+    CallOperation, ComparatorOperation, FunctionOperation, GetAttributeOperation,
+    ImportantCombinationOperation
+)
+from magic_filter.util import in_op, or_op
+
+logger = logging.getLogger(__name__)
+
+
+def callback_head(data: str) -> str:
+    """Routing key of callback data: the text before the first ':'"""
+    return data.partition(":")[0]
+
+
+class CallbackPatterns:
+    """Callback data a handler can match: exact heads, plus head prefixes for
+    startswith() arguments that stop before the first ':'"""
+
+    def __init__(self):
+        self.heads: Set[str] = set()
+        self.head_prefixes: Set[str] = set()
+
+    def add_exact(self, data: str):
+        self.heads.add(callback_head(data))
+
+    def add_prefix(self, prefix: str):
+        if ":" in prefix:
+            self.heads.add(callback_head(prefix))
+        else:
+            self.head_prefixes.add(prefix)
+
+    def update(self, other: "CallbackPatterns"):
+        self.heads |= other.heads
+        self.head_prefixes |= other.head_prefixes
+
+
+def _magic_patterns(magic: MagicFilter) -> Optional[CallbackPatterns]:
+    """Patterns of an F.data == / .in_() / .startswith() filter (and | of those), else None"""
+    operations = list(magic._operations)
+    if not operations or not isinstance(operations[0], GetAttributeOperation) or operations[0].name != "data":
+        return None
+    patterns = CallbackPatterns()
+    rest = operations[1:]
+    if rest and isinstance(rest[-1], ImportantCombinationOperation) and rest[-1].combinator is or_op:
+        right = rest.pop().right
+        other = _magic_patterns(right) if isinstance(right, MagicFilter) else None
+        if other is None:
+            return None
+        patterns.update(other)
+
+    if len(rest) == 1 and isinstance(rest[0], ComparatorOperation) and rest[0].comparator is operator.eq:
+        values = [rest[0].right]
+    elif len(rest) == 1 and isinstance(rest[0], FunctionOperation) and rest[0].function is in_op:
+        values = list(rest[0].args[0])
+    elif (len(rest) == 2 and isinstance(rest[0], GetAttributeOperation) and rest[0].name == "startswith"
+          and isinstance(rest[1], CallOperation) and len(rest[1].args) == 1 and not rest[1].kwargs):
+        prefixes = rest[1].args[0]
+        prefixes = prefixes if isinstance(prefixes, tuple) else (prefixes,)
+        if not all(isinstance(p, str) and p for p in prefixes):
+            return None
+        for prefix in prefixes:
+            patterns.add_prefix(prefix)
+        return patterns
+    else:
+        return None
+
+    if not all(isinstance(v, str) for v in values):
+        return None
+    for value in values:
+        patterns.add_exact(value)
+    return patterns
+
+
+def handler_patterns(handler: HandlerObject) -> Optional[CallbackPatterns]:
+    """Callback data the handler can match, or None if any data can reach it"""
+    for filter_object in handler.filters or ():
+        magic = getattr(filter_object, "magic", None)
+        if magic is not None:
+            patterns = _magic_patterns(magic)
+        else:
+            # Custom filters can declare their heads (e.g. the questionnaire's)
+            heads = getattr(filter_object.callback, "callback_heads", None)
+            if heads is None:
+                continue
+            patterns = CallbackPatterns()
+            patterns.heads.update(heads())
+        if patterns is not None:
+            # Filters are ANDed, so one restrictive filter bounds the handler
+            return patterns
+    return None
+
+
+class CallbackHeadFilter(Filter):
+    """Router-level filter letting through only callbacks whose head a handler can match"""
+
+    def __init__(self, heads: Iterable[str], head_prefixes: Iterable[str] = ()):
+        self.heads: FrozenSet[str] = frozenset(heads)
+        self.head_prefixes: Tuple[str, ...] = tuple(sorted(head_prefixes))
+
+    async def __call__(self, callback: CallbackQuery) -> bool:
+        if callback.data is None:
+            return False
+        head = callback_head(callback.data)
+        return head in self.heads or head.startswith(self.head_prefixes)
+
+
+def index_callback_router(router: Router) -> bool:
+    """Index router's callback_query handlers by callback head; returns whether it did.
+
+    The router gets a CallbackHeadFilter for the union of its handlers' heads, and each
+    handler one for its own heads in front of its other filters: aiogram runs sync
+    filters such as F.data checks in a thread pool, so rejecting a callback with an
+    awaitable set lookup first is much cheaper. Routers with a handler that can see
+    any callback data are left alone.
+    """
+    if router.sub_routers or not router.callback_query.handlers:
+        return False
+    handlers = router.callback_query.handlers
+    handler_pattern_list = [handler_patterns(handler) for handler in handlers]
+    if any(patterns is None for patterns in handler_pattern_list):
+        return False
+    router_patterns = CallbackPatterns()
+    for handler, patterns in zip(handlers, handler_pattern_list):
+        router_patterns.update(patterns)
+        handler.filters.insert(0, FilterObject(callback=CallbackHeadFilter(patterns.heads, patterns.head_prefixes)))
+    router.callback_query.filter(CallbackHeadFilter(router_patterns.heads, router_patterns.head_prefixes))
+    return True
+
+
+def index_callback_routes(root: Router) -> int:
+    """Index every router included in root so a callback skips routers and handlers that
+    can't take it with set lookups. Returns the number of routers indexed."""
+    indexed = 0
+    for router in root.chain_tail:
+        if router is root:
+            continue
+        if index_callback_router(router):
+            indexed += 1
+        else:
+            logger.info(f"Callback routing not indexed for {router}")
+    return indexed
@@ -0,0 +1,244 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    CopyMessage,
+    ForwardMessage,
+    SendAnimation,
+    SendAudio,
+    SendContact,
+    SendDice,
+    SendDocument,
+    SendLocation,
+    SendMediaGroup,
+    SendMessage,
+    SendPhoto,
+    SendPoll,
+    SendSticker,
+    SendVenue,
+    SendVideo,
+    SendVideoNote,
+    SendVoice,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bot API methods that post a new message into a chat (these are what Telegram rate limits)
+QUEUED_METHODS = (
+    SendMessage, SendPhoto, SendDocument, SendMediaGroup, SendVideo, SendAnimation,
+    SendAudio, SendVoice, SendVideoNote, SendSticker, SendLocation, SendVenue,
+    SendContact, SendPoll, SendDice, CopyMessage, ForwardMessage,
+)
+
+
+class TokenBucket:
+    """rate tokens per second, holding at most burst tokens"""
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class SendQueue:
+    """Central outbound queue enforcing Telegram's global and per-chat send budgets.
+
+    Jobs are kept per chat in FIFO order and at most one job per chat is in flight, so
+    messages to one chat are never reordered. Chats are served round-robin. On
+    TelegramRetryAfter all sending pauses for the server-provided delay and the job is
+    retried up to max_retries times.
+    """
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1, chat_burst: float = 3,
+                 max_retries: int = 3):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+
+        self._chats: Dict[Any, Deque[Tuple[Callable[[], Awaitable], asyncio.Future]]] = {}
+        self._buckets: Dict[Any, TokenBucket] = {}
+        self._global: Optional[TokenBucket] = None
+        self._in_flight: Set[Any] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._paused_until = 0.0
+
+        self._sent = 0
+        self._retries = 0
+        self._failed = 0
+        self._max_queued = 0
+
+    def start(self):
+        """Start the dispatch loop; until then submit() sends immediately"""
+        if self._worker is None:
+            self._global = TokenBucket(self.global_rate, self.global_rate, self._now())
+            self._worker = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop dispatching, cancel jobs still waiting and wait for in-flight sends"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        for jobs in self._chats.values():
+            for _, future in jobs:
+                future.cancel()
+        self._chats.clear()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Queue depth and counters"""
+        return {
+            "queued": sum(len(jobs) for jobs in self._chats.values()),
+            "chats_waiting": len(self._chats),
+            "in_flight": len(self._in_flight),
+            "max_queued": self._max_queued,
+            "sent": self._sent,
+            "retries": self._retries,
+            "failed": self._failed,
+        }
+
+    async def submit(self, chat_id, call: Callable[[], Awaitable]):
+        """Queue call() for chat_id and return its result once it has been sent"""
+        if self._worker is None:
+            return await call()
+        future = asyncio.get_running_loop().create_future()
+        self._chats.setdefault(chat_id, deque()).append((call, future))
+        self._max_queued = max(self._max_queued, self.stats()["queued"])
+        self._wakeup.set()
+        return await future
+
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_running_loop().time()
+
+    def _next_chat(self, now: float) -> Tuple[Any, Optional[float]]:
+        """(chat ready to send now, None) or (None, seconds until one might be ready)"""
+        wait = None
+        for chat_id in self._chats:
+            if chat_id in self._in_flight:
+                continue
+            bucket = self._buckets.get(chat_id)
+            delay = bucket.delay(now) if bucket else 0.0
+            if delay == 0:
+                return chat_id, None
+            wait = delay if wait is None else min(wait, delay)
+        return None, wait
+
+    async def _run(self):
+        while True:
+            now = self._now()
+            if self._paused_until > now:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            chat_id, wait = self._next_chat(now)
+            if chat_id is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            delay = self._global.delay(now)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            self._global.take(now)
+            bucket = self._buckets.get(chat_id)
+            if bucket is None:
+                bucket = self._buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst, now)
+            bucket.take(now)
+
+            # Round-robin: the chat goes to the back of the line
+            jobs = self._chats.pop(chat_id)
+            call, future = jobs.popleft()
+            if jobs:
+                self._chats[chat_id] = jobs
+            self._forget_idle_buckets(now)
+
+            if future.done():
+                # The caller gave up while waiting
+                continue
+            self._in_flight.add(chat_id)
+            task = asyncio.create_task(self._send(chat_id, call, future))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _forget_idle_buckets(self, now: float):
+        """Drop buckets that have refilled completely for chats with nothing queued"""
+        if len(self._buckets) < 1024:
+            return
+        for chat_id in list(self._buckets):
+            if chat_id not in self._chats and chat_id not in self._in_flight:
+                bucket = self._buckets[chat_id]
+                bucket.delay(now)  # refills
+                if bucket.tokens >= bucket.burst:
+                    del self._buckets[chat_id]
+
+    async def _send(self, chat_id, call: Callable[[], Awaitable], future: asyncio.Future):
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    result = await call()
+                except TelegramRetryAfter as e:
+                    if attempt == self.max_retries:
+                        raise
+                    self._retries += 1
+                    logger.warning(f"Flood control in chat {chat_id}, retrying in {e.retry_after}s")
+                    self._paused_until = max(self._paused_until, self._now() + e.retry_after)
+                    await asyncio.sleep(e.retry_after)
+                else:
+                    self._sent += 1
+                    if not future.done():
+                        future.set_result(result)
+                    return
+        except Exception as e:
+            self._failed += 1
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self._in_flight.discard(chat_id)
+            self._wakeup.set()
+
+
+class SendQueueMiddleware(BaseRequestMiddleware):
+    """Bot session middleware routing message sends through a SendQueue"""
+
+    def __init__(self, queue: SendQueue):
+        self.queue = queue
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None or not isinstance(method, QUEUED_METHODS):
+            return await make_request(bot, method)
+        return await self.queue.submit(chat_id, lambda: make_request(bot, method))
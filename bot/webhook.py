@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from typing import Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+async def health(request: web.Request) -> web.Response:
+    """Liveness probe for the load balancer / platform router"""
+    return web.json_response({"status": "ok"})
+
+
+def create_app(dp: Dispatcher, bot: Bot, path: str, secret_token: str,
+               handle_in_background: bool = True) -> web.Application:
+    """aiohttp app feeding POSTed updates at path into dp; GET /health for probes.
+
+    Requests without the matching X-Telegram-Bot-Api-Secret-Token header get 401.
+    With handle_in_background the update is acknowledged before handlers run.
+    """
+    if not secret_token:
+        raise ValueError("A webhook secret token is required")
+    app = web.Application()
+    app.router.add_get("/health", health)
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=secret_token,
+        handle_in_background=handle_in_background
+    ).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, host: str, port: int, path: str,
+                      secret_token: str, webhook_url: Optional[str] = None):
+    """Serve updates until cancelled. Registers webhook_url + path with Telegram when given,
+    otherwise the webhook is expected to be set up externally."""
+    app = create_app(dp, bot, path, secret_token)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, host=host, port=port)
+        await site.start()
+        logger.info(f"Webhook server listening on {host}:{port}{path}")
+
+        if webhook_url:
+            await bot.set_webhook(
+                url=webhook_url.rstrip("/") + path,
+                secret_token=secret_token,
+                allowed_updates=dp.resolve_used_update_types()
+            )
+            logger.info("Webhook registered with Telegram")
+        else:
+            logger.warning("WEBHOOK_URL is not set: updates arrive only if the webhook was registered externally")
+
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -1,10 +1,27 @@
 #!/usr/bin/env python3
 """
 Bot runner script
+
+Usage:
+    python run.py                    start the bot
+    python run.py --startup-report   show where import time goes at startup and exit
 """
+import argparse
+
 
 if __name__ == "__main__":
-    from bot.main import main
-    import asyncio
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--startup-report", action="store_true",
+                        help="import the bot in a fresh interpreter and report import times")
+    parser.add_argument("--top", type=int, default=20, help="rows per section of the startup report")
+    args = parser.parse_args()
+
+    if args.startup_report:
+        from bot.importtime import collect, format_report
+
+        print(format_report(collect("bot.main"), top=args.top))
+    else:
+        from bot.main import main
+        import asyncio
 
-    asyncio.run(main())
+        asyncio.run(main())
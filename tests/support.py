@@ -0,0 +1,60 @@
+"""Updates and a Bot for feeding handlers through a Dispatcher in tests"""
+from typing import List, Tuple
+
+from aiogram import Bot
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+
+
+def message_update(update_id, user_id, text):
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 1700000000,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    })
+
+
+def callback_update(update_id, user_id, data):
+    """A button tap on a bot message in the user's private chat"""
+    return Update.model_validate({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "chat_instance": "1",
+            "data": data,
+            "message": {
+                "message_id": update_id, "date": 1700000000,
+                "chat": {"id": user_id, "type": "private"}, "text": "Message",
+            },
+        },
+    })
+
+
+def inline_update(update_id, user_id, query, offset=""):
+    return Update.model_validate({
+        "update_id": update_id,
+        "inline_query": {
+            "id": str(update_id),
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "query": query,
+            "offset": offset,
+        },
+    })
+
+
+def recording_bot() -> Tuple[Bot, List[TelegramMethod]]:
+    """Bot whose API requests are appended to the returned list instead of sent;
+    every request succeeds with True. Close bot.session when done."""
+    requests = []
+    bot = Bot(token="42:TEST")
+
+    async def record(make_request, bot, method):
+        requests.append(method)
+        return True
+    bot.session.middleware(record)
+    return bot, requests
@@ -1,8 +1,12 @@
+import asyncio
+import json
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
-from bot.database import Database
+from bot.database import Database, decode_cursor, encode_cursor
+from bot.form_data import SKILL_CATEGORIES
 
 
 class GetUsersByCityTests(unittest.IsolatedAsyncioTestCase):
@@ -38,6 +42,7 @@ class GetUsersByCityTests(unittest.IsolatedAsyncioTestCase):
         await self.db.set_user_hidden(4, True)
 
     async def asyncTearDown(self):
+        await self.db.close()
         self.temp_dir.cleanup()
 
     async def test_finds_single_and_multiple_city_users(self):
@@ -60,6 +65,583 @@ class GetUsersByCityTests(unittest.IsolatedAsyncioTestCase):
 
         self.assertNotIn(4, {user["user_id"] for user in users})
 
+    async def test_deleted_user_leaves_city(self):
+        await self.db.delete_user(2)
+
+        self.assertEqual(await self.db.get_users_by_city("London 🇬🇧"), [])
+
+    async def test_backfills_users_saved_without_memberships(self):
+        async with self.db._connection() as conn:
+            await conn.execute("""
+                INSERT INTO users (user_id, name, main_city, current_city)
+                VALUES (5, 'Legacy', 'Rome 🇮🇹', 'Rome 🇮🇹, Paris 🇫🇷')
+            """)
+            await conn.commit()
+
+        await self.db.init_db()
+        users = await self.db.get_users_by_city("Rome 🇮🇹")
+
+        self.assertEqual([user["user_id"] for user in users], [5])
+        self.assertIn("Rome 🇮🇹", await self.db.get_all_cities())
+
+
+class ConnectionPoolTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"), pool_size=2)
+        await self.db.init_db()
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def test_pooled_connections_are_reused(self):
+        await self.db.add_user(1, "u", "User", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+        await asyncio.gather(*(self.db.get_user(1) for _ in range(10)))
+
+        self.assertEqual(len(self.db._pool_connections), 2)
+        self.assertEqual(self.db._pool.qsize(), 2)
+
+    async def test_failed_write_does_not_leak_transaction(self):
+        await self.db.add_user(1, "u", "User", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+        # Duplicate primary key fails inside the borrowed connection
+        self.assertFalse(
+            await self.db.add_user(1, "u", "User", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+        )
+
+        for conn in self.db._pool_connections:
+            self.assertFalse(conn.in_transaction)
+
+    async def test_works_without_pool(self):
+        await self.db.close()
+
+        await self.db.add_user(1, "u", "User", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+        user = await self.db.get_user(1)
+
+        self.assertEqual(user["name"], "User")
+
+
+class PragmaProfileTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"))
+        await self.db.init_db()
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def _pragma(self, name):
+        async with self.db._connection() as conn:
+            async with conn.execute(f"PRAGMA {name}") as cursor:
+                return (await cursor.fetchone())[0]
+
+    async def test_profile_applied_to_pooled_connections(self):
+        self.assertEqual(await self._pragma("journal_mode"), "wal")
+        self.assertEqual(await self._pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(await self._pragma("busy_timeout"), 5000)
+
+    async def test_profile_applied_without_pool(self):
+        await self.db.close()
+
+        self.assertEqual(await self._pragma("busy_timeout"), 5000)
+
+    async def test_rejects_unsafe_pragma_values(self):
+        db = Database(self.db.db_path, pragmas={"journal_mode": "WAL; DROP TABLE users"})
+
+        with self.assertRaises(ValueError):
+            await db.init_db()
+
+    async def test_rejects_old_sqlite(self):
+        db = Database(self.db.db_path)
+
+        with mock.patch("sqlite3.sqlite_version_info", (3, 31, 1)):
+            with self.assertRaisesRegex(RuntimeError, "SQLite 3.35"):
+                await db.init_db()
+
+
+class ResourceIndexTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"))
+        await self.db.init_db()
+
+        await self.db.add_user(1, "owner", "Owner", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+        await self.db.add_user(2, "hidden", "Hidden", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+        await self.db.set_user_hidden(2, True)
+        self.registration = {
+            "selected_property_types": ["Apartment", "Land"],
+            "selected_prop_cities": ["Paris 🇫🇷", "Berlin 🇩🇪"],
+            "selected_skill_items": [SKILL_CATEGORIES["A"]["items"][0]],
+            "specialists_list": [
+                {"category": "real_estate_spec", "name": "Ann", "contact": "@ann"},
+            ],
+            "art_form": "Painting",
+            "art_author_name": "Me",
+        }
+        for user_id in (1, 2):
+            await self.db.add_user_answer(user_id, "registration_data", json.dumps(self.registration))
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def test_groups_items_and_cities_per_owner(self):
+        resources = await self.db.get_resource_items("Real Estate")
+
+        self.assertEqual(len(resources), 1)
+        self.assertEqual(resources[0]["user_id"], 1)
+        self.assertEqual(resources[0]["items"], ["Apartment", "Land"])
+        self.assertEqual(resources[0]["cities"], ["Paris 🇫🇷", "Berlin 🇩🇪"])
+
+    async def test_filters_by_subcategory(self):
+        skills = await self.db.get_resource_items("Skills and Knowledge", "A")
+        other_skills = await self.db.get_resource_items("Skills and Knowledge", "B")
+        specialists = await self.db.get_resource_items("Specialists", "real_estate_spec")
+
+        self.assertEqual(skills[0]["items"], [SKILL_CATEGORIES["A"]["items"][0]])
+        self.assertEqual(other_skills, [])
+        self.assertEqual(specialists[0]["items"], ["Ann — @ann"])
+
+    async def test_falls_back_to_main_city_and_keeps_extras(self):
+        art = await self.db.get_resource_items("Artworks")
+
+        self.assertEqual(art[0]["cities"], ["Paris 🇫🇷"])
+        self.assertEqual(art[0]["extra"], ["🐥 Author: Me"])
+
+    async def test_reindexes_on_answer_update_and_delete(self):
+        self.registration["selected_property_types"] = []
+        await self.db.add_user_answer(1, "registration_data", json.dumps(self.registration))
+        self.assertEqual(await self.db.get_resource_items("Real Estate"), [])
+
+        await self.db.delete_user_answer(1)
+        self.assertEqual(await self.db.get_resource_items("Artworks"), [])
+
+    async def test_rebuild_matches_incremental_index(self):
+        before = await self.db.get_resource_items("Real Estate")
+
+        await self.db.rebuild_resource_items()
+
+        self.assertEqual(await self.db.get_resource_items("Real Estate"), before)
+
+
+class RegistrationCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"))
+        await self.db.init_db()
+
+        for user_id in (1, 2):
+            await self.db.add_user(user_id, None, f"User {user_id}", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+            await self.db.add_user_answer(user_id, "registration_data", json.dumps({"n": user_id}))
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def _data(self):
+        return {entry["user_id"]: entry["data"] for entry in await self.db.get_registration_entries()}
+
+    async def test_repeated_reads_are_hits(self):
+        self.assertEqual(await self._data(), {1: {"n": 1}, 2: {"n": 2}})
+        await self._data()
+
+        stats = self.db.registration_cache_stats()
+        self.assertEqual((stats["misses"], stats["hits"], stats["size"]), (2, 2, 2))
+
+    async def test_answer_update_reloads_only_that_user(self):
+        await self._data()
+
+        await self.db.add_user_answer(1, "registration_data", json.dumps({"n": 10}))
+
+        self.assertEqual(await self._data(), {1: {"n": 10}, 2: {"n": 2}})
+        self.assertEqual(self.db.registration_cache_stats()["misses"], 3)
+
+    async def test_hidden_and_deleted_users_drop_out(self):
+        await self._data()
+
+        await self.db.set_user_hidden(1, True)
+        await self.db.delete_user(2)
+        self.assertEqual(await self._data(), {})
+
+        await self.db.set_user_hidden(1, False)
+        self.assertEqual(await self._data(), {1: {"n": 1}})
+
+    async def test_deleted_answer_drops_out(self):
+        await self._data()
+
+        await self.db.delete_user_answer(2)
+
+        self.assertEqual(await self._data(), {1: {"n": 1}})
+
+    async def test_concurrent_reads_wait_for_the_reload(self):
+        await self._data()
+        await self.db.add_user_answer(1, "registration_data", json.dumps({"n": 10}))
+
+        first, second = await asyncio.gather(self._data(), self._data())
+
+        self.assertEqual(first, {1: {"n": 10}, 2: {"n": 2}})
+        self.assertEqual(second, first)
+
+
+class UserCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"), user_cache_size=2)
+        await self.db.init_db()
+        for user_id in (1, 2, 3):
+            await self.db.add_user(user_id, None, f"User {user_id}", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def test_repeated_lookups_are_hits(self):
+        first = await self.db.get_user(1)
+        first["points"] = 99  # callers get their own copy
+        second = await self.db.get_user(1)
+
+        self.assertEqual(second["points"], 0)
+        self.assertEqual(self.db.user_cache_stats(), {"hits": 1, "misses": 1, "size": 1})
+
+    async def test_unknown_users_are_cached_until_added(self):
+        self.assertIsNone(await self.db.get_user(4))
+        self.assertIsNone(await self.db.get_user(4))
+
+        await self.db.add_user(4, None, "User 4", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+
+        self.assertEqual((await self.db.get_user(4))["name"], "User 4")
+        self.assertEqual(self.db.user_cache_stats()["hits"], 1)
+
+    async def test_writes_invalidate(self):
+        await self.db.get_user(1)
+        await self.db.update_user_points(1, 5)
+        self.assertEqual((await self.db.get_user(1))["points"], 5)
+
+        await self.db.set_user_hidden(1, True)
+        self.assertEqual((await self.db.get_user(1))["is_hidden"], 1)
+
+        await self.db.delete_user(1)
+        self.assertIsNone(await self.db.get_user(1))
+
+    async def test_size_is_bounded_lru(self):
+        for user_id in (1, 2, 1, 3):
+            await self.db.get_user(user_id)
+
+        self.assertEqual(list(self.db._user_cache), [1, 3])
+
+    async def test_entries_expire(self):
+        self.db.user_cache_ttl = 0
+        await self.db.get_user(1)
+        await self.db.get_user(1)
+
+        self.assertEqual(self.db.user_cache_stats()["misses"], 2)
+
+
+class KeysetPaginationTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"))
+        await self.db.init_db()
+
+        for user_id, name in ((1, "Bea"), (2, "Al"), (3, "Bea"), (4, "Cy")):
+            await self.db.add_user(user_id, None, name, "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+        # Most lots share a created_at second, so the id tiebreak matters
+        for i in range(7):
+            await self.db.add_lot(1 + i % 4, "share", f"Lot {i}", "-", status="approved")
+        await self.db.add_lot(1, "seek", "Seek", "-", status="approved")
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def _walk(self, fetch):
+        pages, cursor = [], None
+        while True:
+            rows, cursor = await fetch(cursor)
+            pages.append(rows)
+            if cursor is None:
+                return pages
+
+    async def test_lot_pages_match_full_listing(self):
+        pages = await self._walk(lambda cursor: self.db.get_all_lots_page("share", cursor, limit=3))
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        expected = [lot["id"] for lot in await self.db.get_all_lots("share")]
+        self.assertEqual([lot["id"] for page in pages for lot in page], sorted(expected, reverse=True))
+        self.assertEqual(await self.db.count_lots("share"), 7)
+
+    async def test_new_rows_do_not_shift_later_pages(self):
+        first, cursor = await self.db.get_active_lots_page("share", limit=4)
+        await self.db.add_lot(2, "share", "Newest", "-", status="approved")
+
+        rest, _ = await self.db.get_active_lots_page("share", cursor, limit=4)
+
+        ids = [lot["id"] for lot in first + rest]
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(len(set(ids)), 7)
+
+    async def test_user_pages_follow_name_order(self):
+        pages = await self._walk(lambda cursor: self.db.get_all_users_page(cursor, limit=3))
+
+        self.assertEqual([[user["user_id"] for user in page] for page in pages], [[2, 1, 3], [4]])
+
+    async def test_malformed_cursor_starts_over(self):
+        first, _ = await self.db.get_all_lots_page(limit=2)
+        again, _ = await self.db.get_all_lots_page(cursor="garbage", limit=2)
+
+        self.assertEqual(first, again)
+        self.assertIsNone(decode_cursor("2026.x"))
+        self.assertEqual(decode_cursor(encode_cursor("2026-10-18 12:30:05", 9)), ("2026-10-18 12:30:05", 9))
+
+
+class PointsLedgerTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"), pool_size=4)
+        await self.db.init_db()
+        await self.db.add_user(1, None, "User 1", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def _points(self, user_id=1):
+        return (await self.db.get_user(user_id))["points"]
+
+    async def test_concurrent_awards_are_not_lost(self):
+        results = await asyncio.gather(*(self.db.add_points(1, 1, "deal", ref_id=i) for i in range(20)))
+
+        self.assertEqual(sorted(results), list(range(1, 21)))
+        self.assertEqual(await self._points(), 20)
+        self.assertEqual(len(await self.db.get_points_ledger(1, limit=100)), 20)
+
+    async def test_balance_cannot_go_negative(self):
+        self.assertIsNone(await self.db.add_points(1, -1, "admin"))
+        self.assertIsNone(await self.db.add_points(99, 1, "admin"))
+
+        self.assertEqual(await self._points(), 0)
+        self.assertEqual(await self.db.get_points_ledger(1), [])
+
+    async def test_set_points_records_delta(self):
+        await self.db.add_points(1, 2, "deal")
+        await self.db.update_user_points(1, 5)
+
+        ledger = await self.db.get_points_ledger(1)
+        self.assertEqual([(entry["delta"], entry["reason"]) for entry in ledger], [(3, "set"), (2, "deal")])
+
+    async def test_opening_balance_and_reconcile(self):
+        await self.db.add_user(2, None, "User 2", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-", points=4)
+        await self.db.add_points(2, 1, "deal")
+        async with self.db._connection() as conn:
+            await conn.execute("UPDATE users SET points = 40 WHERE user_id = 2")
+            await conn.commit()
+
+        self.assertEqual(await self.db.reconcile_points(), [(2, 40, 5)])
+        self.assertEqual(await self._points(2), 5)
+        self.assertEqual(await self.db.reconcile_points(), [])
+
+
+class UnitOfWorkTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"), pool_size=2)
+        await self.db.init_db()
+        await self.db.open_pool()
+        await self.db.add_user(1, None, "User 1", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def _register(self, user_id):
+        async with self.db.unit_of_work() as unit:
+            if await self.db.add_user(user_id, None, f"User {user_id}", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-"):
+                await self.db.add_user_answer(user_id, "registration_data", json.dumps({"cars": ["BMW"]}))
+        return unit
+
+    async def test_commits_all_statements_together(self):
+        unit = await self._register(2)
+
+        self.assertTrue(unit.committed)
+        self.assertEqual((await self.db.get_user(2))["name"], "User 2")
+        self.assertEqual(len(await self.db.get_user_answers(2)), 1)
+
+    async def test_failed_call_rolls_back_the_unit(self):
+        async with self.db.unit_of_work() as unit:
+            await self.db.add_user_answer(1, "registration_data", "{}")
+            self.assertFalse(await self.db.add_user(1, None, "Again", "-", "-", "-", "-"))
+
+        self.assertFalse(unit.committed)
+        self.assertEqual(await self.db.get_user_answers(1), [])
+        self.assertEqual((await self.db.get_user(1))["name"], "User 1")
+
+    async def test_exception_rolls_back_and_cache_stays_fresh(self):
+        await self.db.get_user(1)
+        with self.assertRaises(RuntimeError):
+            async with self.db.unit_of_work():
+                await self.db.add_points(1, 5, "test")
+                self.assertEqual((await self.db.get_user(1))["points"], 5)
+                raise RuntimeError("abort")
+
+        self.assertEqual((await self.db.get_user(1))["points"], 0)
+        self.assertEqual(await self.db.get_points_ledger(1), [])
+
+    async def test_nested_units_join_and_connection_returns_to_pool(self):
+        async with self.db.unit_of_work() as outer:
+            async with self.db.unit_of_work() as inner:
+                await self.db.delete_user(1)
+            self.assertIs(inner, outer)
+
+        self.assertTrue(outer.committed)
+        self.assertIsNone(await self.db.get_user(1))
+        self.assertEqual(self.db._pool.qsize(), 2)
+
+
+class SearchTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        # Uncached, so each search sees the writes before it; see the cache tests below
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"), search_cache_size=0)
+        await self.db.init_db()
+        await self.db.add_user(1, "ann", "Ann", "Paris 🇫🇷", "Paris 🇫🇷", "Photographer, café owner", "-")
+        await self.db.add_user(2, "bob", "Bob", "Paris 🇫🇷", "Paris 🇫🇷", "Photo studio", "-")
+        await self.db.set_user_hidden(2, True)
+        await self.db.add_user_answer(1, "registration_data", json.dumps({
+            "selected_property_types": ["Photo studio"],
+            "selected_prop_cities": ["Paris 🇫🇷", "Berlin 🇩🇪"],
+        }))
+        self.lot_id = await self.db.add_lot(1, "share", "Camera", "Medium format photo camera",
+                                            status="approved")
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def _found(self, query):
+        results, _ = await self.db.search(query)
+        return [(result["kind"], result["ref_id"]) for result in results]
+
+    async def test_matches_word_prefixes_across_sources(self):
+        self.assertEqual(await self._found("photo"), [("item", 1), ("profile", 1), ("lot", self.lot_id)])
+        self.assertEqual(await self._found("CAFE own"), [("profile", 1)])
+        self.assertEqual(await self._found("photo camera"), [("lot", self.lot_id)])
+        self.assertEqual(await self._found('"own*) -'), [("profile", 1)])
+        self.assertEqual(await self.db.search("  -- "), ([], None))
+
+    async def test_index_follows_writes(self):
+        await self.db.add_lot(1, "seek", "Tripod", "-")
+        self.assertEqual(await self._found("tripod"), [])
+
+        await self.db.admin_delete_lot(self.lot_id)
+        await self.db.delete_user_answer(1)
+        self.assertEqual(await self._found("photo"), [("profile", 1)])
+
+        await self.db.set_user_hidden(2, False)
+        self.assertEqual(await self._found("studio"), [("profile", 2)])
+
+        await self.db.delete_user(1)
+        async with self.db._connection() as conn:
+            async with conn.execute("SELECT user_id FROM search_index") as cursor:
+                self.assertEqual(await cursor.fetchall(), [(2,)])
+
+    async def test_pages(self):
+        for i in range(5):
+            await self.db.add_lot(1, "share", f"Lens {i}", "-", status="approved")
+
+        first, next_offset = await self.db.search("lens", limit=3)
+        second, last_offset = await self.db.search("lens", next_offset, limit=3)
+
+        self.assertEqual((next_offset, last_offset), (3, None))
+        self.assertEqual(sorted(r["title"] for r in first + second), [f"Lens {i}" for i in range(5)])
+
+    async def test_migration_backfills_existing_rows(self):
+        async with self.db._connection() as conn:
+            await conn.execute("DELETE FROM search_index")
+            await conn.execute("PRAGMA user_version = 4")
+            await conn.commit()
+        await self.db.close()
+
+        await self.db.init_db()
+
+        self.assertEqual(len(await self._found("photo")), 3)
+
+    async def test_migration_keys_items_on_id(self):
+        # resource_items as it was before migration 6: implicit rowids, rowid-keyed triggers
+        async with self.db._connection() as conn:
+            await conn.executescript("""
+                DROP TRIGGER resource_items_search_insert;
+                DROP TRIGGER resource_items_search_delete;
+                CREATE TABLE old_items AS
+                    SELECT user_id, category, subcategory, item, city, position, extra FROM resource_items;
+                DROP TABLE resource_items;
+                ALTER TABLE old_items RENAME TO resource_items;
+                CREATE TRIGGER resource_items_search_delete AFTER DELETE ON resource_items BEGIN
+                    DELETE FROM search_index WHERE rowid = OLD.rowid * 4 + 2;
+                END;
+                PRAGMA user_version = 5;
+            """)
+        await self.db.close()
+
+        await self.db.init_db()
+        async with self.db._connection() as conn:
+            async with conn.execute("SELECT MIN(id) FROM resource_items") as cursor:
+                [(item_id,)] = await cursor.fetchall()
+        self.assertEqual(await self._found("studio"), [("item", item_id)])
+
+        # VACUUM keeps declared ids, so re-saving the answers replaces the search rows
+        async with self.db._connection() as conn:
+            await conn.execute("VACUUM")
+        await self.db.add_user_answer(1, "registration_data", json.dumps({
+            "selected_property_types": ["Photo studio", "Loft"],
+        }))
+        self.assertEqual(len(await self._found("studio")), 1)
+        self.assertEqual(len(await self._found("loft")), 1)
+
+    async def test_cache_is_keyed_by_normalized_query(self):
+        self.db.search_cache_size = 8
+        first, _ = await self.db.search("Photo ")
+        first[0]["title"] = "changed"  # callers get their own copy
+        second, _ = await self.db.search("photo")
+
+        self.assertEqual(second[0]["title"], "Photo studio")
+        self.assertEqual(self.db.search_cache_stats(), {"hits": 1, "misses": 1, "size": 1})
+
+        await self.db.search("phot")
+        await self.db.search("photo", offset=1)
+        self.assertEqual(self.db.search_cache_stats()["size"], 3)
+
+    async def test_lot_writes_clear_cached_pages(self):
+        self.db.search_cache_size = 8
+        self.assertEqual(await self._found("camera"), [("lot", self.lot_id)])
+
+        await self.db.update_lot_status(self.lot_id, "rejected")
+        self.assertEqual(await self._found("camera"), [])
+
+        await self.db.update_lot_status(self.lot_id, "approved")
+        self.assertEqual(await self._found("camera"), [("lot", self.lot_id)])
+
+        await self.db.delete_lot(self.lot_id, 1)
+        self.assertEqual(await self._found("camera"), [])
+
+        lot_id = await self.db.add_lot(1, "share", "Camera bag", "-", status="approved")
+        self.assertEqual(await self._found("camera"), [("lot", lot_id)])
+
+        await self.db.admin_delete_lot(lot_id)
+        self.assertEqual(await self._found("camera"), [])
+
+    async def test_cached_pages_expire_and_hiding_clears_them(self):
+        self.db.search_cache_size = 8
+        self.db.search_cache_ttl = 0
+        await self.db.search("photo")
+        await self.db.search("photo")
+        self.assertEqual(self.db.search_cache_stats()["misses"], 2)
+
+        self.db.search_cache_ttl = 60
+        await self.db.search("photo")
+        await self.db.set_user_hidden(1, True)
+        self.assertEqual(await self._found("photo"), [])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+os.environ.setdefault("BOT_TOKEN", "42:TEST")
+
+from aiogram import Dispatcher
+from aiogram.methods import AnswerCallbackQuery, EditMessageText, SendMessage
+
+from bot.database import Database
+from bot.handlers import deals
+from tests.support import callback_update, recording_bot
+
+
+class DealTransitionTests(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The handlers' router can only be attached once
+        cls.dp = Dispatcher()
+        cls.dp.include_router(deals.router)
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"), pool_size=4)
+        await self.db.init_db()
+        for user_id in (1, 2):
+            await self.db.add_user(user_id, None, f"User {user_id}", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+        self.deal_id = await self.db.create_deal(1, 2)
+
+        self.bot, self.requests = recording_bot()
+
+    async def asyncTearDown(self):
+        await self.bot.session.close()
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def _tap_all(self, user_id, data, times):
+        await asyncio.gather(*(
+            self.dp.feed_update(self.bot, callback_update(i, user_id, data), db=self.db)
+            for i in range(times)
+        ))
+
+    def _alerts(self):
+        return [m.text for m in self.requests if isinstance(m, AnswerCallbackQuery)]
+
+    async def test_only_one_transition_applies(self):
+        results = await asyncio.gather(*(
+            self.db.transition_deal(self.deal_id, "receiver", 2, "pending", status)
+            for status in ("accepted", "declined", "accepted")
+        ))
+
+        self.assertEqual(sum(result.applied for result in results), 1)
+        winner = next(result.deal for result in results if result.applied)
+        self.assertEqual((await self.db.get_deal(self.deal_id))["status"], winner["status"])
+
+    async def test_conflict_returns_current_row(self):
+        deal, applied = await self.db.transition_deal(self.deal_id, "proposer", 2, "pending", "accepted")
+
+        self.assertFalse(applied)
+        self.assertEqual(deal["status"], "pending")
+        self.assertEqual(await self.db.transition_deal(999, "receiver", 2, "pending", "accepted"), (None, False))
+
+    async def test_parallel_completion_requests_send_one(self):
+        await self.db.transition_deal(self.deal_id, "receiver", 2, "pending", "accepted")
+
+        await self._tap_all(1, f"deal:complete:{self.deal_id}", 8)
+
+        self.assertEqual((await self.db.get_deal(self.deal_id))["status"], "completion_requested")
+        self.assertEqual([m.chat_id for m in self.requests if isinstance(m, SendMessage)], [2])
+        self.assertEqual(self._alerts().count("This deal is not in an accepted state."), 7)
+
+    async def test_parallel_confirmations_award_one_point(self):
+        await self.db.transition_deal(self.deal_id, "receiver", 2, "pending", "accepted")
+        await self.db.transition_deal(self.deal_id, "proposer", 1, "accepted", "completion_requested")
+
+        await self._tap_all(2, f"confirm:deal_confirm:{self.deal_id}", 8)
+
+        self.assertEqual((await self.db.get_user(1))["points"], 1)
+        self.assertEqual([m.chat_id for m in self.requests if isinstance(m, SendMessage)], [1])
+        self.assertEqual(sum(isinstance(m, EditMessageText) for m in self.requests), 1)
+        self.assertEqual(self._alerts(), ["This deal is not awaiting confirmation."] * 7)
+
+    async def test_failed_award_leaves_deal_awaiting_confirmation(self):
+        await self.db.transition_deal(self.deal_id, "receiver", 2, "pending", "accepted")
+        await self.db.transition_deal(self.deal_id, "proposer", 1, "accepted", "completion_requested")
+
+        async def fail(*args, **kwargs):
+            return None
+        with mock.patch.object(self.db, "add_points", fail):
+            await self._tap_all(2, f"confirm:deal_confirm:{self.deal_id}", 1)
+
+        self.assertEqual((await self.db.get_deal(self.deal_id))["status"], "completion_requested")
+        self.assertEqual(self._alerts(), ["Could not complete the deal. Please try again."])
+        self.assertFalse(any(isinstance(m, SendMessage) for m in self.requests))
+
+        await self._tap_all(2, f"confirm:deal_confirm:{self.deal_id}", 1)
+
+        self.assertEqual((await self.db.get_deal(self.deal_id))["status"], "completed")
+        self.assertEqual((await self.db.get_user(1))["points"], 1)
+
+    async def test_confirms_requests_made_before_completion_requested(self):
+        await self.db.transition_deal(self.deal_id, "receiver", 2, "pending", "accepted")
+        async with self.db._connection() as conn:
+            await conn.execute("UPDATE deals SET created_at = '2026-10-01 12:00:00' WHERE id = ?", (self.deal_id,))
+            await conn.commit()
+
+        await self._tap_all(2, f"confirm:deal_confirm:{self.deal_id}", 1)
+
+        self.assertEqual((await self.db.get_deal(self.deal_id))["status"], "completed")
+        self.assertEqual((await self.db.get_user(1))["points"], 1)
+
+    async def test_new_deals_need_a_completion_request(self):
+        await self.db.transition_deal(self.deal_id, "receiver", 2, "pending", "accepted")
+
+        await self._tap_all(2, f"confirm:deal_confirm:{self.deal_id}", 1)
+
+        self.assertEqual(self._alerts(), ["This deal is not awaiting confirmation."])
+        self.assertEqual((await self.db.get_deal(self.deal_id))["status"], "accepted")
+        self.assertEqual((await self.db.get_user(1))["points"], 0)
+
+    async def test_only_receiver_can_respond(self):
+        await self._tap_all(1, f"confirm:deal:{self.deal_id}", 1)
+
+        self.assertEqual(self._alerts(), ["This deal is not for you."])
+        self.assertEqual((await self.db.get_deal(self.deal_id))["status"], "pending")
+
+
+if __name__ == "__main__":
+    unittest.main()
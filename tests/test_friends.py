@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+os.environ.setdefault("BOT_TOKEN", "42:TEST")
+
+from aiogram import Dispatcher
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+
+from bot.database import Database
+from bot.handlers import friends
+from tests.support import callback_update, recording_bot
+
+
+class CityUsersTests(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The handlers' router can only be attached once
+        cls.dp = Dispatcher()
+        cls.dp.include_router(friends.router)
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"))
+        await self.db.init_db()
+        for user_id in (1, 2, 3):
+            await self.db.add_user(user_id, f"user{user_id}", f"User {user_id}", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+
+        self.bot, self.requests = recording_bot()
+
+    async def asyncTearDown(self):
+        await self.bot.session.close()
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def test_callback_is_answered_before_the_cards(self):
+        await self.dp.feed_update(self.bot, callback_update(1, 1, "city:Paris 🇫🇷"), db=self.db)
+
+        self.assertIsInstance(self.requests[0], AnswerCallbackQuery)
+        self.assertEqual([type(method) for method in self.requests[1:]], [SendMessage] * 3)
+
+    async def test_empty_city_alerts(self):
+        await self.dp.feed_update(self.bot, callback_update(1, 1, "city:Nowhere"), db=self.db)
+
+        [answer] = self.requests
+        self.assertTrue(answer.show_alert)
+
+
+if __name__ == "__main__":
+    unittest.main()
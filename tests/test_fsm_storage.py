@@ -0,0 +1,79 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+
+from bot.database import Database
+from bot.fsm_storage import SQLiteStorage
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+
+
+class Form(StatesGroup):
+    name = State()
+
+
+class SQLiteStorageTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"))
+        await self.db.init_db()
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def test_state_and_data_survive_restart(self):
+        storage = SQLiteStorage(self.db)
+        storage.start()
+        await storage.set_state(KEY, Form.name)
+        await storage.update_data(KEY, {"selected": {"b"}, "city": "Paris 🇫🇷"})
+        self.assertIsNone(await self.db.get_fsm_record("1:10:10:::default"))  # not flushed yet
+        await storage.close()
+
+        restarted = SQLiteStorage(self.db)
+        self.assertEqual(await restarted.get_state(KEY), Form.name.state)
+        self.assertEqual(await restarted.get_data(KEY), {"selected": ["b"], "city": "Paris 🇫🇷"})
+
+    async def test_batches_writes_until_flush(self):
+        storage = SQLiteStorage(self.db)
+        storage.start()
+        for page in range(5):
+            await storage.update_data(KEY, {"page": page})
+
+        await storage.flush()
+
+        self.assertEqual(await self.db.get_fsm_record("1:10:10:::default"), (None, '{"page":4}'))
+        await storage.close()
+
+    async def test_clearing_session_deletes_record(self):
+        storage = SQLiteStorage(self.db)
+        await storage.set_state(KEY, Form.name)
+        await storage.set_state(KEY, None)
+        await storage.set_data(KEY, {})
+
+        self.assertIsNone(await self.db.get_fsm_record("1:10:10:::default"))
+
+    async def test_stale_sessions_expire(self):
+        await self.db.save_fsm_records([("1:10:10:::default", "Form:name", None, 100)])
+
+        storage = SQLiteStorage(self.db, ttl=60)
+        self.assertIsNone(await storage.get_state(KEY))
+        await storage._sweep()
+        self.assertIsNone(await self.db.get_fsm_record("1:10:10:::default"))
+
+    async def test_idle_sessions_leave_memory(self):
+        storage = SQLiteStorage(self.db, idle_eviction=0)
+        await storage.set_state(KEY, Form.name)
+        self.assertEqual(storage.cached_sessions(), 1)
+
+        storage._evict_idle()
+
+        self.assertEqual(storage.cached_sessions(), 0)
+        self.assertEqual(await storage.get_state(KEY), Form.name.state)
+
+
+if __name__ == "__main__":
+    unittest.main()
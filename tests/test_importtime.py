@@ -0,0 +1,42 @@
+import unittest
+
+from bot import form_data
+from bot.importtime import format_report, parse_importtime
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _io
+import time:       300 |       1420 |   bot.form_data
+import time:      1000 |       2420 | bot.keyboards
+"""
+
+
+class ImportTimeTests(unittest.TestCase):
+    def test_parse(self):
+        records = parse_importtime(SAMPLE)
+
+        self.assertEqual([r.module for r in records], ["_io", "bot.form_data", "bot.keyboards"])
+        self.assertEqual((records[1].self_us, records[1].cumulative_us, records[1].depth), (300, 1420, 1))
+
+    def test_report_groups_by_package(self):
+        report = format_report(parse_importtime(SAMPLE))
+
+        self.assertIn("Total import time: 1.4 ms (3 modules)", report)
+        self.assertIn("1.3 ms  bot", report)
+        self.assertLess(report.index("bot.keyboards"), report.index("bot.form_data"))
+
+
+class LazyFormDataTests(unittest.TestCase):
+    def test_all_skills_is_derived_from_categories(self):
+        expected = [item for category in form_data.SKILL_CATEGORIES.values() for item in category["items"]]
+
+        self.assertEqual(form_data.ALL_SKILLS, expected)
+        self.assertIs(form_data.ALL_SKILLS, form_data.ALL_SKILLS)
+
+    def test_unknown_attribute(self):
+        with self.assertRaises(AttributeError):
+            form_data.NOT_A_LIST
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import hashlib
+import unittest
+from unittest import mock
+
+from bot import item_hashes
+from bot.form_data import CITIES, VESSEL_TYPES
+from bot.item_hashes import find_item_by_hash, hash_item
+
+
+class ItemHashTests(unittest.TestCase):
+    def test_hashes_match_existing_callback_ids(self):
+        for item in (CITIES[0], VESSEL_TYPES[-1], "Not in form data"):
+            self.assertEqual(hash_item(item), hashlib.md5(item.encode()).hexdigest()[:8])
+
+    def test_lookup_is_limited_to_the_given_options(self):
+        city = CITIES[3]
+
+        self.assertEqual(find_item_by_hash(CITIES, hash_item(city)), city)
+        self.assertIsNone(find_item_by_hash(VESSEL_TYPES, hash_item(city)))
+        self.assertIsNone(find_item_by_hash(CITIES, "ffffffff"))
+
+    def test_runtime_options_are_found(self):
+        options = ["Custom option", "Another"]
+
+        self.assertEqual(find_item_by_hash(options, hash_item("Another")), "Another")
+
+    def test_collisions_fail_at_build_time(self):
+        with mock.patch.object(item_hashes, "_form_items", return_value=["a", "b"]), \
+                mock.patch.object(item_hashes, "_md5_prefix", return_value="00000000"):
+            with self.assertRaises(ValueError):
+                item_hashes._build_index()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import unittest
+
+from pydantic import ValidationError
+
+os.environ.setdefault("BOT_TOKEN", "42:TEST")  # bot.config requires a token
+
+from bot.form_data import INTRO_CATEGORIES, SKILL_CATEGORIES
+from bot.handlers.open_resources import get_maps_keyboard
+from bot.keyboards import (
+    frozen_keyboard,
+    get_admin_panel_keyboard,
+    get_cancel_keyboard,
+    get_cities_keyboard,
+    get_lots_page_keyboard,
+    get_lots_type_keyboard,
+    get_resource_subcategories_keyboard,
+)
+
+
+class FrozenKeyboardTests(unittest.TestCase):
+    def test_same_arguments_share_one_markup(self):
+        self.assertIs(get_admin_panel_keyboard(), get_admin_panel_keyboard())
+        self.assertIs(get_maps_keyboard(), get_maps_keyboard())
+        self.assertIs(get_cities_keyboard("lot_city"), get_cities_keyboard(prefix="lot_city"))
+        self.assertIsNot(get_cities_keyboard("city"), get_cities_keyboard("lot_city"))
+
+    def test_dict_arguments_are_keyed_by_identity(self):
+        skills = get_resource_subcategories_keyboard(SKILL_CATEGORIES, "res_skill", "back_to_resources")
+        intros = get_resource_subcategories_keyboard(INTRO_CATEGORIES, "res_skill", "back_to_resources")
+
+        self.assertIsNot(skills, intros)
+        self.assertIs(skills, get_resource_subcategories_keyboard(SKILL_CATEGORIES, "res_skill", "back_to_resources"))
+
+    def test_cached_markup_is_frozen(self):
+        markup = get_admin_panel_keyboard()
+
+        with self.assertRaises(ValidationError):
+            markup.inline_keyboard = []
+        with self.assertRaises(ValidationError):
+            markup.inline_keyboard[0][0].text = "changed"
+        with self.assertRaises(ValidationError):
+            get_cancel_keyboard().resize_keyboard = False
+
+    def test_cached_rows_are_immutable(self):
+        markup = get_admin_panel_keyboard()
+        button = markup.inline_keyboard[0][0]
+
+        with self.assertRaises(AttributeError):
+            markup.inline_keyboard.append([button])
+        with self.assertRaises(TypeError):
+            markup.inline_keyboard[0][0] = button
+        with self.assertRaises(AttributeError):
+            get_cancel_keyboard().keyboard[0].append(button)
+
+    def test_frozen_rows_can_seed_a_builder(self):
+        markup = get_lots_page_keyboard("share", "cursor")
+
+        self.assertEqual(markup.inline_keyboard[0][0].callback_data, "lots_pg:share:cursor")
+        self.assertEqual(len(markup.inline_keyboard), len(get_lots_type_keyboard().inline_keyboard) + 1)
+
+    def test_frozen_markup_serializes_like_the_original(self):
+        @frozen_keyboard
+        def build():
+            return get_admin_panel_keyboard.__wrapped__()
+
+        original = get_admin_panel_keyboard.__wrapped__()
+        self.assertEqual(build().model_dump(exclude_none=True), original.model_dump(exclude_none=True))
+        self.assertEqual(get_cancel_keyboard().resize_keyboard, True)
+
+    def test_lru_bound(self):
+        calls = []
+
+        @frozen_keyboard(maxsize=2)
+        def build(value):
+            calls.append(value)
+            return get_admin_panel_keyboard.__wrapped__()
+
+        for value in (1, 2, 1, 3, 1, 2):
+            build(value)
+
+        self.assertEqual(calls, [1, 2, 3, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import math
+import tempfile
+import unittest
+from pathlib import Path
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.types import Message
+from aiohttp import ClientSession
+
+from bot.database import Database
+from bot.metrics import ApiCallMetricsMiddleware, Histogram, Metrics, instrument_dispatcher, start_metrics_server
+from tests.support import message_update
+
+
+class HistogramTests(unittest.TestCase):
+    def test_quantiles_are_bucket_bounds(self):
+        histogram = Histogram((0.01, 0.1, 1.0))
+        for value in (0.005, 0.01, 0.05, 0.05, 5.0):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [2, 2, 0, 1])
+        self.assertEqual(histogram.quantile(0.4), 0.01)
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(1.0), math.inf)
+        self.assertEqual(Histogram((1.0,)).quantile(0.5), 0.0)
+
+
+class InstrumentationTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"))
+        await self.db.init_db()
+        await self.db.add_user(1, None, "User 1", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+
+        self.metrics = Metrics()
+        self.db.set_query_hook(self.metrics.record_query)
+        self.bot = Bot(token="42:TEST")
+        self.bot.session.middleware(ApiCallMetricsMiddleware(self.metrics))
+
+        async def sent(make_request, bot, method):
+            return True
+        self.bot.session.middleware(sent)
+
+        router = Router()
+
+        @router.message(F.text == "points")
+        async def show_points(message: Message, db: Database):
+            await db.get_user(1)
+            await db.add_points(1, 1, "test")
+            await message.answer("ok")
+
+        self.dp = Dispatcher()
+        instrument_dispatcher(self.dp, self.metrics)
+        self.dp.include_router(router)
+
+    async def asyncTearDown(self):
+        await self.bot.session.close()
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def test_records_handler_time_and_calls(self):
+        await self.dp.feed_update(self.bot, message_update(1, 1, "points"), db=self.db)
+        await self.dp.feed_update(self.bot, message_update(2, 1, "other"), db=self.db)
+
+        handlers = self.metrics.histograms["bot_handler_seconds"]
+        self.assertEqual(set(handlers), {"test_metrics.show_points", "unhandled"})
+        self.assertEqual(self.metrics.histograms["bot_handler_db_calls"]["test_metrics.show_points"].sum, 2)
+        self.assertEqual(self.metrics.histograms["bot_handler_api_calls"]["test_metrics.show_points"].sum, 1)
+        self.assertEqual(self.metrics.histograms["bot_handler_db_calls"]["unhandled"].sum, 0)
+        self.assertEqual(set(self.metrics.histograms["bot_db_query_seconds"]), {"get_user", "add_points"})
+        self.assertIn("test_metrics.show_points: 1×", self.metrics.summary())
+
+    async def test_query_hook_can_be_removed(self):
+        self.db.set_query_hook(None)
+        await self.db.get_user(1)
+
+        self.assertNotIn("bot_db_query_seconds", self.metrics.histograms)
+
+    async def test_metrics_endpoint(self):
+        self.metrics.add_collector("queue", lambda: {"queued": 3})
+        await self.dp.feed_update(self.bot, message_update(1, 1, "points"), db=self.db)
+        runner = await start_metrics_server(self.metrics, "127.0.0.1", 0)
+        try:
+            port = runner.addresses[0][1]
+            async with ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                    body = await response.text()
+        finally:
+            await runner.cleanup()
+
+        self.assertIn('bot_handler_seconds_count{handler="test_metrics.show_points"} 1', body)
+        self.assertIn('bot_handler_api_calls_bucket{handler="test_metrics.show_points",le="1.0"} 1', body)
+        self.assertIn("bot_queue_queued 3", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.methods import EditMessageReplyMarkup, EditMessageText
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.multiselect import MarkupEditor, MarkupEditorMiddleware
+
+
+def keyboard(*selected):
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=("✅ " if item in selected else "") + item, callback_data=f"opt:{item}")]
+        for item in ("a", "b", "c")
+    ])
+
+
+class MarkupEditorTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.editor = MarkupEditor(debounce=0.01)
+        self.addAsyncCleanup(self.editor.close)
+        self.edits = []
+
+    def _message(self, markup, error=None):
+        async def edit_reply_markup(reply_markup):
+            if error is not None:
+                raise error
+            self.edits.append(reply_markup)
+        return SimpleNamespace(chat=SimpleNamespace(id=1), message_id=5, reply_markup=markup,
+                               edit_reply_markup=edit_reply_markup)
+
+    async def test_burst_of_taps_becomes_one_edit(self):
+        message = self._message(keyboard())
+
+        for selected in (("a",), ("a", "b"), ("a", "b", "c")):
+            await self.editor.edit(message, keyboard(*selected))
+        await self.editor.close()
+
+        self.assertEqual(self.edits, [keyboard("a", "b", "c")])
+        self.assertEqual(self.editor.stats()["coalesced"], 2)
+
+    async def test_wait_applied_is_per_chat(self):
+        message = self._message(keyboard())
+        other = SimpleNamespace(chat=SimpleNamespace(id=2), message_id=5, reply_markup=None,
+                                edit_reply_markup=message.edit_reply_markup)
+        self.editor.debounce = 0.05
+        await self.editor.edit(message, keyboard("a"))
+        await self.editor.edit(other, keyboard("b"))
+
+        await asyncio.wait_for(self.editor.wait_applied(1), 0.04 + 0.05)
+
+        self.assertEqual(self.edits[:1], [keyboard("a")])
+        await self.editor.wait_applied(3)  # nothing scheduled
+
+    async def test_unchanged_keyboard_is_not_sent(self):
+        # A double tap on one option ends where it started
+        message = self._message(keyboard("a"))
+
+        await self.editor.edit(message, keyboard())
+        await self.editor.edit(message, keyboard("a"))
+        await self.editor.close()
+
+        self.assertEqual(self.edits, [])
+        self.assertEqual(self.editor.stats()["skipped"], 1)
+
+    async def test_not_modified_error_is_swallowed(self):
+        error = TelegramBadRequest(EditMessageReplyMarkup(chat_id=1, message_id=5),
+                                   "Bad Request: message is not modified")
+        message = self._message(keyboard(), error=error)
+
+        await self.editor.edit(message, keyboard("a"))
+        await self.editor.close()
+
+        self.assertEqual(self.editor.stats()["skipped"], 1)
+
+    async def test_other_errors_are_logged_and_counted(self):
+        error = TelegramRetryAfter(EditMessageReplyMarkup(chat_id=1, message_id=5), "Flood control", 3)
+        message = self._message(keyboard(), error=error)
+
+        await self.editor.edit(message, keyboard("a"))
+        with self.assertLogs("bot.multiselect", "WARNING"):
+            await self.editor.wait_applied(1)
+
+        self.assertEqual(self.editor._tasks, {})
+        self.assertEqual(self.editor.stats()["failed"], 1)
+
+        # The keyboard wasn't applied, so the same one is sent again on the next tap
+        message.edit_reply_markup = self._message(keyboard()).edit_reply_markup
+        await self.editor.edit(message, keyboard("a"))
+        await self.editor.close()
+        self.assertEqual(self.edits, [keyboard("a")])
+
+    async def test_direct_edit_supersedes_pending_keyboard(self):
+        message = self._message(keyboard())
+        middleware = MarkupEditorMiddleware(self.editor)
+        requests = []
+
+        async def make_request(bot, method):
+            requests.append(method)
+
+        await self.editor.edit(message, keyboard("a"))
+        # e.g. the "Done" handler moving the message on to the next question
+        await middleware(make_request, None, EditMessageText(chat_id=1, message_id=5, text="Next"))
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(self.edits, [])
+        self.assertEqual(self.editor.stats()["pending"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import re
+import tempfile
+import unittest
+from pathlib import Path
+
+from bot.database import Database, encode_cursor
+
+
+# Any "SCAN <table>" step visits every row, with or without "USING INDEX";
+# only "SEARCH" steps are bounded by the WHERE clause.
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)")
+
+# Queries that are known to scan and why. Keep this as small as possible.
+ALLOWED_SCANS = {
+    # Listings that return every row by design; they walk an index so no sort is needed
+    "get_all_cities",
+    "get_resource_cities",
+    "get_all_users",
+    "get_all_lots(all)",
+    "get_visible_users",
+    "get_all_deals",
+    # Admin page headers; COUNT(*) walks the smallest covering index
+    "count_lots(all)",
+    "count_deals",
+    # Periodic consistency check; compares every user with their ledger sum
+    "reconcile_points",
+    # Admin re-index of every registration; deleting every row fires the search-index trigger per row
+    "rebuild_resource_items",
+    # FTS5 reports its MATCH lookup as a virtual-table SCAN; the CTE scan covers only matches
+    "search",
+}
+
+
+class QueryPlanTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"), pool_size=1)
+        await self.db.init_db()
+        await self.db.add_user(1, "one", "One", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+        await self.db.add_user(2, "two", "Two", "London 🇬🇧", "London 🇬🇧", "-", "-")
+
+        self.statements = []
+        conn = self.db._pool_connections[0]
+        await conn.set_trace_callback(self.statements.append)
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def _calls(self):
+        """Every Database method that reads or writes existing rows"""
+        db = self.db
+        lot_id = await db.add_lot(1, "share", "Title", "Desc", category="Equipment", status="approved")
+        deal_id = await db.create_deal(1, 2)
+        await db.add_resource(1, "Cars", "Car", "-", "Paris 🇫🇷")
+        await db.add_open_resource("maps", "Map", "-", city="Paris 🇫🇷")
+        await db.add_invite_token("token")
+        lot_cursor = encode_cursor("2030-01-01 00:00:00", lot_id)
+        deal_cursor = encode_cursor("2030-01-01 00:00:00", deal_id)
+        return {
+            "get_user": lambda: db.get_user(1),
+            "update_user_points": lambda: db.update_user_points(1, 3),
+            "add_points": lambda: db.add_points(1, 1, "test"),
+            "get_points_ledger": lambda: db.get_points_ledger(1),
+            "reconcile_points": lambda: db.reconcile_points(),
+            "add_user_answer": lambda: db.add_user_answer(1, "registration_data", "{}"),
+            "get_user_answers": lambda: db.get_user_answers(1),
+            "get_users_by_city": lambda: db.get_users_by_city("Paris 🇫🇷"),
+            "get_resource_items": lambda: db.get_resource_items("Real Estate"),
+            "get_resource_items(sub)": lambda: db.get_resource_items("Skills and Knowledge", "A"),
+            "rebuild_resource_items": lambda: db.rebuild_resource_items(),
+            "get_all_cities": lambda: db.get_all_cities(),
+            "get_resources_by_city_and_category": lambda: db.get_resources_by_city_and_category("Paris 🇫🇷", "Cars"),
+            "get_resource_cities": lambda: db.get_resource_cities(),
+            "get_user_lots": lambda: db.get_user_lots(1, "share"),
+            "get_lots_by_category": lambda: db.get_lots_by_category("Equipment"),
+            "get_active_lots": lambda: db.get_active_lots("share"),
+            "get_lot": lambda: db.get_lot(lot_id),
+            "get_pending_lots": lambda: db.get_pending_lots(),
+            "update_lot_status": lambda: db.update_lot_status(lot_id, "approved"),
+            "get_open_resources": lambda: db.get_open_resources("maps"),
+            "get_all_users": lambda: db.get_all_users(),
+            "is_valid_token": lambda: db.is_valid_token("token"),
+            "use_invite_token": lambda: db.use_invite_token("token"),
+            "get_deal": lambda: db.get_deal(deal_id),
+            "transition_deal": lambda: db.transition_deal(deal_id, "receiver", 2, "pending", "accepted"),
+            "transition_deal(conflict)": lambda: db.transition_deal(deal_id, "receiver", 2, "pending", "declined"),
+            "get_user_deals": lambda: db.get_user_deals(1),
+            "get_all_registration_data": lambda: db.get_all_registration_data(),
+            "get_all_registration_data(ids)": lambda: db.get_all_registration_data([1, 2]),
+            "get_all_lots": lambda: db.get_all_lots("share"),
+            "get_all_lots(all)": lambda: db.get_all_lots(),
+            "get_visible_users": lambda: db.get_visible_users(),
+            "get_all_deals": lambda: db.get_all_deals(),
+            "get_active_lots_page": lambda: db.get_active_lots_page("share", lot_cursor),
+            "get_all_lots_page": lambda: db.get_all_lots_page("share", lot_cursor),
+            "get_all_lots_page(all)": lambda: db.get_all_lots_page(cursor=lot_cursor),
+            "get_all_users_page": lambda: db.get_all_users_page("1"),
+            "get_all_deals_page": lambda: db.get_all_deals_page(deal_cursor),
+            "count_lots": lambda: db.count_lots("share"),
+            "count_lots(all)": lambda: db.count_lots(),
+            "count_deals": lambda: db.count_deals(),
+            "set_user_hidden": lambda: db.set_user_hidden(2, False),
+            "delete_lot": lambda: db.delete_lot(lot_id, 1),
+            "admin_delete_lot": lambda: db.admin_delete_lot(lot_id),
+            "delete_user_answer": lambda: db.delete_user_answer(1),
+            "get_fsm_record": lambda: db.get_fsm_record("1:1:1:::default"),
+            "delete_stale_fsm_records": lambda: db.delete_stale_fsm_records(0),
+            "search": lambda: db.search("title"),
+            "delete_user": lambda: db.delete_user(2),
+        }
+
+    async def _plan(self, sql):
+        async with self.db._connection() as conn:
+            async with conn.execute(f"EXPLAIN QUERY PLAN {sql}") as cursor:
+                return [row[3] for row in await cursor.fetchall()]
+
+    async def test_no_query_scans_a_full_table(self):
+        calls = await self._calls()
+        offenders = []
+        for name, call in calls.items():
+            self.statements.clear()
+            await call()
+            queries = [
+                sql for sql in self.statements
+                if sql.lstrip().split(None, 1)[0].upper() in {"SELECT", "UPDATE", "DELETE", "WITH"}
+            ]
+            self.assertTrue(queries, f"{name} issued no traced queries")
+            for sql in queries:
+                scans = [step for step in await self._plan(sql) if FULL_SCAN.match(step)]
+                if scans and name not in ALLOWED_SCANS:
+                    offenders.append(f"{name}: {scans} in {' '.join(sql.split())}")
+
+        self.assertEqual(offenders, [], "\n".join(offenders))
+
+
+if __name__ == "__main__":
+    unittest.main()
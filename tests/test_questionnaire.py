@@ -0,0 +1,162 @@
+import asyncio
+import os
+import unittest
+
+os.environ.setdefault("BOT_TOKEN", "42:TEST")
+
+from aiogram import Dispatcher, Router
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import AnswerCallbackQuery, EditMessageReplyMarkup
+
+from bot.item_hashes import hash_item
+from bot.multiselect import markup_editor
+from bot.questionnaire import CategoryItemsQuestion, KeyedLocks, OptionsQuestion, Question, Questionnaire
+from tests.support import callback_update, recording_bot
+
+OPTIONS = [f"Option {i}" for i in range(12)]
+CATEGORIES = {
+    "first": {"name": "First", "items": ["A", "B"]},
+    "second": {"name": "Second", "items": ["C"]},
+}
+
+
+class SlowStorage(MemoryStorage):
+    """MemoryStorage whose reads yield to the loop, like a storage doing I/O"""
+
+    async def get_data(self, key):
+        await asyncio.sleep(0)
+        return await super().get_data(key)
+
+
+class Form(StatesGroup):
+    kind = State()
+    items = State()
+    other = State()
+
+
+class QuestionnaireTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.bot, self.requests = recording_bot()
+
+        router = Router()
+        self.questionnaire = Questionnaire([
+            OptionsQuestion(Form.kind, "kind", "selected_kinds", OPTIONS),
+            CategoryItemsQuestion(Form.items, "item", "selected_items", CATEGORIES, "category"),
+        ])
+        self.questionnaire.register(router)
+        self.dp = Dispatcher(storage=SlowStorage())
+        self.dp.include_router(router)
+        self.key = StorageKey(bot_id=self.bot.id, chat_id=42, user_id=42)
+
+    async def asyncTearDown(self):
+        await self.bot.session.close()
+
+    async def _tap(self, data, update_id=1):
+        await self._feed(data, update_id)
+        await markup_editor.close()
+
+    async def _feed(self, data, update_id):
+        await self.dp.feed_update(self.bot, callback_update(update_id, 42, data))
+
+    async def _set(self, state, **data):
+        await self.dp.storage.set_state(self.key, state)
+        await self.dp.storage.set_data(self.key, data)
+
+    def _edits(self):
+        return [m.reply_markup for m in self.requests if isinstance(m, EditMessageReplyMarkup)]
+
+    async def test_toggle_selects_and_redraws(self):
+        await self._set(Form.kind)
+
+        await self._tap(f"kind:{hash_item('Option 3')}")
+
+        data = await self.dp.storage.get_data(self.key)
+        self.assertEqual(data["selected_kinds"], ["Option 3"])
+        texts = [b.text for row in self._edits()[0].inline_keyboard for b in row]
+        self.assertIn("✅ Option 3", texts)
+        self.assertTrue(any(isinstance(m, AnswerCallbackQuery) for m in self.requests))
+
+    async def test_toggle_again_deselects(self):
+        await self._set(Form.kind, selected_kinds=["Option 3"])
+
+        await self._tap(f"kind:{hash_item('Option 3')}")
+
+        self.assertEqual((await self.dp.storage.get_data(self.key))["selected_kinds"], [])
+
+    async def test_other_state_is_not_handled(self):
+        await self._set(Form.other)
+
+        await self._tap(f"kind:{hash_item('Option 3')}")
+
+        self.assertEqual(self.requests, [])
+
+    async def test_page_is_stored(self):
+        await self._set(Form.kind)
+
+        await self._tap("kind_page:1")
+
+        self.assertEqual((await self.dp.storage.get_data(self.key))["kind_page"], 1)
+        self.assertEqual(len(self._edits()), 1)
+
+    async def test_category_items_use_current_category(self):
+        await self._set(Form.items, category="first")
+
+        await self._tap(f"item:{hash_item('B')}")
+        await self._tap(f"item:{hash_item('C')}", update_id=2)
+
+        self.assertEqual((await self.dp.storage.get_data(self.key))["selected_items"], ["B"])
+        texts = [b.text for row in self._edits()[0].inline_keyboard for b in row]
+        self.assertIn("Next ➡️", texts)
+
+    async def test_category_page_needs_category(self):
+        await self._set(Form.items)
+
+        await self._tap("item_page:1")
+
+        self.assertEqual(self._edits(), [])
+
+    async def test_concurrent_taps_keep_every_selection(self):
+        await self._set(Form.kind)
+
+        await asyncio.gather(*(
+            self._feed(f"kind:{hash_item(option)}", update_id)
+            for update_id, option in enumerate(OPTIONS[:3], start=1)
+        ))
+        await markup_editor.close()
+
+        data = await self.dp.storage.get_data(self.key)
+        self.assertEqual(set(data["selected_kinds"]), set(OPTIONS[:3]))
+        self.assertEqual(len(self.questionnaire._locks), 0)
+
+
+class KeyedLocksTests(unittest.IsolatedAsyncioTestCase):
+    async def test_lock_is_dropped_once_released(self):
+        locks = KeyedLocks()
+        order = []
+
+        async def hold(name):
+            async with locks.hold("key"):
+                order.append(name)
+                await asyncio.sleep(0)
+                order.append(name)
+
+        await asyncio.gather(hold("a"), hold("b"))
+
+        self.assertEqual(order, ["a", "a", "b", "b"])
+        self.assertEqual(len(locks), 0)
+
+
+class QuestionTypeTests(unittest.TestCase):
+    def test_missing_methods_fail_at_construction(self):
+        class NoKeyboard(Question):
+            def options(self, data):
+                return OPTIONS
+
+        with self.assertRaises(TypeError):
+            NoKeyboard(Form.other, "other", "selected_other")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import CallbackQuery, Update
+
+from bot.routing import handler_patterns, index_callback_routes
+
+
+class Form(StatesGroup):
+    step = State()
+
+
+def build_routers():
+    first, second, catch_all = Router(), Router(), Router()
+
+    @first.callback_query(Form.step, F.data == "step_done")
+    async def step_done(callback: CallbackQuery):
+        return "step_done"
+
+    @first.callback_query(F.data.startswith("lots_pg"))
+    async def lots_page(callback: CallbackQuery):
+        return "lots_page"
+
+    @second.callback_query((F.data == "deal:list") | F.data.startswith("deal:complete:"))
+    async def deal(callback: CallbackQuery):
+        return "deal"
+
+    @second.callback_query(F.data.in_({"yes", "no"}))
+    async def answer(callback: CallbackQuery):
+        return "answer"
+
+    @catch_all.callback_query()
+    async def anything(callback: CallbackQuery):
+        return "anything"
+
+    return first, second, catch_all
+
+
+def callback_update(data):
+    return Update.model_validate({
+        "update_id": 1,
+        "callback_query": {
+            "id": "1",
+            "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+            "chat_instance": "1",
+            "data": data,
+        },
+    })
+
+
+class CallbackRoutingTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.bot = Bot(token="42:TEST")
+        self.dp = Dispatcher()
+        self.first, self.second, self.catch_all = build_routers()
+        for router in (self.first, self.second, self.catch_all):
+            self.dp.include_router(router)
+
+    async def asyncTearDown(self):
+        await self.bot.session.close()
+
+    async def _route(self, data):
+        return await self.dp.feed_update(self.bot, callback_update(data))
+
+    def test_patterns_from_magic_filters(self):
+        deal, answer = self.second.callback_query.handlers
+        self.assertEqual(handler_patterns(deal).heads, {"deal"})
+        self.assertEqual(handler_patterns(answer).heads, {"yes", "no"})
+        lots_page = self.first.callback_query.handlers[1]
+        self.assertEqual(handler_patterns(lots_page).head_prefixes, {"lots_pg"})
+        self.assertIsNone(handler_patterns(self.catch_all.callback_query.handlers[0]))
+
+    async def test_indexed_routing_matches_linear(self):
+        samples = ["deal:complete:5", "deal:list", "yes", "lots_pg:2", "lots_pgx", "step_done", "other"]
+        linear = [await self._route(data) for data in samples]
+
+        self.assertEqual(index_callback_routes(self.dp), 2)
+
+        self.assertEqual([await self._route(data) for data in samples], linear)
+        self.assertEqual(linear, ["deal", "deal", "answer", "lots_page", "lots_page", "anything", "anything"])
+
+    async def test_router_with_catch_all_is_not_indexed(self):
+        index_callback_routes(self.dp)
+
+        self.assertEqual(self.catch_all.callback_query._handler.filters, [])
+        self.assertEqual(len(self.second.callback_query._handler.filters), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+os.environ.setdefault("BOT_TOKEN", "42:TEST")
+
+from aiogram import Dispatcher
+from aiogram.methods import AnswerCallbackQuery, AnswerInlineQuery, EditMessageText, SendMessage
+
+from bot.database import Database
+from bot.handlers import search
+from tests.support import callback_update, inline_update, message_update, recording_bot
+
+
+class SearchHandlerTests(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The handlers' router can only be attached once
+        cls.dp = Dispatcher()
+        cls.dp.include_router(search.router)
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(str(Path(self.temp_dir.name) / "test.db"))
+        await self.db.init_db()
+        await self.db.add_user(1, "owner", "Owner", "Paris 🇫🇷", "Paris 🇫🇷", "-", "-")
+        for i in range(search.RESULTS_PER_PAGE + 2):
+            await self.db.add_lot(1, "share", f"Lens {i}", "Prime lens", status="approved")
+        self.profile = await self.db.get_user(1)
+
+        self.bot, self.requests = recording_bot()
+
+    async def asyncTearDown(self):
+        await self.bot.session.close()
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+    async def _feed(self, update, registered=True):
+        self.requests.clear()
+        await self.dp.feed_update(self.bot, update, db=self.db, profile=self.profile if registered else None)
+        return self.requests
+
+    @staticmethod
+    def _buttons(method):
+        return [button.callback_data for row in method.reply_markup.inline_keyboard for button in row]
+
+    async def test_pages_through_results_in_one_message(self):
+        [first] = await self._feed(message_update(1, 1, "/search lens"))
+        self.assertIsInstance(first, SendMessage)
+        self.assertTrue(first.text.startswith("🔎 Results for “lens”"))
+        self.assertIn(f"{search.RESULTS_PER_PAGE}. 🫧 Resource", first.text)
+        self.assertEqual(self._buttons(first), [f"search_pg:{search.RESULTS_PER_PAGE}"])
+
+        edit, answer = await self._feed(callback_update(2, 1, f"search_pg:{search.RESULTS_PER_PAGE}"))
+        self.assertIsInstance(edit, EditMessageText)
+        self.assertIsInstance(answer, AnswerCallbackQuery)
+        self.assertIn(f"{search.RESULTS_PER_PAGE + 2}. 🫧 Resource", edit.text)
+        self.assertEqual(self._buttons(edit), ["search_pg:0"])
+
+    async def test_empty_query_and_no_results(self):
+        [usage] = await self._feed(message_update(1, 1, "/search"))
+        self.assertIn("/search photo studio", usage.text)
+
+        [nothing] = await self._feed(message_update(2, 1, "/search zebra"))
+        self.assertEqual(nothing.text, "🔎 Nothing found for “zebra”.")
+        self.assertIsNone(nothing.reply_markup)
+
+    async def test_page_without_a_stored_query_expires(self):
+        [answer] = await self._feed(callback_update(1, 2, "search_pg:10"))
+
+        self.assertIsInstance(answer, AnswerCallbackQuery)
+        self.assertTrue(answer.show_alert)
+
+    async def test_inline_pages_use_next_offset(self):
+        [first] = await self._feed(inline_update(1, 1, "lens"))
+        self.assertIsInstance(first, AnswerInlineQuery)
+        self.assertEqual(len(first.results), search.RESULTS_PER_PAGE + 2)
+        self.assertEqual(first.next_offset, "")
+        self.assertTrue(first.is_personal)
+        self.assertEqual(first.results[0].id, "lot:1")
+        self.assertTrue(first.results[0].input_message_content.message_text.startswith("🫧 Resource: Lens 0"))
+
+        for i in range(search.INLINE_RESULTS_PER_PAGE + 1):
+            await self.db.add_lot(1, "share", f"Lens extra {i}", "-", status="approved")
+        [page] = await self._feed(inline_update(2, 1, "lens extra"))
+        [rest] = await self._feed(inline_update(3, 1, "lens extra", page.next_offset))
+
+        self.assertEqual(page.next_offset, str(search.INLINE_RESULTS_PER_PAGE))
+        self.assertEqual((len(rest.results), rest.next_offset), (1, ""))
+
+    async def test_inline_asks_non_members_to_register(self):
+        [answer] = await self._feed(inline_update(1, 5, "lens"), registered=False)
+
+        self.assertEqual(answer.results, [])
+        self.assertEqual(answer.button.start_parameter, "inline")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from bot.send_queue import SendQueue
+
+
+class SendQueueTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.sent = []
+
+    async def _start(self, **kwargs):
+        queue = SendQueue(**kwargs)
+        queue.start()
+        self.addAsyncCleanup(queue.close)
+        return queue
+
+    def _call(self, chat_id, text):
+        async def call():
+            self.sent.append((asyncio.get_running_loop().time(), chat_id, text))
+            return text
+        return call
+
+    async def test_per_chat_rate_and_order(self):
+        queue = await self._start(global_rate=1000, chat_rate=20, chat_burst=1)
+
+        results = await asyncio.gather(*(queue.submit(1, self._call(1, i)) for i in range(5)))
+
+        self.assertEqual(results, list(range(5)))
+        self.assertEqual([text for _, _, text in self.sent], list(range(5)))
+        gaps = [b[0] - a[0] for a, b in zip(self.sent, self.sent[1:])]
+        self.assertTrue(all(gap >= 0.04 for gap in gaps), gaps)
+
+    async def test_global_rate_spans_chats(self):
+        queue = await self._start(global_rate=20, chat_rate=1000, chat_burst=1)
+
+        await asyncio.gather(*(queue.submit(chat_id, self._call(chat_id, "x")) for chat_id in range(25)))
+
+        # The first second's burst of 20 goes out at once, the other 5 at 20/s
+        elapsed = self.sent[-1][0] - self.sent[0][0]
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertEqual(len({chat_id for _, chat_id, _ in self.sent}), 25)
+
+    async def test_retries_after_flood_control(self):
+        queue = await self._start(max_retries=2)
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise TelegramRetryAfter(SendMessage(chat_id=1, text="x"), "Too Many Requests", 0)
+            return "ok"
+
+        self.assertEqual(await queue.submit(1, flaky), "ok")
+        stats = queue.stats()
+        self.assertEqual((stats["sent"], stats["retries"], stats["queued"]), (1, 2, 0))
+
+    async def test_gives_up_after_max_retries(self):
+        queue = await self._start(max_retries=1)
+
+        async def always_flooded():
+            raise TelegramRetryAfter(SendMessage(chat_id=1, text="x"), "Too Many Requests", 0)
+
+        with self.assertRaises(TelegramRetryAfter):
+            await queue.submit(1, always_flooded)
+        self.assertEqual(queue.stats()["failed"], 1)
+
+    async def test_sends_directly_when_not_started(self):
+        queue = SendQueue()
+
+        self.assertEqual(await queue.submit(1, self._call(1, "now")), "now")
+        self.assertEqual(queue.stats()["sent"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+from aiogram import Bot, Dispatcher, F
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from bot.webhook import create_app
+
+# A recorded update as Telegram POSTs it
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 10,
+        "date": 1700000000,
+        "chat": {"id": 42, "type": "private"},
+        "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+        "text": "ping",
+    },
+}
+
+
+class WebhookAppTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.received = []
+        dp = Dispatcher()
+
+        @dp.message(F.text)
+        async def record(message: Message):
+            self.received.append(message.text)
+
+        self.bot = Bot(token="42:TEST")
+        app = create_app(dp, self.bot, "/webhook", secret_token="s3cret", handle_in_background=False)
+        self.client = TestClient(TestServer(app))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.bot.session.close()
+
+    async def test_update_with_secret_is_dispatched(self):
+        response = await self.client.post(
+            "/webhook", json=UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": "s3cret"}
+        )
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.received, ["ping"])
+
+    async def test_wrong_secret_is_rejected(self):
+        response = await self.client.post(
+            "/webhook", json=UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": "nope"}
+        )
+
+        self.assertEqual(response.status, 401)
+        self.assertEqual(self.received, [])
+
+    async def test_missing_secret_is_rejected(self):
+        response = await self.client.post("/webhook", json=UPDATE)
+
+        self.assertEqual(response.status, 401)
+        self.assertEqual(self.received, [])
+
+    def test_secret_is_required(self):
+        for secret in (None, ""):
+            with self.assertRaises(ValueError):
+                create_app(Dispatcher(), self.bot, "/webhook", secret_token=secret)
+
+    async def test_health(self):
+        response = await self.client.get("/health")
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(await response.json(), {"status": "ok"})
+
+
+if __name__ == "__main__":
+    unittest.main()